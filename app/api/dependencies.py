@@ -1,33 +1,208 @@
 # app/api/dependencies.py
+import functools
+import threading
+
+from app.embedding.batcher import QueryBatcher
+from app.embedding.cache import EmbeddingCache
 from app.embedding.embedder import Embedder
 from app.vector_store.store import VectorStore
+from app.vector_store.sharded import ShardedVectorStore
+from app.vector_store.index_factory import IndexConfig
+from app.retrieval.analyzer import Analyzer
+from app.retrieval.bm25_retriever import StoreBM25Retriever
 from app.retrieval.dense_retriever import DenseRetriever
+from app.retrieval.hybrid_retriever import HybridRetriever
 from app.llm.generator import LLMGenerator
 from app.llm.ollama_client import OllamaClient
 from app.rag.pipeline import RAGPipeline
-from app.core.settings import ensure_dirs, FAISS_INDEX_PATH, FAISS_META_PATH
+from app.retrieval.reranker import CrossEncoderReranker
+from app.core.settings import (
+    ensure_dirs,
+    BM25_INDEX,
+    BM25_STEMMER,
+    BM25_STOPWORDS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_MAX_MB,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_THREADS,
+    EMBEDDING_WORKERS,
+    HYBRID_BM25_K,
+    HYBRID_BM25_TIMEOUT_MS,
+    HYBRID_DENSE_K,
+    HYBRID_DENSE_TIMEOUT_MS,
+    QUERY_BATCH_SIZE,
+    QUERY_BATCH_WAIT_MS,
+    QUERY_CACHE_SIZE,
+    RERANKER_ENABLED,
+    RERANKER_MODEL,
+    RETRIEVER,
+    FAISS_INDEX_PATH,
+    FAISS_META_PATH,
+    LEGACY_META_PATH,
+    SEGMENTS_DIR,
+    VECTOR_INDEX_MMAP,
+    VECTOR_INDEX_PREFAULT,
+    VECTOR_INDEX_TYPE,
+    VECTOR_REDUCED_DIM,
+    VECTOR_REDUCTION,
+    VECTOR_RESCORE_FACTOR,
+    VECTOR_STORAGE,
+    VECTOR_STORE_SHARDS,
+)
 
 # Global singletons (optional but recommended)
 _embedder: Embedder | None = None
-_vector_store: VectorStore | None = None
+_ingest_embedder: Embedder | None = None
+_query_embedder: Embedder | QueryBatcher | None = None
+_vector_store: VectorStore | ShardedVectorStore | None = None
 _rag_pipeline: RAGPipeline | None = None
+_embedding_cache: EmbeddingCache | None = None
+_reranker: CrossEncoderReranker | None = None
+
+# Singletons are created either by the startup warmup thread or by the
+# first request, whichever comes first; never both
+_init_lock = threading.RLock()
+
+
+def _synchronized(fn):
+    @functools.wraps(fn)
+    def wrapper():
+        with _init_lock:
+            return fn()
+    return wrapper
+
+
+@_synchronized
+def get_embedding_cache() -> EmbeddingCache | None:
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_PATH:
+        _embedding_cache = EmbeddingCache(
+            EMBEDDING_CACHE_PATH,
+            max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+        )
+    return _embedding_cache
 
+
+@_synchronized
 def get_embedder() -> Embedder:
     global _embedder
     if _embedder is None:
-        _embedder = Embedder()
+        _embedder = Embedder(
+            cache=get_embedding_cache(),
+            query_cache_size=QUERY_CACHE_SIZE,
+            backend=EMBEDDING_BACKEND,
+            num_threads=EMBEDDING_THREADS,
+        )
     return _embedder
 
 
-def get_vector_store() -> VectorStore:
+@_synchronized
+def get_ingest_embedder() -> Embedder:
+    """
+    Embedder for document uploads: a multi-process pool when
+    EMBEDDING_WORKERS > 1, otherwise the shared in-process embedder.
+    """
+    global _ingest_embedder
+    if _ingest_embedder is None:
+        if EMBEDDING_WORKERS > 1:
+            _ingest_embedder = Embedder(
+                cache=get_embedding_cache(),
+                query_cache_size=0,
+                backend=EMBEDDING_BACKEND,
+                num_threads=EMBEDDING_THREADS,
+                workers=EMBEDDING_WORKERS,
+            )
+        else:
+            _ingest_embedder = get_embedder()
+    return _ingest_embedder
+
+
+@_synchronized
+def get_query_embedder() -> Embedder | QueryBatcher:
+    """
+    Embedder for the request path: concurrent single-query calls are
+    micro-batched into one encode call.
+    """
+    global _query_embedder
+    if _query_embedder is None:
+        if QUERY_BATCH_SIZE > 1:
+            _query_embedder = QueryBatcher(
+                get_embedder(),
+                max_batch=QUERY_BATCH_SIZE,
+                max_wait_ms=QUERY_BATCH_WAIT_MS,
+            )
+        else:
+            _query_embedder = get_embedder()
+    return _query_embedder
+
+
+@_synchronized
+def get_vector_store() -> VectorStore | ShardedVectorStore:
     global _vector_store
     if _vector_store is None:
         embedder = get_embedder()
-        _vector_store = VectorStore(dim=embedder.embedding_dimension)
-        if FAISS_INDEX_PATH.exists() and FAISS_META_PATH.exists():
-            _vector_store.load(str(FAISS_INDEX_PATH), str(FAISS_META_PATH))
+        config = IndexConfig(
+            index_type=VECTOR_INDEX_TYPE,
+            storage=VECTOR_STORAGE,
+            rescore_factor=VECTOR_RESCORE_FACTOR,
+            reduction=VECTOR_REDUCTION,
+            reduced_dim=VECTOR_REDUCED_DIM,
+        )
+        analyzer = Analyzer(stopwords=BM25_STOPWORDS, stemmer=BM25_STEMMER or None)
+
+        if VECTOR_STORE_SHARDS > 1:
+            _vector_store = ShardedVectorStore(
+                dim=embedder.embedding_dimension,
+                num_shards=VECTOR_STORE_SHARDS,
+                config=config,
+                mmap=VECTOR_INDEX_MMAP,
+                bm25=BM25_INDEX,
+                bm25_analyzer=analyzer,
+            )
+        else:
+            _vector_store = VectorStore(
+                dim=embedder.embedding_dimension,
+                config=config,
+                mmap=VECTOR_INDEX_MMAP,
+                bm25=BM25_INDEX,
+                bm25_analyzer=analyzer,
+            )
+
+        if (
+            isinstance(_vector_store, VectorStore)
+            and FAISS_INDEX_PATH.exists()
+            and not FAISS_META_PATH.exists()
+            and LEGACY_META_PATH.exists()
+        ):
+            # One-off migration from pickled metadata to the columnar format
+            _vector_store.load(str(FAISS_INDEX_PATH), str(LEGACY_META_PATH))
+            _vector_store.save(str(FAISS_INDEX_PATH), str(FAISS_META_PATH))
+
+        ensure_dirs()
+        _vector_store.open(
+            str(FAISS_INDEX_PATH),
+            str(FAISS_META_PATH),
+            str(SEGMENTS_DIR),
+        )
+
+        if VECTOR_INDEX_PREFAULT:
+            threading.Thread(
+                target=_vector_store.warmup,
+                name="vector-store-warmup",
+                daemon=True,
+            ).start()
     return _vector_store
 
+
+@_synchronized
+def get_reranker() -> CrossEncoderReranker | None:
+    global _reranker
+    if _reranker is None and RERANKER_ENABLED:
+        _reranker = CrossEncoderReranker(RERANKER_MODEL)
+    return _reranker
+
+
+@_synchronized
 def get_rag_pipeline() -> RAGPipeline:
     """
     Production pipeline:
@@ -36,14 +211,35 @@ def get_rag_pipeline() -> RAGPipeline:
     global _rag_pipeline
 
     if _rag_pipeline is None:
-        embedder = get_embedder()
+        embedder = get_query_embedder()
         vector_store = get_vector_store()  # ensures persistence load happens
 
-        retriever = DenseRetriever(embedder=embedder, vector_store=vector_store)
+        dense = DenseRetriever(embedder=embedder, vector_store=vector_store)
+        if RETRIEVER == "dense":
+            retriever = dense
+        elif RETRIEVER == "bm25":
+            retriever = StoreBM25Retriever(vector_store)
+        elif RETRIEVER == "hybrid":
+            retriever = HybridRetriever(
+                dense,
+                StoreBM25Retriever(vector_store),
+                dense_k=HYBRID_DENSE_K or None,
+                bm25_k=HYBRID_BM25_K or None,
+                dense_timeout_ms=HYBRID_DENSE_TIMEOUT_MS or None,
+                bm25_timeout_ms=HYBRID_BM25_TIMEOUT_MS or None,
+            )
+        else:
+            raise ValueError(
+                f"Unknown retriever: {RETRIEVER} (expected one of dense, bm25, hybrid)"
+            )
 
         ollama_client = OllamaClient(model="phi3")
         llm_generator = LLMGenerator(client=ollama_client)
 
-        _rag_pipeline = RAGPipeline(retriever=retriever, llm_generator=llm_generator)
+        _rag_pipeline = RAGPipeline(
+            retriever=retriever,
+            llm_generator=llm_generator,
+            reranker=get_reranker(),
+        )
 
     return _rag_pipeline
\ No newline at end of file
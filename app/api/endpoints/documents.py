@@ -1,8 +1,10 @@
 from typing import List
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from pydantic import BaseModel
 
-from app.processing.doc_registry import list_documents
+from app.api.dependencies import get_vector_store
+from app.processing.doc_registry import list_documents, unregister_document
+from app.vector_store.store import VectorStore
 
 router = APIRouter()
 
@@ -12,6 +14,34 @@ class DocumentRecord(BaseModel):
     num_chunks: int
     ingested_at: str
 
+class DeleteResponse(BaseModel):
+    document_id: str
+    deleted_chunks: int
+    vector_store_size: int
+
 @router.get("/", response_model=List[DocumentRecord])
 def list_docs():
     return list_documents()
+
+@router.delete("/{document_id}", response_model=DeleteResponse)
+def delete_doc(
+    document_id: str,
+    background_tasks: BackgroundTasks,
+    vector_store: VectorStore = Depends(get_vector_store),
+):
+    # Tombstones are logged durably by delete_document; space is
+    # reclaimed by compaction
+    deleted = vector_store.delete_document(document_id)
+    registered = unregister_document(document_id)
+
+    if not deleted and not registered:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if vector_store.needs_compaction:
+        background_tasks.add_task(vector_store.compact)
+
+    return DeleteResponse(
+        document_id=document_id,
+        deleted_chunks=deleted,
+        vector_store_size=vector_store.size,
+    )
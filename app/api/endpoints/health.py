@@ -1,7 +1,20 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.api.warmup import readiness
 
 router = APIRouter()
 
 @router.get("/")
 async def health_check():
     return {"status": "ok", "message": "Service is healthy"}
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    200 once warmup has loaded every component, or straight away when
+    warmup is disabled ("lazy"); 503 until then.
+    """
+    state = readiness()
+    ready = state["status"] in ("ready", "lazy")
+    return JSONResponse(state, status_code=200 if ready else 503)
@@ -4,15 +4,14 @@ from pathlib import Path
 import shutil
 import uuid
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Depends
 from pydantic import BaseModel
 
-from app.api.dependencies import get_embedder, get_vector_store
+from app.api.dependencies import get_ingest_embedder, get_vector_store
 from app.embedding.embedder import Embedder
 from app.vector_store.store import VectorStore
 from app.processing.ingestion_service import ingest_document  
-from app.processing.doc_registry import register_document
-from app.core.settings import ensure_dirs, FAISS_INDEX_PATH, FAISS_META_PATH
+from app.processing.doc_registry import get_document, register_document
 
 router = APIRouter()
 
@@ -24,24 +23,34 @@ class IngestResponse(BaseModel):
     vector_store_size: int
 
 
-@router.post("/load_documents", response_model=IngestResponse)
-async def load_documents(
-    file: UploadFile = File(...),
-    embedder: Embedder = Depends(get_embedder),
-    vector_store: VectorStore = Depends(get_vector_store),
-):
+def _save_upload(file: UploadFile) -> Path:
     # Basic content-type guard; extend as needed
     if file.content_type not in ("text/plain", "application/pdf"):
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    # Save upload to a temp folder
+    # Save upload to a temp folder; the uuid prefix keeps concurrent
+    # uploads with the same filename from overwriting each other
     upload_dir = Path("data/uploads")
     upload_dir.mkdir(parents=True, exist_ok=True)
-    temp_path = upload_dir / file.filename
+    temp_path = upload_dir / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
 
     with temp_path.open("wb") as f:
         shutil.copyfileobj(file.file, f)
 
+    return temp_path
+
+
+# Sync endpoints: saving, chunking, embedding and the store writes all
+# block, so they run in FastAPI's threadpool instead of the event loop
+@router.post("/load_documents", response_model=IngestResponse)
+def load_documents(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    embedder: Embedder = Depends(get_ingest_embedder),
+    vector_store: VectorStore = Depends(get_vector_store),
+):
+    temp_path = _save_upload(file)
+
     # Generate a document_id
     document_id = str(uuid.uuid4())
 
@@ -55,14 +64,18 @@ async def load_documents(
     if not chunks:
         raise HTTPException(status_code=400, detail="No chunks produced from document")
 
-    # 2) Embed chunks
-    vectors = embedder.embed_chunks(chunks)
+    # 2) Embed chunks block by block and add each block as it arrives
+    offset = 0
+    for vectors in embedder.embed_iter([chunk.text for chunk in chunks]):
+        vector_store.add(vectors, chunks[offset:offset + len(vectors)])
+        offset += len(vectors)
 
-    # 3) Add to vector store
-    vector_store.add(vectors, chunks)
+    # 3) Append the new rows to the segment log
+    vector_store.flush()
 
-    ensure_dirs()
-    vector_store.save(str(FAISS_INDEX_PATH), str(FAISS_META_PATH))
+    # Merge accumulated segments into the snapshot off the request path
+    if vector_store.needs_compaction:
+        background_tasks.add_task(vector_store.compact)
 
     
     register_document(
@@ -77,3 +90,54 @@ async def load_documents(
         num_chunks=len(chunks),
         vector_store_size=vector_store.size
     )
+
+
+@router.put("/{document_id}", response_model=IngestResponse)
+def replace_document(
+    document_id: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    embedder: Embedder = Depends(get_ingest_embedder),
+    vector_store: VectorStore = Depends(get_vector_store),
+):
+    """
+    Re-ingest a document under its existing document_id, replacing its
+    previous chunks instead of duplicating them.
+    """
+    if get_document(document_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    temp_path = _save_upload(file)
+
+    chunks = ingest_document(
+        temp_path,
+        document_id=document_id,
+        source=file.filename,
+    )
+
+    if not chunks:
+        raise HTTPException(status_code=400, detail="No chunks produced from document")
+
+    # Stream embedded blocks into the store, as load_documents does
+    vector_store.replace_document(
+        document_id,
+        embedder.embed_iter([chunk.text for chunk in chunks]),
+        chunks,
+    )
+    vector_store.flush()
+
+    if vector_store.needs_compaction:
+        background_tasks.add_task(vector_store.compact)
+
+    register_document(
+        document_id=document_id,
+        source=file.filename,
+        num_chunks=len(chunks),
+    )
+
+    return IngestResponse(
+        document_id=document_id,
+        source=file.filename,
+        num_chunks=len(chunks),
+        vector_store_size=vector_store.size
+    )
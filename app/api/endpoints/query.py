@@ -1,7 +1,10 @@
 # app/api/endpoints/query.py
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from app.models.filters import MetadataFilters
 from app.rag.pipeline import RAGPipeline
 from app.api.dependencies import get_rag_pipeline
 
@@ -9,15 +12,23 @@ router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
+    # e.g. {"source": ["a.pdf", "b.pdf"], "page": 3}
+    filters: Optional[MetadataFilters] = None
 
 class QueryResponse(BaseModel):
     answer: str
     sources: list
 
+# Sync endpoint: runs in FastAPI's threadpool, so concurrent queries
+# overlap and their embeddings can be micro-batched (store searches are
+# safe alongside each other and alongside ingests)
 @router.post("/", response_model=QueryResponse)
-async def query_endpoint(
+def query_endpoint(
     req: QueryRequest,
     pipeline: RAGPipeline = Depends(get_rag_pipeline)
 ):
-    result = pipeline.answer_query(req.query)
+    try:
+        result = pipeline.answer_query(req.query, filters=req.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
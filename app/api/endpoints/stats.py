@@ -1,5 +1,7 @@
 # app/api/endpoints/stats.py
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
@@ -10,9 +12,18 @@ from app.embedding.embedder import Embedder
 router = APIRouter()
 
 
+class QueryCacheStats(BaseModel):
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+
+
 class StatsResponse(BaseModel):
     vector_store_size: int
     embedding_dimension: int
+    query_cache: Optional[QueryCacheStats] = None
 
 
 @router.get("/stats", response_model=StatsResponse)
@@ -23,4 +34,9 @@ def get_stats(
     return StatsResponse(
         vector_store_size=vector_store.size,
         embedding_dimension=embedder.embedding_dimension,
+        query_cache=(
+            QueryCacheStats(**embedder.query_cache.stats())
+            if embedder.query_cache is not None
+            else None
+        ),
     )
@@ -0,0 +1,104 @@
+# app/api/warmup.py
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from app.api import dependencies
+from app.core.settings import VECTOR_INDEX_PREFAULT
+
+logger = logging.getLogger(__name__)
+
+# Short and long inputs, so the first real request hits kernels and
+# allocations that have already been used once
+_WARMUP_TEXTS = [
+    "warmup",
+    "what does the warmup query look like when it is a full sentence?",
+    " ".join(["retrieval augmented generation warmup passage"] * 24),
+]
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_state: Dict[str, Any] = {
+    "status": "not_started",  # not_started | warming | ready | lazy | failed
+    "components": {},
+    "error": None,
+    "seconds": None,
+}
+
+
+def readiness() -> Dict[str, Any]:
+    with _lock:
+        return {**_state, "components": dict(_state["components"])}
+
+
+def _mark(component: str, seconds: float) -> None:
+    with _lock:
+        _state["components"][component] = round(seconds, 3)
+
+
+def run_warmup() -> None:
+    """
+    Load the embedder, vector store and (if enabled) reranker through
+    the dependency singletons and run each once, so the first request
+    costs the same as any other.
+    """
+    with _lock:
+        _state["status"] = "warming"
+    started = time.perf_counter()
+
+    try:
+        t = time.perf_counter()
+        embedder = dependencies.get_embedder()
+        # Straight to the model: keeps warmup text out of the caches
+        embedder.model.encode(_WARMUP_TEXTS, convert_to_numpy=True)
+        embedder.model.encode(_WARMUP_TEXTS[0], convert_to_numpy=True)
+        dependencies.get_query_embedder()
+        _mark("embedder", time.perf_counter() - t)
+
+        t = time.perf_counter()
+        vector_store = dependencies.get_vector_store()
+        if not VECTOR_INDEX_PREFAULT:
+            # get_vector_store() already prefaults in the background otherwise
+            vector_store.warmup()
+        query = embedder.model.encode(_WARMUP_TEXTS[0], convert_to_numpy=True)
+        vector_store.search(query.astype("float32"), k=1)
+        _mark("vector_store", time.perf_counter() - t)
+
+        t = time.perf_counter()
+        reranker = dependencies.get_reranker()
+        if reranker is not None:
+            reranker.model.predict([(_WARMUP_TEXTS[1], _WARMUP_TEXTS[2])])
+            _mark("reranker", time.perf_counter() - t)
+
+        dependencies.get_rag_pipeline()
+    except Exception as e:
+        logger.exception("Warmup failed")
+        with _lock:
+            _state["status"] = "failed"
+            _state["error"] = repr(e)
+        return
+
+    with _lock:
+        _state["status"] = "ready"
+        _state["seconds"] = round(time.perf_counter() - started, 3)
+
+
+def skip_warmup() -> None:
+    """
+    Warmup is disabled: components load on first use, so the service is
+    ready to take traffic as soon as it starts.
+    """
+    with _lock:
+        if _state["status"] == "not_started":
+            _state["status"] = "lazy"
+
+
+def start_warmup() -> threading.Thread:
+    """Run `run_warmup` once, on a background thread."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run_warmup, name="api-warmup", daemon=True)
+            _thread.start()
+        return _thread
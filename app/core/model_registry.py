@@ -0,0 +1,81 @@
+# app/core/model_registry.py
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable
+
+
+@dataclass
+class _Entry:
+    refs: int = 0
+    model: Any = None
+    loaded: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+
+
+class ModelRegistry:
+    """
+    Process-wide, reference-counted cache of loaded models.
+
+    `acquire(key, loader)` returns the model for `key`, calling `loader`
+    only if no one holds it yet; concurrent acquirers of a model that is
+    still loading wait for the first load. `release(key)` drops a
+    reference, and the last release evicts the model (calling its
+    `close()` if it has one) so its weights can be freed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _Entry] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def refcount(self, key: Hashable) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refs if entry else 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry()
+            entry.refs += 1
+
+        if owner:
+            try:
+                entry.model = loader()
+            except BaseException as e:
+                entry.error = e
+            entry.loaded.set()
+        else:
+            entry.loaded.wait()
+
+        if entry.error is not None:
+            self.release(key)
+            raise entry.error
+        return entry.model
+
+    def release(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[key]
+
+        close = getattr(entry.model, "close", None)
+        if close is not None:
+            close()
+
+
+# Shared by Embedder and CrossEncoderReranker
+models = ModelRegistry()
@@ -1,11 +1,85 @@
+import os
 from pathlib import Path
 
 DATA_DIR = Path("data")
 
 
 FAISS_INDEX_PATH = DATA_DIR / "faiss.index"
-FAISS_META_PATH = DATA_DIR / "metadata.pkl"
+FAISS_META_PATH = DATA_DIR / "chunks.bin"
+LEGACY_META_PATH = DATA_DIR / "metadata.pkl"  # pickled chunk list (pre-columnar)
 DOC_REGISTRY_PATH = DATA_DIR / "documents.json"
+SEGMENTS_DIR = DATA_DIR / "segments"  # append-only ingest log
+
+# Content-addressed chunk embedding cache (empty path disables it)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(DATA_DIR / "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+
+# Embedding inference backend: torch | onnx | onnx-int8 (ONNX Runtime,
+# optionally dynamic int8). Exports are cached under ONNX_MODEL_DIR.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = runtime default
+ONNX_MODEL_DIR = DATA_DIR / "onnx"
+
+# > 1 embeds bulk ingests in a pool of worker processes, one model copy each
+# (EMBEDDING_THREADS then sets threads per worker; 0 = cores / workers)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+
+# In-memory LRU of query embeddings (0 disables)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# Micro-batching of concurrent query embeddings (batch size <= 1 disables)
+QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", "32"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "2"))
+
+# Index backend for new stores: flat | hnsw | ivf_flat | ivf_pq
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+
+# Vector encoding: float32 | fp16 | sq8 | binary (binary requires flat)
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+
+# > 0 keeps full-precision vectors on disk and re-ranks k * factor candidates
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "0"))
+
+# Dimensionality reduction before indexing: none | pca | truncate
+# (truncate suits Matryoshka-trained models); reduced vectors are re-normalized
+VECTOR_REDUCTION = os.getenv("VECTOR_REDUCTION", "none")
+VECTOR_REDUCED_DIM = int(os.getenv("VECTOR_REDUCED_DIM", "0"))
+
+# Memory-map snapshots on load (near-instant startup, page cache shared
+# between workers); prefault reads them into the page cache in the background
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "1") == "1"
+VECTOR_INDEX_PREFAULT = os.getenv("VECTOR_INDEX_PREFAULT", "0") == "1"
+
+# > 1 partitions the index into a ShardedVectorStore with parallel search
+VECTOR_STORE_SHARDS = int(os.getenv("VECTOR_STORE_SHARDS", "1"))
+
+# Retriever behind the API pipeline: dense | bm25 | hybrid (dense + BM25, RRF)
+RETRIEVER = os.getenv("RETRIEVER", "dense")
+
+# Hybrid retrieval: candidates fetched per leg (0 = the requested k) and
+# per-leg timeouts (0 = wait); a leg that times out is left out of the fusion
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "0"))
+HYBRID_BM25_K = int(os.getenv("HYBRID_BM25_K", "0"))
+HYBRID_DENSE_TIMEOUT_MS = float(os.getenv("HYBRID_DENSE_TIMEOUT_MS", "0"))
+HYBRID_BM25_TIMEOUT_MS = float(os.getenv("HYBRID_BM25_TIMEOUT_MS", "0"))
+
+# Keep a BM25 index inside the vector store, updated on every upload /
+# delete and saved with each snapshot (faiss.index.vNNNNNN.bm25); always
+# on when RETRIEVER uses BM25
+BM25_INDEX = os.getenv("BM25_INDEX", "0") == "1" or RETRIEVER in ("bm25", "hybrid")
+
+# BM25 text analysis: drop English stopwords, and Snowball stemmer language
+# (e.g. "english"; empty = none). Changing either re-indexes on next load.
+BM25_STOPWORDS = os.getenv("BM25_STOPWORDS", "0") == "1"
+BM25_STEMMER = os.getenv("BM25_STEMMER", "")
+
+# Load and warm models / index in the background when the API starts;
+# GET /health/ready reports when this has finished
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+# Cross-encoder reranking of retrieved chunks in the API pipeline
+RERANKER_ENABLED = os.getenv("RERANKER_ENABLED", "0") == "1"
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
 
 def ensure_dirs() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,134 @@
+# app/embedding/batcher.py
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+from app.embedding.embedder import Embedder
+
+_STOP = object()
+
+
+class QueryBatcher:
+    """
+    Micro-batcher in front of an Embedder for concurrent query traffic.
+
+    Callers submit single queries; a worker thread collects whatever
+    arrives within `max_wait_ms` of the first pending query (or until
+    `max_batch` are pending), encodes them with one model call and
+    resolves each caller's future. A query with nothing else pending is
+    encoded immediately.
+
+    Exposes the Embedder methods retrievers use, so it can be passed
+    wherever an Embedder is expected. Batch calls go straight through.
+    """
+
+    def __init__(self, embedder: Embedder, max_batch: int = 32, max_wait_ms: float = 2.0):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[Tuple[str, Future] | object]" = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run,
+            name="query-batcher",
+            daemon=True,
+        )
+        self._worker.start()
+
+    @property
+    def model_name(self) -> str:
+        return self.embedder.model_name
+
+    @property
+    def embedding_dimension(self) -> int:
+        return self.embedder.embedding_dimension
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        future: "Future[np.ndarray]" = Future()
+
+        # Cached queries never wait for a batch
+        query_cache = self.embedder.query_cache
+        cached = query_cache.get(self.embedder.cache_namespace, text) if query_cache else None
+        if cached is not None:
+            future.set_result(cached)
+        else:
+            self._queue.put((text, future))
+        return future
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def embed_text_async(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.embed_texts(texts)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _collect(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        """
+        Block for the first request, then gather more until the batch is
+        full or the wait window closes. A request that arrives alone goes
+        out at once; the window only applies while others are pending, so
+        an idle service adds no latency. Returns (batch, stop requested).
+        """
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if len(batch) == 1 or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if not batch:
+                continue
+
+            live = [
+                (text, future)
+                for text, future in batch
+                if future.set_running_or_notify_cancel()
+            ]
+            if not live:
+                continue
+
+            try:
+                # submit() already consulted the query cache
+                vectors = self.embedder.embed_queries(
+                    [text for text, _ in live],
+                    check_cache=False,
+                )
+            except Exception as e:
+                for _, future in live:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(live, vectors):
+                future.set_result(vector)
@@ -1,24 +1,78 @@
 # app/embedding/embedder.py
-from typing import List
+import weakref
+from typing import Any, Dict, Iterator, List, Sequence
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
+from app.core.model_registry import models
+from app.embedding.cache import EmbeddingCache, QueryCache, cache_key, normalize_text
 from app.models.document_models import DocumentChunk
 
 
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
 class Embedder:
     """
     Wrapper around a SentenceTransformer embedding model.
     Loads once at startup and provides embedding utilities.
     Embeddings are L2-normalized for cosine-style similarity.
+
+    The model itself comes from the process-wide ModelRegistry, so
+    Embedders for the same model and backend share one copy of the
+    weights; it is released on `close()` or garbage collection.
+
+    With an EmbeddingCache, `embed_texts` only sends texts not seen
+    before (for this model) to the model. `embed_text` (queries) goes
+    through an in-memory LRU of `query_cache_size` entries (0 disables).
+
+    `backend` selects the inference runtime: "torch" (SentenceTransformer),
+    "onnx" (ONNX Runtime) or "onnx-int8" (ONNX Runtime, dynamic int8
+    quantization). `num_threads` sets the ONNX Runtime intra-op threads
+    (0 keeps the runtime default).
+
+    With `workers` > 1 the model runs in an EmbeddingPool of that many
+    processes (`num_threads` then sets threads per worker) for bulk
+    ingestion.
     """
 
     def __init__(
         self,
-        model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache: EmbeddingCache | None = None,
+        query_cache_size: int = 1024,
+        backend: str = "torch",
+        num_threads: int = 0,
+        workers: int = 0,
     ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend
+
+        if workers <= 1:
+            workers = 0
+            if backend == "torch":
+                num_threads = 0  # in-process torch ignores it; share one copy
+        key = ("embedder", model_name, backend, num_threads, workers)
+        self.model = models.acquire(
+            key,
+            lambda: self._load_model(model_name, backend, num_threads, workers),
+        )
+        self._release = weakref.finalize(self, models.release, key)
+        self.cache = cache
+        self.query_cache = QueryCache(query_cache_size) if query_cache_size > 0 else None
+
+    @property
+    def cache_namespace(self) -> str:
+        """
+        Name embeddings are cached under. Each backend gets its own entries:
+        ONNX and quantized vectors differ slightly from torch ones, and a
+        backend comparison must not read another backend's vectors.
+        """
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}#{self.backend}"
 
     @property
     def embedding_dimension(self) -> int:
@@ -26,19 +80,139 @@ class Embedder:
 
     def embed_text(self, text: str) -> np.ndarray:
         """Embed a single string into a normalized vector."""
-        vector = self.model.encode(text, convert_to_numpy=True)
-        return self._normalize(vector)
+        if self.query_cache is not None:
+            cached = self.query_cache.get(self.cache_namespace, text)
+            if cached is not None:
+                return cached
+
+        vector = self._normalize(self.model.encode(text, convert_to_numpy=True))
+
+        if self.query_cache is not None:
+            return self.query_cache.put(self.cache_namespace, text, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str], check_cache: bool = True) -> List[np.ndarray]:
+        """
+        Embed several queries with one encode call, going through the
+        query cache like `embed_text` (pass check_cache=False if the
+        caller already looked them up). Duplicates are encoded once.
+        """
+        vectors: List[np.ndarray | None] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        lookup = self.query_cache is not None and check_cache
 
-    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        for i, text in enumerate(texts):
+            cached = self.query_cache.get(self.cache_namespace, text) if lookup else None
+            if cached is not None:
+                vectors[i] = cached
+            else:
+                pending.setdefault(normalize_text(text), []).append(i)
+
+        if pending:
+            miss_texts = [texts[rows[0]] for rows in pending.values()]
+            encoded = self._normalize(self.model.encode(miss_texts, convert_to_numpy=True))
+
+            for text, vector, rows in zip(miss_texts, encoded, pending.values()):
+                if self.query_cache is not None:
+                    vector = self.query_cache.put(self.cache_namespace, text, vector)
+                for i in rows:
+                    vectors[i] = vector
+
+        return vectors
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """Embed multiple strings into normalized vectors."""
-        vectors = self.model.encode(texts, convert_to_numpy=True)
-        return self._normalize(vectors)
+        if self.cache is None:
+            vectors = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+            return self._normalize(vectors)
+
+        cached = self.cache.get_many(self.cache_namespace, texts)
+        misses = [i for i in range(len(texts)) if i not in cached]
+
+        vectors = np.empty((len(texts), self.embedding_dimension), dtype="float32")
+        for i, vector in cached.items():
+            vectors[i] = vector
+
+        if misses:
+            # Encode each distinct miss once
+            unique: Dict[str, List[int]] = {}
+            for i in misses:
+                unique.setdefault(cache_key(self.cache_namespace, texts[i]), []).append(i)
+
+            miss_texts = [texts[rows[0]] for rows in unique.values()]
+            encoded = self._normalize(
+                self.model.encode(miss_texts, batch_size=batch_size, convert_to_numpy=True)
+            )
+            for vector, rows in zip(encoded, unique.values()):
+                vectors[rows] = vector
+            self.cache.put_many(self.cache_namespace, miss_texts, encoded)
+
+        return vectors
+
+    def embed_iter(
+        self,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        window_batches: int = 16,
+    ) -> Iterator[np.ndarray]:
+        """
+        Stream normalized embeddings in input order, one block of up to
+        `batch_size * window_batches` rows at a time, so memory stays
+        bounded for huge inputs.
+
+        Within each window, texts are sorted by length before being cut
+        into batches, so each batch pads to similar lengths. Each window
+        is a single model call, so an EmbeddingPool can spread it across
+        its workers.
+        """
+        window = batch_size * window_batches
+
+        for start in range(0, len(texts), window):
+            part = texts[start:start + window]
+            order = np.argsort([len(text) for text in part], kind="stable")
+
+            block = np.empty((len(part), self.embedding_dimension), dtype="float32")
+            block[order] = self.embed_texts([part[i] for i in order], batch_size=batch_size)
+
+            yield block
 
     def embed_chunks(self, chunks: List[DocumentChunk]) -> np.ndarray:
         """Embed DocumentChunk objects by extracting their text."""
         texts = [chunk.text for chunk in chunks]
         return self.embed_texts(texts)
 
+    @staticmethod
+    def _load_model(model_name: str, backend: str, num_threads: int, workers: int) -> Any:
+        if workers > 1:
+            from app.embedding.pool import EmbeddingPool
+
+            return EmbeddingPool(
+                model_name,
+                backend=backend,
+                num_workers=workers,
+                threads_per_worker=num_threads,
+            )
+        if backend == "torch":
+            # Deferred: importing sentence-transformers pulls in torch
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(model_name)
+
+        from app.embedding.onnx_backend import load_onnx_encoder
+
+        return load_onnx_encoder(
+            model_name,
+            quantized=backend == "onnx-int8",
+            num_threads=num_threads,
+        )
+
+    def close(self) -> None:
+        """
+        Release this Embedder's reference to the shared model; the last
+        reference frees it (and stops pool workers). Safe to call twice.
+        """
+        self._release()
+
     @staticmethod
     def _normalize(vectors: np.ndarray) -> np.ndarray:
         """
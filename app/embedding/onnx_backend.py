@@ -0,0 +1,177 @@
+# app/embedding/onnx_backend.py
+import json
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+from app.core.settings import ONNX_MODEL_DIR
+
+ONNX_FILE = "model.onnx"
+QUANTIZED_FILE = "model_int8.onnx"
+CONFIG_FILE = "embedder.json"
+
+
+def export_dir(model_name: str, root: str | Path = ONNX_MODEL_DIR) -> Path:
+    return Path(root) / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str, output_dir: str | Path, opset: int = 18) -> Path:
+    """
+    Export a SentenceTransformer (transformer + pooling) to ONNX, together
+    with its tokenizer. The graph takes the tokenizer outputs and returns
+    the sentence embedding, so pooling matches the PyTorch model exactly.
+
+    Needs torch, sentence-transformers, onnx and onnxscript; serving the
+    exported model only needs onnxruntime and a tokenizer.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu").eval()
+    sample = model.tokenizer(
+        ["export sample", "a slightly longer export sample"],
+        padding=True,
+        return_tensors="pt",
+    )
+    input_names = list(sample.keys())
+
+    class SentenceEmbedding(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            features = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                features["token_type_ids"] = token_type_ids
+            return self.model(features)["sentence_embedding"]
+
+    batch, seq = torch.export.Dim("batch"), torch.export.Dim("seq")
+    torch.onnx.export(
+        SentenceEmbedding().eval(),
+        (),
+        str(output_dir / ONNX_FILE),
+        kwargs=dict(sample),
+        input_names=input_names,
+        output_names=["sentence_embedding"],
+        dynamic_shapes={name: {0: batch, 1: seq} for name in input_names},
+        opset_version=opset,
+        dynamo=True,
+        external_data=False,
+    )
+
+    model.tokenizer.save_pretrained(str(output_dir))
+    with open(output_dir / CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model_name": model_name,
+                "dimension": model.get_sentence_embedding_dimension(),
+                "max_seq_length": model.max_seq_length,
+            },
+            f,
+            indent=2,
+        )
+
+    return output_dir / ONNX_FILE
+
+
+def quantize_onnx(model_dir: str | Path) -> Path:
+    """
+    Dynamic int8 quantization of an exported model: weights are stored as
+    int8, activations are quantized on the fly. No calibration data needed.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model_dir = Path(model_dir)
+    quantize_dynamic(
+        str(model_dir / ONNX_FILE),
+        str(model_dir / QUANTIZED_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    return model_dir / QUANTIZED_FILE
+
+
+class OnnxEncoder:
+    """
+    onnxruntime-backed stand-in for the SentenceTransformer methods
+    Embedder uses (`encode`, `get_sentence_embedding_dimension`).
+    """
+
+    def __init__(self, model_dir: str | Path, quantized: bool = False, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / CONFIG_FILE, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.dimension = config["dimension"]
+        self.max_seq_length = config["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            str(model_dir / (QUANTIZED_FILE if quantized else ONNX_FILE)),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(
+        self,
+        sentences: str | Sequence[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self.dimension), dtype="float32")
+
+        # Longest first, like SentenceTransformer, to limit padding
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            features = self.tokenizer(
+                [texts[i] for i in rows],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            embeddings[rows] = self.session.run(["sentence_embedding"], inputs)[0]
+
+        return embeddings[0] if single else embeddings
+
+
+def load_onnx_encoder(
+    model_name: str,
+    quantized: bool = False,
+    num_threads: int = 0,
+    root: str | Path = ONNX_MODEL_DIR,
+) -> OnnxEncoder:
+    """
+    Load the ONNX export of `model_name`, exporting (and quantizing) it
+    on first use.
+    """
+    model_dir = export_dir(model_name, root)
+
+    if not (model_dir / ONNX_FILE).exists():
+        export_onnx(model_name, model_dir)
+    if quantized and not (model_dir / QUANTIZED_FILE).exists():
+        quantize_onnx(model_dir)
+
+    return OnnxEncoder(model_dir, quantized=quantized, num_threads=num_threads)
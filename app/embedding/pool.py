@@ -0,0 +1,106 @@
+# app/embedding/pool.py
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence
+
+import numpy as np
+
+# Per-process model, created by _init_worker
+_model = None
+
+
+def _init_worker(model_name: str, backend: str, num_threads: int) -> None:
+    # Must be set before torch / onnxruntime create their thread pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    global _model
+    if backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(num_threads)
+        _model = SentenceTransformer(model_name, device="cpu")
+    else:
+        from app.embedding.onnx_backend import load_onnx_encoder
+
+        _model = load_onnx_encoder(
+            model_name,
+            quantized=backend == "onnx-int8",
+            num_threads=num_threads,
+        )
+
+
+def _dimension() -> int:
+    return _model.get_sentence_embedding_dimension()
+
+
+def _encode(texts: List[str], batch_size: int) -> np.ndarray:
+    return _model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+class EmbeddingPool:
+    """
+    Process pool where every worker holds its own copy of the model and
+    runs it with `threads_per_worker` threads, so encoding scales with
+    cores instead of being bound by one interpreter.
+
+    Exposes the SentenceTransformer methods Embedder uses (`encode`,
+    `get_sentence_embedding_dimension`); results come back in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        num_workers: int | None = None,
+        threads_per_worker: int = 0,
+        texts_per_task: int = 256,
+    ):
+        cpus = os.cpu_count() or 1
+        self.num_workers = num_workers or cpus
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.num_workers)
+        self.texts_per_task = texts_per_task
+
+        # spawn: forking a process that already runs torch threads can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads_per_worker),
+        )
+        self._dimension = self._executor.submit(_dimension).result()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(
+        self,
+        sentences: str | Sequence[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self._dimension), dtype="float32")
+
+        # Sort by length so each task pads to similar lengths, then cut
+        # into tasks small enough to keep every worker busy
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        per_task = max(batch_size, min(self.texts_per_task, -(-len(texts) // self.num_workers)))
+        tasks = [order[i:i + per_task] for i in range(0, len(texts), per_task)]
+
+        results = self._executor.map(
+            _encode,
+            [[texts[i] for i in rows] for rows in tasks],
+            [batch_size] * len(tasks),
+        )
+        for rows, vectors in zip(tasks, results):
+            embeddings[rows] = vectors
+
+        return embeddings[0] if single else embeddings
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
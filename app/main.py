@@ -1,9 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.router import api_router
+from app.api.warmup import skip_warmup, start_warmup
+from app.core.settings import WARMUP_ON_STARTUP
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models and index load in the background; the server accepts
+    # requests immediately and /health/ready reports when warm
+    if WARMUP_ON_STARTUP:
+        start_warmup()
+    else:
+        skip_warmup()
+    yield
+
 
 app = FastAPI(
     title="RAG System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router)
@@ -0,0 +1,54 @@
+# app/models/filters.py
+from typing import Dict, List, Union
+
+from app.models.document_models import DocumentChunk
+
+FilterValue = Union[str, int]
+
+# e.g. {"source": ["a.pdf", "b.pdf"], "page": 3}
+# Values within a field are OR-ed, fields are AND-ed.
+MetadataFilters = Dict[str, Union[FilterValue, List[FilterValue]]]
+
+FILTER_FIELDS = ("document_id", "source", "page")
+
+
+def normalize_filters(filters: MetadataFilters | None) -> Dict[str, List[str]]:
+    """
+    Validate filter fields and coerce values to lists of strings
+    (the form used as inverted-map keys).
+    """
+    if not filters:
+        return {}
+
+    normalized = {}
+    for field, values in filters.items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(
+                f"Unsupported filter field: {field} "
+                f"(expected one of {', '.join(FILTER_FIELDS)})"
+            )
+        if not isinstance(values, list):
+            values = [values]
+        normalized[field] = sorted({str(v) for v in values})
+
+    return normalized
+
+
+def filter_key(chunk: DocumentChunk, field: str) -> str | None:
+    """
+    Inverted-map key of a chunk for one filter field (None = not indexed).
+    """
+    if field == "document_id":
+        return chunk.document_id
+    if field == "source":
+        return chunk.metadata.source
+    if field == "page":
+        return None if chunk.metadata.page is None else str(chunk.metadata.page)
+    raise ValueError(f"Unsupported filter field: {field}")
+
+
+def chunk_matches(chunk: DocumentChunk, filters: Dict[str, List[str]]) -> bool:
+    """
+    Evaluate normalized filters against a single chunk.
+    """
+    return all(filter_key(chunk, field) in values for field, values in filters.items())
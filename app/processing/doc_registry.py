@@ -1,21 +1,32 @@
 import json
+import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from app.core.settings import ensure_dirs, DOC_REGISTRY_PATH
 
+# Ingest handlers run concurrently in the threadpool; every
+# read-modify-write of the registry file goes through this lock
+_lock = threading.Lock()
+
 def _load_registry(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
         return []
     return json.loads(path.read_text(encoding="utf-8"))
 
 def _save_registry(path: Path, data: List[Dict[str, Any]]) -> None:
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    # Write beside the registry and rename over it, so a reader never
+    # sees a half-written file
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
 
 def register_document(document_id: str, source: str, num_chunks: int) -> Dict[str, Any]:
     """
-    Append a document record to the registry (data/documents.json).
+    Add a document record to the registry (data/documents.json).
+    Re-registering an existing document_id replaces its record.
     """
     ensure_dirs()
     record = {
@@ -24,14 +35,32 @@ def register_document(document_id: str, source: str, num_chunks: int) -> Dict[st
         "num_chunks": num_chunks,
         "ingested_at": datetime.now(timezone.utc).isoformat(),
     }
-    data = _load_registry(DOC_REGISTRY_PATH)
-    data.append(record)
-    _save_registry(DOC_REGISTRY_PATH, data)
+    with _lock:
+        data = [
+            rec for rec in _load_registry(DOC_REGISTRY_PATH)
+            if rec["document_id"] != document_id
+        ]
+        data.append(record)
+        _save_registry(DOC_REGISTRY_PATH, data)
     return record
 
+def unregister_document(document_id: str) -> bool:
+    """
+    Remove a document record. Returns False if it was not registered.
+    """
+    ensure_dirs()
+    with _lock:
+        data = _load_registry(DOC_REGISTRY_PATH)
+        remaining = [rec for rec in data if rec["document_id"] != document_id]
+        if len(remaining) == len(data):
+            return False
+        _save_registry(DOC_REGISTRY_PATH, remaining)
+    return True
+
 def list_documents() -> List[Dict[str, Any]]:
     ensure_dirs()
-    return _load_registry(DOC_REGISTRY_PATH)
+    with _lock:
+        return _load_registry(DOC_REGISTRY_PATH)
 
 def get_document(document_id: str) -> Optional[Dict[str, Any]]:
     for rec in list_documents():
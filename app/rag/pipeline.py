@@ -1,6 +1,7 @@
 # app/rag/pipeline.py
 from typing import Dict, Any, Optional, List, Tuple, Protocol
 from app.models.document_models import DocumentChunk
+from app.models.filters import MetadataFilters
 from app.llm.generator import LLMGenerator
 from app.retrieval.reranker import CrossEncoderReranker
 
@@ -12,7 +13,7 @@ class BaseRetriever(Protocol):
     can be used by the RAGPipeline.
     """
     def retrieve(
-        self, query: str, k: int
+        self, query: str, k: int, filters: Optional[MetadataFilters] = None
     ) -> List[Tuple[float, DocumentChunk]]:
         ...
 
@@ -35,13 +36,18 @@ class RAGPipeline:
         self.llm_generator = llm_generator
         self.reranker = reranker
 
-    def retrieve_only(self, query: str, k: int = 5):
+    def retrieve_only(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[MetadataFilters] = None,
+    ):
         """
         Retrieval-only path (used for evaluation).
         """
         retrieve_k = max(k * 4, 10) if self.reranker else k
 
-        retrieved = self.retriever.retrieve(query, k=retrieve_k)
+        retrieved = self.retriever.retrieve(query, k=retrieve_k, filters=filters)
         chunks = [chunk for _, chunk in retrieved]
 
         if self.reranker:
@@ -52,13 +58,19 @@ class RAGPipeline:
             "chunks": chunks,
         }
 
-    def answer_query(self, query: str, k: int = 5) -> Dict[str, Any]:
+    def answer_query(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[MetadataFilters] = None,
+    ) -> Dict[str, Any]:
         """
         Full RAG flow with optional reranking and LLM generation.
+        `filters` restricts retrieval to matching document_id/source/page.
         """
         retrieve_k = max(k * 4, 10) if self.reranker else k
 
-        retrieved = self.retriever.retrieve(query, k=retrieve_k)
+        retrieved = self.retriever.retrieve(query, k=retrieve_k, filters=filters)
         chunks = [chunk for _, chunk in retrieved]
 
         if self.reranker:
@@ -0,0 +1,79 @@
+# app/retrieval/analyzer.py
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+from app.core.lazy import lazy_import
+
+snowballstemmer = lazy_import("snowballstemmer")
+
+# Maximal runs of [a-z0-9] after lower-casing: the same tokens as replacing
+# every other character with a space and splitting on whitespace
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Lucene's default English stop set
+ENGLISH_STOPWORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or "
+    "such that the their then there these they this to was will with".split()
+)
+
+
+@dataclass
+class Analyzer:
+    """
+    Text -> index terms for BM25: lower-case, split into alphanumeric
+    tokens, then optionally drop English stopwords and stem with a
+    Snowball stemmer (`stemmer` is its language, e.g. "english"; needs
+    the snowballstemmer package).
+
+    `split` produces surface tokens; `normalize` maps distinct surface
+    forms to terms (None = dropped), so stemming runs once per form
+    rather than once per occurrence.
+    """
+    stopwords: bool = False
+    stemmer: str | None = None
+
+    _stem: Any = field(default=None, init=False, repr=False, compare=False)
+    # Snowball stemmers keep per-call state; queries analyze concurrently
+    _lock: Any = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @property
+    def is_identity(self) -> bool:
+        """True when every surface token is its own term."""
+        return not self.stopwords and not self.stemmer
+
+    def split(self, text: str) -> List[str]:
+        return _TOKEN.findall(text.lower())
+
+    def normalize(self, surfaces: Sequence[str]) -> List[str | None]:
+        terms: List[str | None] = list(surfaces)
+
+        if self.stopwords:
+            terms = [None if t in ENGLISH_STOPWORDS else t for t in terms]
+
+        if self.stemmer:
+            kept = [t for t in terms if t is not None]
+            with self._lock:
+                if self._stem is None:
+                    self._stem = snowballstemmer.stemmer(self.stemmer)
+                stems = iter(self._stem.stemWords(kept))
+            terms = [None if t is None else next(stems) for t in terms]
+
+        return terms
+
+    def analyze(self, text: str) -> List[str]:
+        """Terms of `text` in order (used for queries)."""
+        surfaces = self.split(text)
+        if self.is_identity:
+            return surfaces
+        return [t for t in self.normalize(surfaces) if t is not None]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stopwords": self.stopwords, "stemmer": self.stemmer}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Analyzer":
+        return cls(stopwords=data.get("stopwords", False), stemmer=data.get("stemmer"))
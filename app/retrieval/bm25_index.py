@@ -0,0 +1,682 @@
+# app/retrieval/bm25_index.py
+import copy
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Literal, Sequence, Tuple
+
+import numpy as np
+
+from app.retrieval.analyzer import Analyzer
+from app.vector_store.chunk_store import read_columns, write_columns
+
+SearchMode = Literal["exhaustive", "block_max"]
+
+# Per-document / per-term / per-posting arrays, saved as-is
+_ARRAYS = (
+    "indptr", "doc_ids", "tfs", "doc_len", "live", "df",
+    "idf", "term_max", "block_ptr", "block_max", "block_last_doc",
+)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index held in CSR arrays.
+
+    Postings for term t are `doc_ids[indptr[t]:indptr[t + 1]]` (ascending)
+    with matching term frequencies in `tfs`. A query only touches the
+    postings of its own terms, and the top k are picked with argpartition
+    instead of sorting every document.
+
+    Scores match rank_bm25.BM25Okapi with the same k1 / b / epsilon: idf is
+    log((N - df + 0.5) / (df + 0.5)), and terms whose idf is negative get
+    epsilon * (mean idf over the vocabulary) instead. Repeated query terms
+    contribute once per occurrence.
+
+    For dynamic pruning, every term keeps an upper bound on its score
+    contribution, and each block of `block_size` postings keeps its own
+    (tighter) bound along with its last doc id; see `search`. Bounds are
+    computed at the average document length of the last merge and scaled
+    up when it grows, so they stay valid between merges.
+
+    The index is updatable. `add` puts new documents in a small delta
+    segment (its postings follow the main postings of each term, so the
+    two read as one ascending list) that is merged into the main CSR
+    arrays once it outgrows `delta_limit` postings, or on `save`; an add
+    costs O(delta + vocabulary), not O(corpus). `delete` only tombstones
+    documents. Corpus statistics (df, document count, total length)
+    cover every document with postings, tombstoned or not, the way
+    Lucene counts deleted documents until their segment is merged:
+    `save(keep=...)` drops tombstoned postings and their statistics.
+    Arrays are never modified in place, so `copy` is cheap and a saved
+    index can be served straight from a memory-mapped file.
+
+    Text goes through `analyzer` (see `add_texts`); every distinct surface
+    token is analyzed and interned once, after which documents are only
+    handled as arrays of term ids. Queries are analyzed the same way
+    with `analyzer.analyze`.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        block_size: int = 64,
+        analyzer: Analyzer | None = None,
+        delta_limit: int = 1 << 17,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.block_size = block_size
+        self.analyzer = analyzer or Analyzer()
+        self.delta_limit = delta_limit
+
+        # term -> term id, and surface token -> term id (-1 = dropped)
+        self.vocab: Dict[str, int] = {}
+        self._surface: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.float32)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+
+        # Delta segment: postings of documents added since the last merge
+        self.delta_indptr = np.zeros(1, dtype=np.int64)
+        self.delta_doc_ids = np.zeros(0, dtype=np.int32)
+        self.delta_tfs = np.zeros(0, dtype=np.float32)
+
+        # Corpus statistics over every document with postings
+        self.live = np.zeros(0, dtype=bool)
+        self.df = np.zeros(0, dtype=np.int64)
+        self.num_live = 0
+        self.total_len = 0.0
+
+        self.idf = np.zeros(0, dtype=np.float64)
+
+        # Pruning bounds, before idf, at average length `bound_avgdl`: per
+        # term and per block of main postings, and per term of the delta
+        self.bound_avgdl = 1.0
+        self.term_max = np.zeros(0, dtype=np.float64)
+        self.block_ptr = np.zeros(1, dtype=np.int64)
+        self.block_max = np.zeros(0, dtype=np.float64)
+        self.block_last_doc = np.zeros(0, dtype=np.int32)
+        self.delta_max = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def build(cls, documents: Sequence[Sequence[str]], **params) -> "BM25Index":
+        """Index tokenized documents; document i gets doc id i."""
+        index = cls(**params)
+        index.add(documents)
+        return index
+
+    @classmethod
+    def build_texts(cls, texts: Iterable[str], **params) -> "BM25Index":
+        """Analyze and index raw texts; text i gets doc id i."""
+        index = cls(**params)
+        index.add_texts(texts)
+        return index
+
+    @property
+    def num_docs(self) -> int:
+        """Documents ever added (live or not); the next doc id."""
+        return len(self.doc_len)
+
+    def copy(self) -> "BM25Index":
+        """Frozen copy; only the vocabulary dict is duplicated."""
+        clone = copy.copy(self)
+        clone.vocab = dict(self.vocab)
+        clone._surface = dict(self._surface)
+        return clone
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    def intern(self, surfaces: List[str]) -> np.ndarray:
+        """
+        Term ids of surface tokens (-1 where the analyzer drops them).
+        Forms not seen before are analyzed once and new terms added to
+        the vocabulary.
+        """
+        # Distinct forms in first-seen order, so term ids follow the corpus
+        unseen = [s for s in dict.fromkeys(surfaces) if s not in self._surface]
+        if unseen:
+            for surface, term in zip(unseen, self.analyzer.normalize(unseen)):
+                self._surface[surface] = (
+                    -1 if term is None else self.vocab.setdefault(term, len(self.vocab))
+                )
+        return np.fromiter(
+            map(self._surface.__getitem__, surfaces), dtype=np.int64, count=len(surfaces)
+        )
+
+    def add_texts(self, texts: Iterable[str], batch_size: int = 4096) -> None:
+        """
+        Analyze and append raw texts under the next doc ids, `batch_size`
+        texts at a time, so token strings only exist for one batch.
+        """
+        batch: List[str] = []
+        for text in chain(texts, [None]):
+            if text is not None:
+                batch.append(text)
+            if batch and (text is None or len(batch) == batch_size):
+                self.add([self.analyzer.split(t) for t in batch])
+                batch = []
+
+    def add(self, documents: Sequence[Sequence[str]]) -> None:
+        """
+        Append documents, given as surface tokens, under the next doc ids.
+        Their postings go to the delta segment, after its existing
+        postings of each term (their doc ids are larger), so lists stay
+        ascending.
+        """
+        first = self.num_docs
+        lengths = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+        term_ids = self.intern(list(chain.from_iterable(documents)))
+
+        # Documents as flat term-id arrays, minus dropped tokens
+        doc_of_token = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+        kept = term_ids >= 0
+        doc_of_token, term_ids = doc_of_token[kept], term_ids[kept]
+        doc_len = np.bincount(doc_of_token, minlength=len(documents)).astype(np.float32)
+
+        # One posting per distinct (doc, term): ordered by doc, then term
+        width = max(len(self.vocab), 1)
+        pairs, freqs = np.unique(doc_of_token * width + term_ids, return_counts=True)
+        docs, terms = np.divmod(pairs, width)
+
+        vocab_size = len(self.vocab)
+        self.delta_indptr, self.delta_doc_ids, self.delta_tfs = _insert_postings(
+            (self.delta_indptr, self.delta_doc_ids, self.delta_tfs),
+            terms,
+            (docs + first).astype(np.int32),
+            freqs.astype(np.float32),
+            vocab_size,
+        )
+
+        df = np.zeros(vocab_size, dtype=np.int64)
+        df[:len(self.df)] = self.df
+        self.df = df + np.bincount(terms, minlength=vocab_size)
+        self.doc_len = np.concatenate([self.doc_len, doc_len])
+        self.live = np.concatenate([self.live, np.ones(len(documents), dtype=bool)])
+        self.num_live += len(documents)
+        self.total_len += float(doc_len.sum())
+
+        self._update_stats()
+        # Merging costs O(corpus): only once the delta outgrows the main
+        # segment or the limit (so a fresh index is built in one pass)
+        if len(self.delta_doc_ids) > min(self.delta_limit, len(self.doc_ids)):
+            self.merge()
+        else:
+            self._pad_main(vocab_size)
+            self._update_delta_bounds()
+
+    def delete(self, docs: np.ndarray) -> int:
+        """
+        Tombstone documents by doc id; they stop matching, but keep
+        counting towards corpus statistics until `save(keep=...)` drops
+        them. Returns the number of documents that were live.
+        """
+        docs = np.unique(np.asarray(docs, dtype=np.int64))
+        docs = docs[self.live[docs]]
+        if not len(docs):
+            return 0
+
+        live = self.live.copy()
+        live[docs] = False
+        self.live = live
+        self.num_live -= len(docs)
+        return len(docs)
+
+    def merge(self) -> None:
+        """
+        Fold the delta segment into the main CSR arrays and recompute the
+        pruning bounds at the current average document length.
+        """
+        if len(self.delta_doc_ids):
+            delta_terms = np.repeat(np.arange(len(self.df)), np.diff(self.delta_indptr))
+            self._pad_main(len(self.df))
+            self.indptr, self.doc_ids, self.tfs = _insert_postings(
+                (self.indptr, self.doc_ids, self.tfs),
+                delta_terms,
+                self.delta_doc_ids,
+                self.delta_tfs,
+                len(self.df),
+            )
+            self.delta_indptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+            self.delta_doc_ids = np.zeros(0, dtype=np.int32)
+            self.delta_tfs = np.zeros(0, dtype=np.float32)
+        self._update_bounds()
+
+    @property
+    def avgdl(self) -> float:
+        n = self.num_docs
+        return max(self.total_len / n if n else 0.0, 1e-9)
+
+    def _norm(self, docs: np.ndarray) -> np.ndarray:
+        """Length normalization k1 * (1 - b + b * dl / avgdl) of `docs`."""
+        return self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)
+
+    def _update_stats(self) -> None:
+        """Recompute idf from df: O(vocabulary)."""
+        n = self.num_docs
+        df = self.df.astype(np.float64)
+
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        present = self.df > 0
+        if present.any():
+            idf[idf < 0] = self.epsilon * idf[present].mean()
+        self.idf = idf
+
+    def _saturation(self, docs: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        """Contribution of postings without idf, at `bound_avgdl`."""
+        tf = tfs.astype(np.float64)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.bound_avgdl)
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def _bound_scale(self) -> float:
+        # A contribution grows at most by avgdl / bound_avgdl when the
+        # average length grows (and shrinks when it falls)
+        return max(1.0, self.avgdl / self.bound_avgdl)
+
+    def _pad_main(self, vocab_size: int) -> None:
+        """Extend the main per-term arrays to terms added since the merge."""
+        missing = vocab_size + 1 - len(self.indptr)
+        if missing > 0:
+            self.indptr = np.concatenate([self.indptr, np.repeat(self.indptr[-1:], missing)])
+            self.block_ptr = np.concatenate(
+                [self.block_ptr, np.repeat(self.block_ptr[-1:], missing)]
+            )
+            self.term_max = np.concatenate([self.term_max, np.zeros(missing)])
+
+    def _update_delta_bounds(self) -> None:
+        counts = np.diff(self.delta_indptr)
+        self.delta_max = np.zeros(len(counts), dtype=np.float64)
+        nonempty = counts > 0
+        if nonempty.any():
+            saturation = self._saturation(self.delta_doc_ids, self.delta_tfs)
+            self.delta_max[nonempty] = np.maximum.reduceat(
+                saturation, self.delta_indptr[:-1][nonempty]
+            )
+
+    def _update_bounds(self) -> None:
+        self.bound_avgdl = self.avgdl
+        self._update_delta_bounds()
+
+        df = np.diff(self.indptr)
+        blocks = -(-df // self.block_size)
+        self.block_ptr = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(blocks, out=self.block_ptr[1:])
+
+        # Posting offset where each block starts / ends
+        term_of_block = np.repeat(np.arange(len(df)), blocks)
+        offset = np.arange(self.block_ptr[-1]) - self.block_ptr[term_of_block]
+        starts = self.indptr[term_of_block] + offset * self.block_size
+        ends = np.minimum(starts + self.block_size, self.indptr[term_of_block + 1])
+
+        saturation = self._saturation(self.doc_ids, self.tfs)
+
+        if len(starts):
+            self.block_max = np.maximum.reduceat(saturation, starts)
+            self.block_last_doc = self.doc_ids[ends - 1]
+        else:
+            self.block_max = np.zeros(0, dtype=np.float64)
+            self.block_last_doc = np.zeros(0, dtype=np.int32)
+
+        self.term_max = np.zeros(len(df), dtype=np.float64)
+        nonempty = blocks > 0
+        if nonempty.any():
+            self.term_max[nonempty] = np.maximum.reduceat(
+                self.block_max, self.block_ptr[:-1][nonempty]
+            )
+
+    def term_ids(self, tokens: Sequence[str]) -> Dict[int, int]:
+        """Known query terms -> number of occurrences in the query."""
+        counts: Dict[int, int] = {}
+        for token in tokens:
+            term = self.vocab.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc ids ascending, tfs) of `term`: main, then delta postings."""
+        start, end = self.indptr[term], self.indptr[term + 1]
+        delta_start, delta_end = self.delta_indptr[term], self.delta_indptr[term + 1]
+        if delta_start == delta_end:
+            return self.doc_ids[start:end], self.tfs[start:end]
+        return (
+            np.concatenate([self.doc_ids[start:end], self.delta_doc_ids[delta_start:delta_end]]),
+            np.concatenate([self.tfs[start:end], self.delta_tfs[delta_start:delta_end]]),
+        )
+
+    def postings_count(self, term: int) -> int:
+        return int(
+            self.indptr[term + 1] - self.indptr[term]
+            + self.delta_indptr[term + 1] - self.delta_indptr[term]
+        )
+
+    def term_scores(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc ids, BM25 contributions) for every posting of `term`."""
+        docs, tf = self._postings(term)
+        return docs, self.idf[term] * tf * (self.k1 + 1) / (tf + self._norm(docs))
+
+    def lookup(self, term: int, docs: np.ndarray) -> np.ndarray:
+        """BM25 contributions of `term` to sorted `docs` (0 where absent)."""
+        out = np.zeros(len(docs), dtype=np.float64)
+
+        # Delta doc ids all follow the main ones: each doc is in one segment
+        for indptr, doc_ids, tfs in (
+            (self.indptr, self.doc_ids, self.tfs),
+            (self.delta_indptr, self.delta_doc_ids, self.delta_tfs),
+        ):
+            start, end = indptr[term], indptr[term + 1]
+            if start == end:
+                continue
+            postings = doc_ids[start:end]
+
+            pos = np.searchsorted(postings, docs)
+            found = pos < len(postings)
+            found[found] = postings[pos[found]] == docs[found]
+
+            tf = tfs[start:end][pos[found]]
+            out[found] = self.idf[term] * tf * (self.k1 + 1) / (tf + self._norm(docs[found]))
+        return out
+
+    def term_bound(self, term: int) -> float:
+        """Upper bound (without idf) of `term` for any document."""
+        return max(self.term_max[term], self.delta_max[term]) * self._bound_scale()
+
+    def block_bound(self, term: int, docs: np.ndarray) -> np.ndarray:
+        """Upper bound (without idf) of `term` for sorted `docs`, per block."""
+        start, end = self.block_ptr[term], self.block_ptr[term + 1]
+        block = np.searchsorted(self.block_last_doc[start:end], docs)
+
+        out = np.zeros(len(docs), dtype=np.float64)
+        inside = block < end - start
+        out[inside] = self.block_max[start:end][block[inside]]
+
+        # Delta documents get the term's delta bound
+        if self.delta_max[term] > 0:
+            out[docs >= self.delta_doc_ids[self.delta_indptr[term]]] = self.delta_max[term]
+        return out * self._bound_scale()
+
+    def score(self, tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores of every document containing at least one query term,
+        as (doc ids ascending, scores).
+        """
+        docs, scores = self._accumulate(self.term_ids(tokens))
+        if self.num_live < self.num_docs:
+            keep = self.live[docs]
+            docs, scores = docs[keep], scores[keep]
+        return docs, scores
+
+    def _accumulate(self, counts: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+
+        parts = []
+        for term, repeats in counts.items():
+            docs, scores = self.term_scores(term)
+            parts.append((docs, scores * repeats))
+
+        if len(parts) == 1:
+            return parts[0]
+
+        docs = np.concatenate([d for d, _ in parts])
+        scores = np.concatenate([s for _, s in parts])
+        unique, inverse = np.unique(docs, return_inverse=True)
+        return unique, np.bincount(inverse, weights=scores, minlength=len(unique))
+
+    def search(
+        self,
+        tokens: Sequence[str],
+        k: int,
+        accept: Callable[[np.ndarray], np.ndarray] | None = None,
+        mode: SearchMode = "exhaustive",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (doc ids, scores), best first; equal scores keep doc order.
+        `accept` maps candidate doc ids to a keep mask (metadata filters).
+
+        "exhaustive" scores every posting of every query term. "block_max"
+        returns the same results but skips documents that cannot reach
+        the top k (see `_search_pruned`).
+        """
+        counts = self.term_ids(tokens)
+        if self.num_live < self.num_docs:
+            accept = self._live_filter(accept)
+
+        # Bounds only hold for positive term weights
+        if (
+            mode == "block_max"
+            and k > 0
+            and len(counts) > 1
+            and all(self.idf[t] > 0 for t in counts)
+        ):
+            return self._search_pruned(counts, k, accept)
+        return self._search_all(counts, k, accept)
+
+    def _live_filter(
+        self, accept: Callable[[np.ndarray], np.ndarray] | None
+    ) -> Callable[[np.ndarray], np.ndarray]:
+        live = self.live
+
+        def accept_live(docs: np.ndarray) -> np.ndarray:
+            keep = live[docs]
+            if accept is not None and keep.any():
+                keep[keep] = accept(docs[keep])
+            return keep
+
+        return accept_live
+
+    def _search_all(
+        self,
+        counts: Dict[int, int],
+        k: int,
+        accept: Callable[[np.ndarray], np.ndarray] | None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        docs, scores = self._accumulate(counts)
+
+        if accept is not None and len(docs):
+            keep = accept(docs)
+            docs, scores = docs[keep], scores[keep]
+
+        return top_k(docs, scores, k)
+
+    def _search_pruned(
+        self,
+        counts: Dict[int, int],
+        k: int,
+        accept: Callable[[np.ndarray], np.ndarray] | None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Block-max MaxScore, vectorized over posting lists (document-at-a-time
+        WAND pointer movement would run as a Python loop).
+
+        1. The best postings of the highest-bound term are fully scored;
+           the k-th best of those is a lower bound `theta` on the final
+           k-th score.
+        2. Terms are sorted by upper bound; the low-bound prefix whose
+           bounds sum below theta is non-essential: a document found only
+           in those (long, common-term) lists cannot reach the top k, so
+           those lists are never scanned.
+        3. Documents of the essential lists whose partial score plus the
+           block-max bounds of the non-essential terms stays below theta
+           are dropped; the rest are scored exactly, looking up the long
+           lists by binary search.
+        """
+        terms = list(counts)
+        bound = {t: self.idf[t] * counts[t] * self.term_bound(t) for t in terms}
+
+        def exact(docs: np.ndarray) -> np.ndarray:
+            # Same summation order as `score`, so equal scores stay equal
+            scores = np.zeros(len(docs), dtype=np.float64)
+            for t in terms:
+                scores += self.lookup(t, docs) * counts[t]
+            return scores
+
+        def accepted(docs: np.ndarray) -> np.ndarray:
+            return docs[accept(docs)] if accept is not None and len(docs) else docs
+
+        best = max(terms, key=bound.__getitem__)
+        seed, seed_scores = self.term_scores(best)
+        seed = np.sort(top_k(seed, seed_scores, 4 * k)[0])
+        seed = accepted(seed)
+        if len(seed) < k:
+            return self._search_all(counts, k, accept)
+        seed_scores = exact(seed)
+        # Slack for float32 rounding between bounds and exact scores
+        theta = np.partition(seed_scores, len(seed) - k)[len(seed) - k] * (1 - 1e-6)
+
+        ordered = sorted(terms, key=bound.__getitem__)
+        n_lazy = int(np.searchsorted(np.cumsum([bound[t] for t in ordered]), theta))
+        lazy, essential = ordered[:n_lazy], ordered[n_lazy:]
+
+        # Each non-essential term costs a pass over the candidates; fall
+        # back when that adds up to more than scanning every list
+        lengths = {t: self.postings_count(t) for t in terms}
+        scanned = sum(lengths[t] for t in essential)
+        if not lazy or scanned * (1 + len(lazy)) > sum(lengths.values()):
+            return self._search_all(counts, k, accept)
+
+        docs, partial = self._accumulate({t: counts[t] for t in essential})
+        blocks = np.stack([self.block_bound(t, docs) * self.idf[t] * counts[t] for t in lazy])
+
+        # Swap block bounds for exact contributions, highest bound first,
+        # dropping documents that fall below theta after each term
+        for i in reversed(range(len(lazy))):
+            keep = partial + blocks[:i + 1].sum(axis=0) >= theta
+            docs, partial, blocks = docs[keep], partial[keep], blocks[:, keep]
+            partial += self.lookup(lazy[i], docs) * counts[lazy[i]]
+        docs = accepted(docs[partial >= theta])
+
+        return top_k(docs, exact(docs), k)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+
+    def _compacted(self, keep: np.ndarray) -> "BM25Index":
+        """Index over the documents where `keep` is True, renumbered."""
+        new_ids = np.cumsum(keep) - 1
+        mask = keep[self.doc_ids]
+        terms = np.repeat(np.arange(len(self.df)), np.diff(self.indptr))[mask]
+
+        out = BM25Index(
+            self.k1, self.b, self.epsilon, self.block_size, self.analyzer, self.delta_limit
+        )
+        out.vocab = self.vocab
+        out.indptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+        out.df = np.bincount(terms, minlength=len(self.df))
+        np.cumsum(out.df, out=out.indptr[1:])
+        out.delta_indptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+        out.doc_ids = new_ids[self.doc_ids[mask]].astype(np.int32)
+        out.tfs = self.tfs[mask]
+        out.doc_len = self.doc_len[keep]
+        out.live = self.live[keep]
+        out.num_live = int(out.live.sum())
+        out.total_len = float(out.doc_len.sum())
+        out._update_stats()
+        out._update_bounds()
+        return out
+
+    def save(self, path: str, keep: np.ndarray | None = None) -> None:
+        """
+        Merge the delta segment and write the documents where `keep` is
+        True (all by default, doc ids renumbered) to a columnar file at
+        `path`, then re-open it memory-mapped.
+        """
+        self.merge()
+        index = self if keep is None or keep.all() else self._compacted(keep)
+
+        columns = {name: [getattr(index, name)] for name in _ARRAYS}
+        # Terms never contain whitespace; ids follow insertion order
+        columns["vocab"] = [np.frombuffer("\n".join(index.vocab).encode("utf-8"), dtype=np.uint8)]
+
+        write_columns(path, columns, attrs={
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "block_size": self.block_size,
+            "analyzer": self.analyzer.to_dict(),
+            "num_live": index.num_live,
+            "total_len": index.total_len,
+            "bound_avgdl": index.bound_avgdl,
+        })
+        self.load(path)
+
+    def load(self, path: str) -> None:
+        """Memory-map an index written by `save`; nothing is recomputed."""
+        columns, attrs = read_columns(path)
+
+        for name in ("k1", "b", "epsilon", "block_size", "num_live", "total_len", "bound_avgdl"):
+            setattr(self, name, attrs[name])
+        for name in _ARRAYS:
+            setattr(self, name, columns[name])
+        self.analyzer = Analyzer.from_dict(attrs.get("analyzer", {}))
+
+        self.delta_indptr = np.zeros(len(self.df) + 1, dtype=np.int64)
+        self.delta_doc_ids = np.zeros(0, dtype=np.int32)
+        self.delta_tfs = np.zeros(0, dtype=np.float32)
+        self.delta_max = np.zeros(len(self.df), dtype=np.float64)
+
+        blob = columns["vocab"].tobytes().decode("utf-8")
+        self.vocab = {term: i for i, term in enumerate(blob.split("\n"))} if blob else {}
+        self._surface = {}
+
+
+def _insert_postings(
+    csr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    terms: np.ndarray,
+    docs: np.ndarray,
+    tfs: np.ndarray,
+    vocab_size: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR (indptr, doc ids, tfs) with new postings (ordered by doc within
+    each term, doc ids above every existing one) placed after the
+    existing postings of their term.
+    """
+    old_indptr, old_docs, old_tfs = csr
+
+    # Stable: new postings of each term stay in ascending doc order
+    order = np.argsort(terms, kind="stable")
+    sorted_terms = terms[order]
+
+    old_counts = np.zeros(vocab_size, dtype=np.int64)
+    old_counts[:len(old_indptr) - 1] = np.diff(old_indptr)
+    new_counts = np.bincount(terms, minlength=vocab_size)
+
+    indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+    np.cumsum(old_counts + new_counts, out=indptr[1:])
+    new_start = np.zeros(vocab_size, dtype=np.int64)
+    np.cumsum(new_counts[:-1], out=new_start[1:])
+
+    # Destination of every existing and every new posting
+    shift = indptr[:len(old_indptr) - 1] - old_indptr[:-1]
+    old_pos = np.arange(len(old_docs)) + np.repeat(shift, np.diff(old_indptr))
+    new_pos = (
+        indptr[sorted_terms] + old_counts[sorted_terms]
+        + np.arange(len(sorted_terms)) - new_start[sorted_terms]
+    )
+
+    doc_ids = np.empty(indptr[-1], dtype=np.int32)
+    out_tfs = np.empty(indptr[-1], dtype=np.float32)
+    doc_ids[old_pos] = old_docs
+    out_tfs[old_pos] = old_tfs
+    doc_ids[new_pos] = docs[order]
+    out_tfs[new_pos] = tfs[order]
+    return indptr, doc_ids, out_tfs
+
+
+def top_k(docs: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best `k` of (docs, scores) by score, ties broken by doc id."""
+    if k <= 0:
+        return docs[:0], scores[:0]
+    if len(docs) > k:
+        # Keep everything tied with the k-th score so ties resolve by doc id
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        keep = scores >= kth
+        docs, scores = docs[keep], scores[keep]
+    order = np.lexsort((docs, -scores))[:k]
+    return docs[order], scores[order]
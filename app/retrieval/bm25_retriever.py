@@ -1,35 +1,71 @@
 # app/retrieval/bm25_retriever.py
 from typing import List, Tuple
-from rank_bm25 import BM25Okapi
+import numpy as np
 from app.models.document_models import DocumentChunk
-import re
+from app.models.filters import MetadataFilters, chunk_matches, normalize_filters
+from app.retrieval.analyzer import Analyzer
+from app.retrieval.bm25_index import BM25Index, SearchMode
+from app.vector_store.sharded import ShardedVectorStore
+from app.vector_store.store import VectorStore
 
 
 class BM25Retriever:
     """
-    Sparse lexical retriever using BM25.
+    Sparse lexical retriever using BM25 over an inverted index.
+    Only chunks containing a query term are scored or returned; in
+    "block_max" mode (same results), chunks that cannot reach the top k
+    are skipped as well.
     """
 
-    def __init__(self, chunks: List[DocumentChunk]):
+    def __init__(
+        self,
+        chunks: List[DocumentChunk],
+        mode: SearchMode = "block_max",
+        analyzer: Analyzer | None = None,
+    ):
         self.chunks = chunks
-        self.tokenized_corpus = [
-            self._tokenize(chunk.text) for chunk in chunks
-        ]
-        self.bm25 = BM25Okapi(self.tokenized_corpus)
-
-    def _tokenize(self, text: str):
-        text = text.lower()
-        text = re.sub(r"[^a-z0-9\s]", " ", text)
-        return text.split()
-
-    def retrieve(self, query: str, k: int = 5) -> List[Tuple[float, DocumentChunk]]:
-        query_tokens = self._tokenize(query)
-        scores = self.bm25.get_scores(query_tokens)
-
-        ranked = sorted(
-            zip(scores, self.chunks),
-            key=lambda x: x[0],
-            reverse=True
+        self.mode = mode
+        self.index = BM25Index.build_texts(
+            (chunk.text for chunk in chunks), analyzer=analyzer
         )
 
-        return ranked[:k]
+    def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        accept = None
+        filters = normalize_filters(filters)
+        if filters:
+            # Only candidates (chunks sharing a term with the query) are checked
+            def accept(docs: np.ndarray) -> np.ndarray:
+                return np.fromiter(
+                    (chunk_matches(self.chunks[d], filters) for d in docs),
+                    dtype=bool,
+                    count=len(docs),
+                )
+
+        docs, scores = self.index.search(
+            self.index.analyzer.analyze(query), k, accept=accept, mode=self.mode
+        )
+        return [(float(score), self.chunks[d]) for d, score in zip(docs, scores)]
+
+
+class StoreBM25Retriever:
+    """
+    BM25 retriever over the inverted index a VectorStore (created with
+    bm25=True) maintains and persists alongside its FAISS snapshot, so
+    it follows uploads and deletions without being rebuilt.
+    """
+
+    def __init__(self, vector_store: VectorStore | ShardedVectorStore):
+        self.vector_store = vector_store
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        return self.vector_store.search_bm25(query, k=k, filters=filters)
@@ -1,8 +1,10 @@
 # app/retrieval/retriever.py
 from typing import List, Tuple
+from app.embedding.batcher import QueryBatcher
 from app.embedding.embedder import Embedder
 from app.vector_store.store import VectorStore
 from app.models.document_models import DocumentChunk
+from app.models.filters import MetadataFilters
 
 
 class DenseRetriever:
@@ -10,14 +12,37 @@ class DenseRetriever:
     Dense (embedding-based) retriever using vector similarity search.
     """
 
-    def __init__(self, embedder: Embedder, vector_store: VectorStore):
+    def __init__(self, embedder: Embedder | QueryBatcher, vector_store: VectorStore):
         self.embedder = embedder
         self.vector_store = vector_store
 
-    def retrieve(self, query: str, k: int = 5) -> List[Tuple[float, DocumentChunk]]:
+    def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
         """
-        Retrieve top-k chunks relevant to a query string.
+        Retrieve top-k chunks relevant to a query string, optionally
+        restricted to chunks matching metadata `filters`.
         Returns list of (distance, DocumentChunk).
         """
         q_vec = self.embedder.embed_text(query)
-        return self.vector_store.search(q_vec, k=k)
+        return self.vector_store.search(q_vec, k=k, filters=filters)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[List[Tuple[float, DocumentChunk]]]:
+        """
+        Retrieve top-k chunks for several queries at once.
+        Embeds all queries in one encode call and searches them in one
+        FAISS call. Returns one list of (distance, DocumentChunk) per query.
+        """
+        if not queries:
+            return []
+
+        q_vecs = self.embedder.embed_texts(queries)
+        return self.vector_store.search_batch(q_vecs, k=k, filters=filters)
@@ -1,13 +1,48 @@
 # app/retrieval/hybrid_retriever.py
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, TimeoutError
 from typing import List, Tuple, Dict
 from app.models.document_models import DocumentChunk
+from app.models.filters import MetadataFilters
 from app.retrieval.dense_retriever import DenseRetriever
 from app.retrieval.bm25_retriever import BM25Retriever
 
+logger = logging.getLogger(__name__)
+
+# Legs of all retrievers run on one bounded pool: a query needs a worker
+# per leg, so this serves 16 queries at once; more queue for a worker
+# (their timeouts still count), rather than growing threads without limit
+_SHARED_WORKERS = 32
+_shared_pool: ThreadPoolExecutor | None = None
+_shared_pool_lock = threading.Lock()
+
+
+def _get_shared_pool() -> ThreadPoolExecutor:
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ThreadPoolExecutor(
+                max_workers=_SHARED_WORKERS,
+                thread_name_prefix="hybrid-retriever",
+            )
+        return _shared_pool
+
 
 class HybridRetriever:
     """
     Hybrid retriever using Reciprocal Rank Fusion (RRF).
+
+    The dense and BM25 legs run concurrently on a thread pool (FAISS and
+    NumPy release the GIL), so latency is the slower leg rather than the
+    sum. Unless an `executor` is given, every retriever shares one bounded
+    module-level pool, so there is nothing to close.
+
+    Each leg fetches `dense_k` / `bm25_k` candidates (default: the
+    requested k). A leg that has not answered within its timeout
+    (`dense_timeout_ms` / `bm25_timeout_ms`, None = wait) contributes
+    nothing, and the other leg's results are fused on their own.
     """
 
     def __init__(
@@ -15,10 +50,20 @@ class HybridRetriever:
         dense: DenseRetriever,
         bm25: BM25Retriever,
         rrf_k: int = 60,
+        dense_k: int | None = None,
+        bm25_k: int | None = None,
+        dense_timeout_ms: float | None = None,
+        bm25_timeout_ms: float | None = None,
+        executor: Executor | None = None,
     ):
         self.dense = dense
         self.bm25 = bm25
         self.rrf_k = rrf_k
+        self.dense_k = dense_k
+        self.bm25_k = bm25_k
+        self.dense_timeout_ms = dense_timeout_ms
+        self.bm25_timeout_ms = bm25_timeout_ms
+        self._pool = executor or _get_shared_pool()
 
     def _chunk_key(self, chunk: DocumentChunk) -> str:
         """
@@ -26,24 +71,45 @@ class HybridRetriever:
         """
         return chunk.chunk_id
 
-    def retrieve(self, query: str, k: int = 5) -> List[Tuple[float, DocumentChunk]]:
-        dense_results = self.dense.retrieve(query, k=k)
-        bm25_results = self.bm25.retrieve(query, k=k)
+    def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        legs = (
+            ("dense", self.dense, self.dense_k or k, self.dense_timeout_ms),
+            ("bm25", self.bm25, self.bm25_k or k, self.bm25_timeout_ms),
+        )
+
+        start = time.monotonic()
+        futures = [
+            self._pool.submit(retriever.retrieve, query, k=depth, filters=filters)
+            for _, retriever, depth, _ in legs
+        ]
+
+        # Timeouts count from submission, so both legs share the same clock
+        leg_results: List[List[Tuple[float, DocumentChunk]]] = []
+        for future, (name, _, _, timeout_ms) in zip(futures, legs):
+            remaining = None
+            if timeout_ms is not None:
+                remaining = max(0.0, start + timeout_ms / 1000 - time.monotonic())
+            try:
+                leg_results.append(future.result(timeout=remaining))
+            except TimeoutError:
+                # Left to finish in the background; its results are dropped
+                future.cancel()
+                logger.warning("Hybrid %s leg timed out after %.0f ms", name, timeout_ms)
+                leg_results.append([])
 
         scores: Dict[str, float] = {}
         chunks: Dict[str, DocumentChunk] = {}
 
-        # Dense contribution
-        for rank, (_, chunk) in enumerate(dense_results):
-            key = self._chunk_key(chunk)
-            scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank + 1)
-            chunks[key] = chunk
-
-        # BM25 contribution
-        for rank, (_, chunk) in enumerate(bm25_results):
-            key = self._chunk_key(chunk)
-            scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank + 1)
-            chunks[key] = chunk
+        for results in leg_results:
+            for rank, (_, chunk) in enumerate(results):
+                key = self._chunk_key(chunk)
+                scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank + 1)
+                chunks[key] = chunk
 
         ranked = sorted(
             scores.items(),
@@ -1,11 +1,25 @@
+import weakref
 from typing import List, Tuple
-from sentence_transformers import CrossEncoder
+from app.core.model_registry import models
 from app.models.document_models import DocumentChunk
 
 
+def _load_cross_encoder(model_name: str):
+    # Deferred: importing sentence-transformers pulls in torch
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name)
+
+
 class CrossEncoderReranker:
     def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
-        self.model = CrossEncoder(model_name)
+        # Shared with other rerankers for the same model via the registry
+        key = ("cross-encoder", model_name)
+        self.model = models.acquire(key, lambda: _load_cross_encoder(model_name))
+        self._release = weakref.finalize(self, models.release, key)
+
+    def close(self) -> None:
+        self._release()
 
     def rerank(
         self,
@@ -0,0 +1,462 @@
+# app/vector_store/chunk_store.py
+import json
+import mmap
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.document_models import DocumentChunk, DocumentMetadata
+from app.models.filters import FILTER_FIELDS, filter_key
+
+MAGIC = b"RAGCOLS1"
+_ALIGN = 64
+
+# Variable-length columns are stored as an int64 offsets array (n + 1)
+# plus a uint8 blob; fixed-width columns are plain arrays.
+_STRING_GETTERS = {
+    "chunk_id": lambda c: c.chunk_id,
+    "document_id": lambda c: c.document_id,
+    "source": lambda c: c.metadata.source,
+    "text": lambda c: c.text,
+    "extra": lambda c: json.dumps(c.metadata.extra),
+}
+STRING_COLUMNS = tuple(_STRING_GETTERS)
+NO_PAGE = -1
+
+
+# -----------------------------
+# Columnar file format
+# -----------------------------
+#
+#   MAGIC | header length (uint64 LE) | JSON header | padding | columns...
+#
+# The header records, for every column, its dtype, shape and byte offset
+# (relative to the 64-byte aligned start of the data section), plus a
+# free-form `attrs` dict for callers.
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def is_columnar_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_columns(
+    path: str,
+    columns: Dict[str, List[np.ndarray]],
+    attrs: Dict[str, Any] | None = None,
+) -> None:
+    """
+    Write named columns to `path`. Each column is given as a list of parts
+    that are concatenated on disk, so memory-mapped inputs are streamed
+    rather than copied. The file is written to a temp path and renamed.
+    """
+    layout = {}
+    offset = 0
+
+    for name, parts in columns.items():
+        rows = sum(len(p) for p in parts)
+        nbytes = sum(p.nbytes for p in parts)
+        layout[name] = {
+            "dtype": parts[0].dtype.str,
+            "shape": [rows, *parts[0].shape[1:]],
+            "offset": offset,
+        }
+        offset = _aligned(offset + nbytes)
+
+    header = json.dumps({"columns": layout, "attrs": attrs or {}}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+
+        for name, parts in columns.items():
+            f.seek(data_start + layout[name]["offset"])
+            for part in parts:
+                f.write(memoryview(np.ascontiguousarray(part)).cast("B"))
+
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def read_columns(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Memory-map a columnar file. Returned arrays are read-only views over
+    the mapping; nothing is copied until a slice is materialized.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a columnar chunk file: {path}")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    columns = {}
+
+    for name, spec in header["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape))
+        columns[name] = np.frombuffer(
+            buf,
+            dtype=dtype,
+            count=count,
+            offset=data_start + spec["offset"],
+        ).reshape(shape)
+
+    return columns, header["attrs"]
+
+
+def _filter_strings(
+    offsets: np.ndarray, data: np.ndarray, keep: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Drop rows from an offsets/blob string column.
+    """
+    lengths = np.diff(offsets)
+    new_offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    np.cumsum(lengths[keep], out=new_offsets[1:])
+    return new_offsets, data[np.repeat(keep, lengths)]
+
+
+def _encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+def _decode_strings(offsets: np.ndarray, data: np.ndarray) -> List[str]:
+    blob = data.tobytes()
+    return [
+        blob[offsets[i]:offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+
+
+# -----------------------------
+# Chunk store
+# -----------------------------
+
+class ChunkStore(Sequence[DocumentChunk]):
+    """
+    Row-ordered chunk storage backed by a memory-mapped columnar file.
+
+    Rows loaded from disk stay as raw column bytes and are only turned
+    into DocumentChunk objects when indexed. Rows appended since the last
+    save are held as objects until the next save folds them into the file.
+
+    Every row carries an int64 id (the FAISS label of its vector). Ids are
+    strictly increasing in row order, so id -> row is a binary search.
+
+    An inverted map from filterable metadata values (document_id, source,
+    page) to ids is maintained on append and persisted in CSR form, so
+    scoped lookups never scan the string columns.
+
+    Note: chunk.document_id and chunk.metadata.document_id share a column.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, np.ndarray] = {"id": np.zeros(0, dtype=np.int64)}
+        self._base_count = 0
+        self._tail: List[DocumentChunk] = []
+        self._tail_ids = np.zeros(0, dtype=np.int64)
+
+        # field -> key -> id arrays (mmapped CSR slices + appended arrays)
+        self._postings: Dict[str, Dict[str, List[np.ndarray]]] = {
+            field: {} for field in FILTER_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self._base_count + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+
+        if index >= self._base_count:
+            return self._tail[index - self._base_count]
+        return self._materialize(index)
+
+    def extend(self, chunks: List[DocumentChunk], ids: np.ndarray | None = None) -> None:
+        """
+        Append chunks. Ids default to continuing after the last stored id.
+        """
+        last_id = self._last_id()
+
+        if ids is None:
+            ids = np.arange(last_id + 1, last_id + 1 + len(chunks), dtype=np.int64)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(chunks):
+            raise ValueError("Chunks and ids must be the same length")
+        if len(ids) and (ids[0] <= last_id or np.any(np.diff(ids) <= 0)):
+            raise ValueError("Chunk ids must be strictly increasing")
+
+        self._tail.extend(chunks)
+        self._tail_ids = np.concatenate([self._tail_ids, ids])
+        self._index_postings(chunks, ids)
+
+    def snapshot(self) -> "ChunkStore":
+        """
+        Frozen copy for writing a snapshot while appends continue.
+        Shares the memory-mapped base and copies only the tail lists.
+        """
+        copy = ChunkStore()
+        copy._columns = dict(self._columns)
+        copy._base_count = self._base_count
+        copy._tail = list(self._tail)
+        copy._tail_ids = self._tail_ids  # replaced on extend, never mutated
+        copy._postings = {
+            field: {key: list(parts) for key, parts in postings.items()}
+            for field, postings in self._postings.items()
+        }
+        return copy
+
+    def rows_after(self, last_id: int) -> Tuple[List[DocumentChunk], np.ndarray]:
+        """
+        Appended (unsaved) chunks and ids with id > `last_id`.
+        """
+        start = int(np.searchsorted(self._tail_ids, last_id, side="right"))
+        return self._tail[start:], self._tail_ids[start:]
+
+    # -----------------------------
+    # Inverted metadata map
+    # -----------------------------
+
+    def _index_postings(self, chunks: List[DocumentChunk], ids: np.ndarray) -> None:
+        for field, postings in self._postings.items():
+            grouped: Dict[str, List[int]] = {}
+            for chunk, chunk_id in zip(chunks, ids):
+                key = filter_key(chunk, field)
+                if key is not None:
+                    grouped.setdefault(key, []).append(int(chunk_id))
+
+            for key, key_ids in grouped.items():
+                postings.setdefault(key, []).append(np.asarray(key_ids, dtype=np.int64))
+
+    def ids_for(self, field: str, values: List[str]) -> np.ndarray:
+        """
+        Sorted ids of rows whose `field` matches any of `values`.
+        """
+        postings = self._postings[field]
+        parts = [part for value in values for part in postings.get(value, [])]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def _postings_columns(self, exclude: np.ndarray) -> Dict[str, List[np.ndarray]]:
+        """
+        CSR encoding of the inverted map (keys, offsets, ids) per field.
+        """
+        columns = {}
+        for field, postings in self._postings.items():
+            keys, id_parts = [], []
+            for key in sorted(postings):
+                ids = np.concatenate(postings[key])
+                ids = ids[~np.isin(ids, exclude)]
+                if len(ids):
+                    keys.append(key)
+                    id_parts.append(ids)
+
+            key_offsets, key_data = _encode_strings(keys)
+            offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+            np.cumsum([len(ids) for ids in id_parts], out=offsets[1:])
+
+            prefix = f"postings.{field}"
+            columns[f"{prefix}.keys.offsets"] = [key_offsets]
+            columns[f"{prefix}.keys.data"] = [key_data]
+            columns[f"{prefix}.offsets"] = [offsets]
+            columns[f"{prefix}.ids"] = id_parts or [np.zeros(0, dtype=np.int64)]
+
+        return columns
+
+    def _load_postings(self) -> None:
+        self._postings = {field: {} for field in FILTER_FIELDS}
+
+        if "postings.document_id.ids" not in self._columns:
+            # Files written before the inverted map existed
+            self._index_postings(list(self), self._columns["id"])
+            return
+
+        for field, postings in self._postings.items():
+            prefix = f"postings.{field}"
+            keys = _decode_strings(
+                self._columns[f"{prefix}.keys.offsets"],
+                self._columns[f"{prefix}.keys.data"],
+            )
+            offsets = self._columns[f"{prefix}.offsets"]
+            ids = self._columns[f"{prefix}.ids"]
+
+            for i, key in enumerate(keys):
+                postings[key] = [ids[offsets[i]:offsets[i + 1]]]
+
+    # -----------------------------
+    # Ids
+    # -----------------------------
+
+    def _last_id(self) -> int:
+        if len(self._tail_ids):
+            return int(self._tail_ids[-1])
+        if self._base_count:
+            return int(self._columns["id"][-1])
+        return -1
+
+    @property
+    def ids(self) -> np.ndarray:
+        """
+        Row ids, in row order.
+        """
+        if not self._base_count:
+            return self._tail_ids
+        if not len(self._tail_ids):
+            return self._columns["id"]
+        return np.concatenate([self._columns["id"], self._tail_ids])
+
+    def rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Map ids (which must be present) to row positions.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.searchsorted(self._columns["id"], ids)
+
+        if len(self._tail_ids):
+            in_tail = ids >= self._tail_ids[0]
+            rows[in_tail] = self._base_count + np.searchsorted(self._tail_ids, ids[in_tail])
+
+        return rows
+
+    # -----------------------------
+    # Materialization
+    # -----------------------------
+
+    def _string(self, name: str, row: int) -> str:
+        offsets = self._columns[f"{name}.offsets"]
+        data = self._columns[f"{name}.data"]
+        return data[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def _materialize(self, row: int) -> DocumentChunk:
+        document_id = self._string("document_id", row)
+        page = int(self._columns["page"][row])
+
+        metadata = DocumentMetadata(
+            document_id=document_id,
+            source=self._string("source", row),
+            page=None if page == NO_PAGE else page,
+            extra=json.loads(self._string("extra", row)),
+        )
+
+        return DocumentChunk(
+            chunk_id=self._string("chunk_id", row),
+            document_id=document_id,
+            chunk_index=int(self._columns["chunk_index"][row]),
+            text=self._string("text", row),
+            metadata=metadata,
+        )
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+
+    @staticmethod
+    def _encode_chunks(chunks: List[DocumentChunk], ids: np.ndarray) -> Dict[str, np.ndarray]:
+        encoded = {}
+        for name, getter in _STRING_GETTERS.items():
+            encoded[f"{name}.offsets"], encoded[f"{name}.data"] = _encode_strings(
+                [getter(c) for c in chunks]
+            )
+
+        encoded["id"] = ids
+        encoded["chunk_index"] = np.array(
+            [c.chunk_index for c in chunks], dtype=np.int64
+        )
+        encoded["page"] = np.array(
+            [NO_PAGE if c.metadata.page is None else c.metadata.page for c in chunks],
+            dtype=np.int64,
+        )
+        return encoded
+
+    def save(
+        self,
+        path: str,
+        attrs: Dict[str, Any] | None = None,
+        exclude_ids: np.ndarray | None = None,
+    ) -> None:
+        """
+        Write all rows (minus `exclude_ids`) to `path` and re-open it, so
+        rows appended since the previous save no longer live on the
+        Python heap.
+        """
+        exclude = np.asarray(exclude_ids if exclude_ids is not None else [], dtype=np.int64)
+
+        tail_keep = ~np.isin(self._tail_ids, exclude)
+        tail = self._encode_chunks(
+            [c for c, keep in zip(self._tail, tail_keep) if keep],
+            self._tail_ids[tail_keep],
+        )
+
+        base = dict(self._columns)
+        if self._base_count:
+            base_keep = ~np.isin(base["id"], exclude)
+            if not base_keep.all():
+                for name in STRING_COLUMNS:
+                    base[f"{name}.offsets"], base[f"{name}.data"] = _filter_strings(
+                        base[f"{name}.offsets"], base[f"{name}.data"], base_keep
+                    )
+                for name in ("id", "chunk_index", "page"):
+                    base[name] = base[name][base_keep]
+
+        parts: Dict[str, List[np.ndarray]] = {}
+
+        for name in STRING_COLUMNS:
+            if self._base_count:
+                base_offsets = base[f"{name}.offsets"]
+                parts[f"{name}.offsets"] = [base_offsets, tail[f"{name}.offsets"][1:] + base_offsets[-1]]
+                parts[f"{name}.data"] = [base[f"{name}.data"], tail[f"{name}.data"]]
+            else:
+                parts[f"{name}.offsets"] = [tail[f"{name}.offsets"]]
+                parts[f"{name}.data"] = [tail[f"{name}.data"]]
+
+        for name in ("id", "chunk_index", "page"):
+            if self._base_count:
+                parts[name] = [base[name], tail[name]]
+            else:
+                parts[name] = [tail[name]]
+
+        parts.update(self._postings_columns(exclude))
+
+        write_columns(path, parts, attrs)
+        self.load(path)
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """
+        Memory-map a saved chunk file. Returns the attrs stored with it.
+        """
+        columns, attrs = read_columns(path)
+
+        # Files written before row ids existed used implicit row numbers
+        if "id" not in columns:
+            columns["id"] = np.arange(len(columns["chunk_index"]), dtype=np.int64)
+
+        self._columns = columns
+        self._base_count = len(columns["chunk_index"])
+        self._tail = []
+        self._tail_ids = np.zeros(0, dtype=np.int64)
+        self._load_postings()
+        return attrs
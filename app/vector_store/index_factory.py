@@ -0,0 +1,406 @@
+# app/vector_store/index_factory.py
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Literal, Tuple
+
+import numpy as np
+
+from app.core.lazy import lazy_import
+
+faiss = lazy_import("faiss")
+
+IndexType = Literal["flat", "hnsw", "ivf_flat", "ivf_pq"]
+Storage = Literal["float32", "fp16", "sq8", "binary"]
+Reduction = Literal["none", "pca", "truncate"]
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+STORAGE_TYPES = ("float32", "fp16", "sq8", "binary")
+REDUCTIONS = ("none", "pca", "truncate")
+
+# faiss.index_factory code encodings for the non-binary storage modes
+_SQ_CODES = {"fp16": "SQfp16", "sq8": "SQ8"}
+
+
+
+@dataclass
+class IndexConfig:
+    """
+    Build + search parameters for the FAISS index behind a VectorStore.
+
+    - flat     : exact brute-force L2 search (default)
+    - hnsw     : graph-based ANN, no training required
+    - ivf_flat : inverted lists over k-means cells (trained)
+    - ivf_pq   : IVF with product-quantized codes (trained)
+
+    `storage` sets how flat / hnsw / ivf_flat keep their vectors:
+
+    - float32 : full precision (4 bytes per dimension)
+    - fp16    : half-precision scalar quantizer (2 bytes per dimension)
+    - sq8     : 8-bit scalar quantizer, trained (1 byte)
+    - binary  : sign bits with Hamming search, flat only (1 bit)
+
+    With `rescore_factor` > 0, full-precision copies of the vectors are
+    kept in a memory-mapped file next to the index, and the top
+    k * rescore_factor candidates are re-ranked by exact L2 distance.
+
+    `reduction` shrinks vectors to `reduced_dim` before they are indexed:
+
+    - none     : index the full embedding
+    - pca      : PCA projection, trained (vectors are searched unreduced
+                 until there are enough to fit it)
+    - truncate : keep the leading dimensions (Matryoshka-trained models)
+
+    Reduced vectors are re-normalized. The transform is part of the FAISS
+    index, so it is saved with it and applied to queries automatically.
+
+    Indexes that need training are built once `train_size` vectors have
+    been collected (see `training_size`); until then vectors are kept in
+    an exact flat staging index.
+    """
+    index_type: IndexType = "flat"
+    storage: Storage = "float32"
+    rescore_factor: int = 0     # 0 disables exact re-scoring
+    reduction: Reduction = "none"
+    reduced_dim: int = 0        # target dimension for pca / truncate
+    train_size: int = 0         # vectors collected before training (0 = automatic)
+
+    # Build parameters
+    nlist: int = 1024           # IVF: number of coarse cells
+    pq_m: int = 16              # IVF-PQ: sub-quantizers (must divide dim)
+    pq_nbits: int = 8           # IVF-PQ: bits per sub-quantizer code
+    hnsw_m: int = 32            # HNSW: neighbours per node
+    ef_construction: int = 200  # HNSW: build-time beam width
+
+    # Search parameters
+    nprobe: int = 16            # IVF: cells visited per query
+    ef_search: int = 64         # HNSW: query-time beam width
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndexConfig":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def indexed_dim(dim: int, config: IndexConfig) -> int:
+    """Dimension of the vectors the underlying index stores."""
+    return dim if config.reduction == "none" else config.reduced_dim
+
+
+def validate_config(dim: int, config: IndexConfig) -> None:
+    if config.reduction not in REDUCTIONS:
+        raise ValueError(
+            f"Unknown reduction: {config.reduction} "
+            f"(expected one of {', '.join(REDUCTIONS)})"
+        )
+    if config.reduction != "none":
+        if not 0 < config.reduced_dim < dim:
+            raise ValueError(
+                f"reduced_dim must be between 1 and {dim - 1}, got {config.reduced_dim}"
+            )
+        if config.storage == "binary":
+            raise ValueError("binary storage does not support dimensionality reduction")
+    dim = indexed_dim(dim, config)
+
+    if config.index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown index type: {config.index_type} "
+            f"(expected one of {', '.join(INDEX_TYPES)})"
+        )
+    if config.storage not in STORAGE_TYPES:
+        raise ValueError(
+            f"Unknown storage: {config.storage} "
+            f"(expected one of {', '.join(STORAGE_TYPES)})"
+        )
+    if config.index_type == "ivf_pq" and dim % config.pq_m != 0:
+        raise ValueError(
+            f"pq_m={config.pq_m} must divide the embedding dimension {dim}"
+        )
+    if config.index_type == "ivf_pq" and config.storage != "float32":
+        raise ValueError("ivf_pq already compresses vectors; use storage='float32'")
+    if config.storage == "binary":
+        if config.index_type != "flat":
+            raise ValueError("binary storage is only supported with a flat index")
+        if dim % 8 != 0:
+            raise ValueError(f"binary storage needs a dimension divisible by 8, got {dim}")
+
+
+def is_binary(config: IndexConfig) -> bool:
+    return config.storage == "binary"
+
+
+def requires_training(config: IndexConfig) -> bool:
+    return (
+        config.index_type in ("ivf_flat", "ivf_pq")
+        or config.storage == "sq8"
+        or config.reduction == "pca"
+    )
+
+
+def training_size(dim: int, config: IndexConfig) -> int:
+    """
+    Vectors to collect before training the index (0 when it needs no
+    training): 39 per IVF cell and per PQ centroid (the minimum FAISS'
+    k-means asks for), a sample of value ranges for SQ8, and for PCA at
+    least as many vectors as input dimensions (a full-rank covariance;
+    fewer than `reduced_dim` cannot be fitted at all).
+    """
+    if not requires_training(config):
+        return 0
+    if config.train_size > 0:
+        return config.train_size
+
+    sizes = [1]
+    if config.index_type in ("ivf_flat", "ivf_pq"):
+        sizes.append(39 * config.nlist)
+    if config.index_type == "ivf_pq":
+        sizes.append(39 * 2 ** config.pq_nbits)
+    if config.storage == "sq8":
+        sizes.append(1000)
+    if config.reduction == "pca":
+        sizes.append(dim)
+    return max(sizes)
+
+
+def factory_string(config: IndexConfig, num_train: int | None = None) -> str:
+    """
+    Translate a config into a faiss.index_factory description.
+
+    When `num_train` is given, IVF/PQ sizes are clamped so the index can be
+    trained on that many vectors (k-means needs at least one point per
+    centroid). Small first loads therefore produce a coarser index.
+    """
+    nlist = config.nlist
+    nbits = config.pq_nbits
+
+    if num_train is not None:
+        nlist = max(1, min(nlist, num_train))
+        nbits = max(1, min(nbits, int(math.log2(max(num_train, 2)))))
+
+    codes = _SQ_CODES.get(config.storage)
+
+    if config.index_type == "flat":
+        return codes or "Flat"
+    if config.index_type == "hnsw":
+        if codes:
+            return f"HNSW{config.hnsw_m}_{codes}"
+        return f"HNSW{config.hnsw_m},Flat"
+    if config.index_type == "ivf_flat":
+        return f"IVF{nlist},{codes or 'Flat'}"
+    return f"IVF{nlist},PQ{config.pq_m}x{nbits}"
+
+
+def build_index(
+    dim: int,
+    config: IndexConfig,
+    num_train: int | None = None,
+) -> faiss.Index:
+    """
+    Create an empty (possibly untrained) L2 index for `config`, wrapped in
+    IndexIDMap2 so vectors carry stable ids that survive deletions.
+    Binary storage yields the equivalent IndexBinaryIDMap2. With a
+    reduction, the index is an IndexPreTransform taking full-dimension
+    vectors.
+    """
+    validate_config(dim, config)
+
+    if is_binary(config):
+        return faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(dim))
+
+    reduced = indexed_dim(dim, config)
+    index = faiss.index_factory(reduced, factory_string(config, num_train), faiss.METRIC_L2)
+
+    if config.index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = config.ef_construction
+
+    if config.reduction != "none":
+        if config.reduction == "pca":
+            transform = faiss.PCAMatrix(dim, reduced)
+        else:
+            # Not uniform: keep the first `reduced` dimensions
+            transform = faiss.RemapDimensionsTransform(dim, reduced, False)
+
+        index = faiss.IndexPreTransform(index)
+        index.prepend_transform(faiss.NormalizationTransform(reduced, 2.0))
+        index.prepend_transform(transform)
+
+    index = faiss.IndexIDMap2(index)
+    apply_search_params(index, config)
+    return index
+
+
+def build_staging_index(dim: int, config: IndexConfig) -> faiss.Index:
+    """
+    Exact flat index (IndexIDMap2) holding vectors until there are enough
+    to train `config`'s index. The config is validated here, so a bad
+    one still fails before anything is added.
+    """
+    validate_config(dim, config)
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+
+
+def train_index(dim: int, config: IndexConfig, vectors: np.ndarray) -> faiss.Index:
+    """Empty index for `config`, trained on `vectors`."""
+    index = build_index(dim, config, num_train=len(vectors))
+    index.train(encode_vectors(vectors, config))
+    return index
+
+
+def staged_vectors(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """(ids, vectors) held by a staging index."""
+    ids = faiss.vector_to_array(index.id_map)
+    inner = faiss.downcast_index(index.index)
+    return ids, inner.reconstruct_n(0, inner.ntotal)
+
+
+def encode_vectors(vectors: np.ndarray, config: IndexConfig) -> np.ndarray:
+    """
+    Convert float vectors into the layout the index consumes: float32
+    rows, or packed sign bits for binary storage.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    if is_binary(config):
+        return np.packbits(vectors > 0, axis=1)
+    return vectors
+
+
+def serialize_index(index: faiss.Index) -> np.ndarray:
+    """
+    In-memory copy of the index in FAISS' on-disk format.
+    """
+    if isinstance(index, faiss.IndexBinary):
+        return faiss.serialize_index_binary(index)
+    return faiss.serialize_index(index)
+
+
+def read_index(path: str, config: IndexConfig, mmap: bool = False) -> faiss.Index:
+    """
+    Read an index from disk. With `mmap`, loading is near-instant and
+    processes mapping the same file share its page cache, but the index
+    is read-only: call `materialize_index` before modifying it.
+    """
+    # Map codes / graph / inverted lists from the file instead of copying them
+    flags = (faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY) if mmap else 0
+    if is_binary(config):
+        return faiss.read_index_binary(path, flags)
+    return faiss.read_index(path, flags)
+
+
+def materialize_index(index: faiss.Index) -> faiss.Index:
+    """
+    Owned in-memory copy of a (possibly memory-mapped) index that can be
+    modified. faiss.clone_index would keep the mapped views.
+    """
+    if isinstance(index, faiss.IndexBinary):
+        return faiss.deserialize_index_binary(faiss.serialize_index_binary(index))
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def wrap_with_ids(index: faiss.Index) -> faiss.Index:
+    """
+    Convert an index saved without an id map (implicit ids 0..n-1) into
+    an IndexIDMap2 holding the same vectors under the same ids.
+    """
+    if isinstance(index, (faiss.IndexIDMap2, faiss.IndexBinaryIDMap2)):
+        return index
+
+    index = materialize_index(index)
+    ntotal = index.ntotal
+    vectors = None
+
+    if ntotal:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        vectors = index.reconstruct_n(0, ntotal)
+        index.reset()
+
+    wrapped = faiss.IndexIDMap2(index)
+    if ntotal:
+        wrapped.add_with_ids(vectors, np.arange(ntotal, dtype=np.int64))
+    return wrapped
+
+
+def _scaled(value: int, selectivity: float) -> int:
+    return math.ceil(value / selectivity) if selectivity > 0 else value
+
+
+def search_parameters(
+    config: IndexConfig,
+    selector: faiss.IDSelector | None = None,
+    selectivity: float = 1.0,
+) -> faiss.SearchParameters:
+    """
+    Per-call search parameters carrying an ID selector. IVF/HNSW indexes
+    require their own parameter type, so nprobe/efSearch are repeated here.
+
+    `selectivity` is the fraction of the index the selector admits;
+    nprobe/efSearch are divided by it, so a restrictive selector still
+    meets about as many admitted candidates as an unfiltered search.
+    """
+    if config.index_type in ("ivf_flat", "ivf_pq"):
+        nprobe = min(config.nlist, _scaled(config.nprobe, selectivity))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    if config.index_type == "hnsw":
+        ef_search = _scaled(config.ef_search, selectivity)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    return faiss.SearchParameters(sel=selector)
+
+
+def scan_is_cheaper(config: IndexConfig, admitted: int, selectivity: float) -> bool:
+    """
+    Whether `search_stored` over `admitted` vectors computes fewer
+    distances than an HNSW search with the scaled efSearch, which visits
+    about efSearch nodes with up to 2 * hnsw_m neighbours each.
+    """
+    if selectivity <= 0:
+        return True
+    return admitted < _scaled(config.ef_search, selectivity) * 2 * config.hnsw_m
+
+
+def search_stored(
+    index: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+    selector: faiss.IDSelector,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact search of the vectors stored by an (IndexIDMap2-wrapped) HNSW
+    index, bypassing the graph. Graph search under a selector admitting
+    only a few nodes wanders through rejected ones and misses neighbours;
+    a scan of the storage checks every id but only computes distances
+    for the admitted ones.
+    """
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexPreTransform):
+        for i in range(inner.chain.size()):
+            queries = inner.chain.at(i).apply(queries)
+        inner = faiss.downcast_index(inner.index)
+
+    storage = faiss.downcast_index(inner.storage)
+    translated = faiss.IDSelectorTranslated(index.id_map, selector)
+    distances, positions = storage.search(
+        queries, k, params=faiss.SearchParameters(sel=translated)
+    )
+
+    # Storage positions -> ids (no copy of the id map)
+    id_map = faiss.rev_swig_ptr(index.id_map.data(), index.id_map.size())
+    labels = np.where(positions >= 0, id_map[np.maximum(positions, 0)], -1)
+    return distances, labels
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    """
+    Push query-time knobs (nprobe / efSearch) into an index.
+    ParameterSpace resolves them through wrapper indexes as well.
+    """
+    params = faiss.ParameterSpace()
+
+    if config.index_type in ("ivf_flat", "ivf_pq"):
+        params.set_index_parameter(index, "nprobe", config.nprobe)
+    elif config.index_type == "hnsw":
+        params.set_index_parameter(index, "efSearch", config.ef_search)
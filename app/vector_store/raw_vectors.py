@@ -0,0 +1,101 @@
+# app/vector_store/raw_vectors.py
+import os
+from typing import List
+
+import numpy as np
+
+
+class RawVectors:
+    """
+    Full-precision float32 copies of the vectors in a compressed index,
+    kept for exact re-scoring.
+
+    Rows are aligned with the VectorStore's ChunkStore (one row per id, in
+    id order), so an id maps to a row through `ChunkStore.rows_for_ids`.
+
+    Saved rows are memory-mapped from a .npy file: they stay on disk and
+    only the candidates touched by re-scoring are paged in. Rows added
+    since the last save are held in memory.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._base = np.zeros((0, dim), dtype="float32")
+        self._tail: List[np.ndarray] = []
+        self._tail_matrix: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._base) + sum(len(t) for t in self._tail)
+
+    def extend(self, vectors: np.ndarray) -> None:
+        self._tail.append(np.ascontiguousarray(vectors, dtype="float32"))
+        self._tail_matrix = None
+
+    def snapshot(self) -> "RawVectors":
+        """
+        Frozen copy sharing the memory-mapped base.
+        """
+        copy = RawVectors(self.dim)
+        copy._base = self._base
+        copy._tail = list(self._tail)
+        return copy
+
+    def rows_from(self, start: int) -> np.ndarray:
+        return self.take(np.arange(start, len(self)))
+
+    def _tail_rows(self) -> np.ndarray:
+        if self._tail_matrix is None:
+            self._tail_matrix = (
+                np.concatenate(self._tail)
+                if self._tail
+                else np.zeros((0, self.dim), dtype="float32")
+            )
+        return self._tail_matrix
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Vectors for the given row positions.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.dim), dtype="float32")
+
+        in_base = rows < len(self._base)
+        out[in_base] = self._base[rows[in_base]]
+        if not in_base.all():
+            out[~in_base] = self._tail_rows()[rows[~in_base] - len(self._base)]
+        return out
+
+    def save(self, path: str, keep: np.ndarray | None = None, block_rows: int = 65536) -> None:
+        """
+        Write rows where `keep` is True (all rows by default) to `path`,
+        copying block by block, then re-open it memory-mapped.
+        """
+        sources = [self._base, self._tail_rows()]
+        if keep is None:
+            keep = np.ones(len(self), dtype=bool)
+        keep = np.asarray(keep, dtype=bool)
+        masks = [keep[:len(self._base)], keep[len(self._base):]]
+
+        tmp_path = f"{path}.tmp"
+        out = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype="float32", shape=(int(keep.sum()), self.dim)
+        )
+        offset = 0
+        for rows, mask in zip(sources, masks):
+            for start in range(0, len(rows), block_rows):
+                block = rows[start:start + block_rows][mask[start:start + block_rows]]
+                out[offset:offset + len(block)] = block
+                offset += len(block)
+        out.flush()
+        del out
+
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self.load(path)
+
+    def load(self, path: str) -> None:
+        self._base = np.load(path, mmap_mode="r")
+        self._tail = []
+        self._tail_matrix = None
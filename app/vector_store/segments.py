@@ -0,0 +1,121 @@
+# app/vector_store/segments.py
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from app.models.document_models import DocumentChunk
+from app.vector_store.chunk_store import ChunkStore
+
+
+class SegmentLog:
+    """
+    Append-only log of ingested vectors + chunks, replayed on top of the
+    last full VectorStore snapshot.
+
+    Each segment is a pair of files named after the first vector id it
+    holds (ids within a segment are consecutive):
+      - seg_<start>.chunks : columnar ChunkStore file
+      - seg_<start>.npy    : float32 vectors (written last = commit marker)
+
+    Deletions are appended to `tombstones.bin` as raw int64 ids.
+
+    Segments whose ids are already covered by the snapshot are skipped on
+    replay, so a crash between snapshot and cleanup is harmless.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.segments())
+
+    def _paths(self, start: int) -> Tuple[Path, Path]:
+        stem = self.directory / f"seg_{start:012d}"
+        return stem.with_suffix(".chunks"), stem.with_suffix(".npy")
+
+    def segments(self) -> List[int]:
+        """
+        Start ids of all committed segments, in order.
+        """
+        return sorted(
+            int(p.stem.split("_")[1])
+            for p in self.directory.glob("seg_*.npy")
+        )
+
+    def append(self, start: int, vectors: np.ndarray, chunks: List[DocumentChunk]) -> None:
+        """
+        Durably write one segment. Cost is proportional to the segment only.
+        """
+        chunks_path, vectors_path = self._paths(start)
+
+        segment = ChunkStore()
+        segment.extend(chunks, ids=np.arange(start, start + len(chunks), dtype=np.int64))
+        segment.save(str(chunks_path))
+
+        tmp_path = vectors_path.with_suffix(".npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype="float32"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, vectors_path)
+
+    def read(self, start: int) -> Tuple[np.ndarray, List[DocumentChunk]]:
+        chunks_path, vectors_path = self._paths(start)
+
+        segment = ChunkStore()
+        segment.load(str(chunks_path))
+
+        return np.load(vectors_path), list(segment)
+
+    def remove_before(self, end: int) -> None:
+        """
+        Delete segments whose ids start before `end` (i.e. are now part
+        of a snapshot).
+        """
+        for start in self.segments():
+            if start >= end:
+                continue
+            for path in self._paths(start):
+                path.unlink(missing_ok=True)
+
+    # -----------------------------
+    # Tombstones
+    # -----------------------------
+
+    @property
+    def _tombstones_path(self) -> Path:
+        return self.directory / "tombstones.bin"
+
+    def append_tombstones(self, ids: np.ndarray) -> None:
+        with open(self._tombstones_path, "ab") as f:
+            f.write(np.asarray(ids, dtype="<i8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def tombstones(self) -> np.ndarray:
+        if not self._tombstones_path.exists():
+            return np.zeros(0, dtype=np.int64)
+        data = self._tombstones_path.read_bytes()
+        # Ignore a torn trailing write
+        usable = len(data) - len(data) % 8
+        return np.frombuffer(data[:usable], dtype="<i8").astype(np.int64)
+
+    def drop_tombstones(self, count: int) -> None:
+        """
+        Forget the first `count` tombstones (folded into a snapshot),
+        keeping any appended since.
+        """
+        remaining = self.tombstones()[count:]
+        if not len(remaining):
+            self._tombstones_path.unlink(missing_ok=True)
+            return
+
+        tmp_path = self._tombstones_path.with_suffix(".bin.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(remaining.astype("<i8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._tombstones_path)
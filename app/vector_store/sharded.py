@@ -0,0 +1,277 @@
+# app/vector_store/sharded.py
+import heapq
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.document_models import DocumentChunk
+from app.models.filters import MetadataFilters
+from app.retrieval.analyzer import Analyzer
+from app.vector_store.index_factory import (
+    IndexConfig,
+    staged_vectors,
+    train_index,
+    training_size,
+)
+from app.vector_store.store import VectorStore
+
+
+class ShardedVectorStore:
+    """
+    VectorStore partitioned across N independent FAISS indexes.
+
+    Chunks are routed by a stable hash of their document_id, so a document
+    (and its deletes/replacements) always lives on one shard. Searches fan
+    out to all shards on a thread pool — FAISS releases the GIL while
+    scanning — and the per-shard top-k lists are merged by distance.
+
+    Exposes the same add/search/save/load/open/flush/compact interface as
+    VectorStore, so DenseRetriever and the API can use either.
+
+    Indexes that need training are trained once, on the vectors staged
+    across all shards, and every shard gets a copy: quantizers (and PCA)
+    then reflect the whole corpus rather than one shard's slice, and
+    distances from different shards stay comparable when merged.
+
+    With `bm25=True` every shard keeps its own BM25 index. Scores use
+    per-shard corpus statistics, which match closely once shards hold
+    more than a few hundred chunks each.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        num_shards: int = 4,
+        config: IndexConfig | None = None,
+        compact_after: int = 16,
+        mmap: bool = False,
+        bm25: bool = False,
+        bm25_analyzer: Analyzer | None = None,
+    ):
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+
+        self.dim = dim
+        self.num_shards = num_shards
+        self.config = config or IndexConfig()
+        self.shards = [
+            VectorStore(
+                dim,
+                config=replace(self.config),
+                compact_after=compact_after,
+                mmap=mmap,
+                bm25=bm25,
+                bm25_analyzer=bm25_analyzer,
+                auto_train=False,
+            )
+            for _ in range(num_shards)
+        ]
+        self._train_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=num_shards,
+            thread_name_prefix="vector-shard",
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def shard_for(self, document_id: str) -> int:
+        # crc32 rather than hash(): must be stable across processes
+        return zlib.crc32(document_id.encode("utf-8")) % self.num_shards
+
+    def _map(self, fn, *iterables) -> list:
+        return list(self._pool.map(fn, *iterables))
+
+    @property
+    def size(self) -> int:
+        return sum(shard.size for shard in self.shards)
+
+    @property
+    def chunks(self) -> Sequence[DocumentChunk]:
+        """
+        All live chunks, grouped by shard.
+        """
+        return list(chain.from_iterable(shard.chunks for shard in self.shards))
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+
+    def add(self, vectors: np.ndarray, chunks: List[DocumentChunk]) -> np.ndarray:
+        """
+        Route vectors + chunks to their shards and add them in parallel.
+        Returns the ids assigned to the new vectors, in input order; an
+        id is local to the shard of its chunk's document.
+        """
+        if len(vectors) != len(chunks):
+            raise ValueError("Vectors and chunks must be the same length")
+
+        routed: Dict[int, List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            routed.setdefault(self.shard_for(chunk.document_id), []).append(row)
+
+        ids = np.empty(len(chunks), dtype=np.int64)
+
+        def add_to_shard(item):
+            shard_id, rows = item
+            ids[rows] = self.shards[shard_id].add(vectors[rows], [chunks[r] for r in rows])
+
+        self._map(add_to_shard, routed.items())
+        self._train_shards()
+        return ids
+
+    def _train_shards(self):
+        """
+        Once the shards together stage `training_size` vectors, train one
+        index on all of them and move every shard onto a copy.
+        """
+        with self._train_lock:
+            staging = [shard for shard in self.shards if shard.staging]
+            staged = sum(shard.index.ntotal for shard in staging)
+            if not staging or staged < training_size(self.dim, self.config):
+                return
+
+            vectors = np.concatenate([staged_vectors(shard.index)[1] for shard in staging])
+            trained = train_index(self.dim, self.config, vectors)
+            self._map(lambda shard: shard.train_from(trained), staging)
+
+    def delete_document(self, document_id: str) -> int:
+        return self.shards[self.shard_for(document_id)].delete_document(document_id)
+
+    def replace_document(
+        self,
+        document_id: str,
+        vectors: np.ndarray | Iterable[np.ndarray],
+        chunks: List[DocumentChunk],
+    ) -> np.ndarray:
+        """
+        Replace a document in place. New chunks must keep the same
+        document_id so they land on the same shard; `vectors` may be
+        streamed in blocks, as for `VectorStore.replace_document`.
+        Returns the (shard-local) ids assigned to the new vectors.
+        """
+        if any(chunk.document_id != document_id for chunk in chunks):
+            raise ValueError("Replacement chunks must share the document_id")
+
+        ids = self.shards[self.shard_for(document_id)].replace_document(
+            document_id, vectors, chunks
+        )
+        self._train_shards()
+        return ids
+
+    def set_search_params(self, nprobe: int | None = None, ef_search: int | None = None):
+        for shard in self.shards:
+            shard.set_search_params(nprobe=nprobe, ef_search=ef_search)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        return self.search_batch(query_vector[np.newaxis, :], k=k, filters=filters)[0]
+
+    def search_batch(
+        self,
+        query_matrix: np.ndarray,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[List[Tuple[float, DocumentChunk]]]:
+        """
+        Search every shard concurrently and merge per-query top-k by
+        distance (smaller is closer).
+        """
+        query_matrix = np.ascontiguousarray(query_matrix, dtype="float32")
+
+        per_shard = self._map(
+            lambda shard: shard.search_batch(query_matrix, k=k, filters=filters),
+            self.shards,
+        )
+
+        return [
+            heapq.nsmallest(
+                k,
+                chain.from_iterable(shard_results[q] for shard_results in per_shard),
+                key=lambda pair: pair[0],
+            )
+            for q in range(len(query_matrix))
+        ]
+
+    def search_bm25(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        """
+        BM25 search on every shard, merged by score (larger is better).
+        """
+        per_shard = self._map(
+            lambda shard: shard.search_bm25(query, k=k, filters=filters),
+            self.shards,
+        )
+        return heapq.nlargest(k, chain.from_iterable(per_shard), key=lambda pair: pair[0])
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+
+    @staticmethod
+    def _shard_path(path: str, shard_id: int) -> str:
+        return f"{path}.shard{shard_id}"
+
+    def save(self, index_path: str, metadata_path: str):
+        self._map(
+            lambda i: self.shards[i].save(
+                self._shard_path(index_path, i),
+                self._shard_path(metadata_path, i),
+            ),
+            range(self.num_shards),
+        )
+
+    def load(self, index_path: str, metadata_path: str):
+        self._map(
+            lambda i: self.shards[i].load(
+                self._shard_path(index_path, i),
+                self._shard_path(metadata_path, i),
+            ),
+            range(self.num_shards),
+        )
+
+    def open(self, index_path: str, metadata_path: str, segment_dir: str):
+        """
+        Open every shard with its own snapshot files and segment log.
+        """
+        self._map(
+            lambda i: self.shards[i].open(
+                self._shard_path(index_path, i),
+                self._shard_path(metadata_path, i),
+                os.path.join(segment_dir, f"shard{i}"),
+            ),
+            range(self.num_shards),
+        )
+        # Replayed segments may have brought the shards past training
+        self._train_shards()
+
+    def warmup(self):
+        self._map(lambda shard: shard.warmup(), self.shards)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return any(shard.needs_compaction for shard in self.shards)
+
+    def flush(self):
+        self._map(lambda shard: shard.flush(), self.shards)
+
+    def compact(self):
+        self._map(lambda shard: shard.compact(), self.shards)
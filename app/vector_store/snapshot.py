@@ -0,0 +1,162 @@
+# app/vector_store/snapshot.py
+import glob
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Tuple
+
+# A snapshot is a set of versioned files plus a manifest naming them:
+#
+#   faiss.index.manifest           {"version": 3, "index": ..., ...}
+#   faiss.index.v000003            FAISS index
+#   chunks.bin.v000003             columnar chunk metadata
+#   faiss.index.v000003.vectors.npy full-precision vectors (optional)
+#   faiss.index.v000003.bm25        BM25 inverted index (optional)
+#
+# Files are written under fresh names and the manifest is swapped in with
+# an atomic rename, so a crash leaves either the old or the new snapshot,
+# never a mismatched index/metadata pair. Stores saved before manifests
+# existed use the bare index/metadata paths.
+
+MANIFEST_SUFFIX = ".manifest"
+PREFAULT_BLOCK = 16 * 1024 * 1024
+
+
+@dataclass
+class Manifest:
+    version: int
+    index: str
+    metadata: str
+    vectors: str | None = None
+    bm25: str | None = None
+
+
+def manifest_path(index_path: str) -> str:
+    return f"{index_path}{MANIFEST_SUFFIX}"
+
+
+def vectors_path(index_path: str) -> str:
+    return f"{index_path}.vectors.npy"
+
+
+def bm25_path(index_path: str) -> str:
+    return f"{index_path}.bm25"
+
+
+def read_manifest(index_path: str) -> Manifest | None:
+    path = manifest_path(index_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return Manifest(**json.load(f))
+
+
+def snapshot_exists(index_path: str, metadata_path: str) -> bool:
+    if read_manifest(index_path) is not None:
+        return True
+    return os.path.exists(index_path) and os.path.exists(metadata_path)
+
+
+def resolve(index_path: str, metadata_path: str) -> Tuple[str, str, str | None]:
+    """
+    Files holding the current snapshot: (index, metadata, vectors).
+    """
+    manifest = read_manifest(index_path)
+    if manifest is None:
+        return index_path, metadata_path, vectors_path(index_path)
+
+    directory = os.path.dirname(index_path)
+    return (
+        os.path.join(directory, manifest.index),
+        os.path.join(os.path.dirname(metadata_path), manifest.metadata),
+        os.path.join(directory, manifest.vectors) if manifest.vectors else None,
+    )
+
+
+def resolve_bm25(index_path: str) -> str | None:
+    """
+    File holding the current snapshot's BM25 index, if it has one.
+    """
+    manifest = read_manifest(index_path)
+    if manifest is None or manifest.bm25 is None:
+        return None
+    return os.path.join(os.path.dirname(index_path), manifest.bm25)
+
+
+def next_manifest(
+    index_path: str,
+    metadata_path: str,
+    with_vectors: bool,
+    with_bm25: bool = False,
+) -> Manifest:
+    """
+    Manifest (and file names) for the snapshot after the current one.
+    """
+    current = read_manifest(index_path)
+    version = current.version + 1 if current is not None else 1
+    index_name = f"{os.path.basename(index_path)}.v{version:06d}"
+
+    return Manifest(
+        version=version,
+        index=index_name,
+        metadata=f"{os.path.basename(metadata_path)}.v{version:06d}",
+        vectors=os.path.basename(vectors_path(index_name)) if with_vectors else None,
+        bm25=os.path.basename(bm25_path(index_name)) if with_bm25 else None,
+    )
+
+
+def fsync_dir(path: str) -> None:
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_bytes(path: str, data) -> None:
+    """
+    Durably write `data` to `path` via a temp file and rename.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def commit_manifest(index_path: str, metadata_path: str, manifest: Manifest) -> None:
+    """
+    Atomically publish `manifest`, then delete files belonging to older
+    snapshots (including the pre-manifest layout).
+    """
+    for path in {index_path, metadata_path}:
+        fsync_dir(path)
+
+    write_bytes(
+        manifest_path(index_path),
+        json.dumps(asdict(manifest)).encode("utf-8"),
+    )
+    fsync_dir(index_path)
+
+    current = {manifest.index, manifest.metadata, manifest.vectors, manifest.bm25}
+    stale = [index_path, metadata_path, vectors_path(index_path)]
+    stale += glob.glob(f"{glob.escape(index_path)}.v[0-9]*")
+    stale += glob.glob(f"{glob.escape(metadata_path)}.v[0-9]*")
+
+    for path in stale:
+        if os.path.basename(path) not in current and os.path.exists(path):
+            os.remove(path)
+
+
+def prefault(path: str, block_size: int = PREFAULT_BLOCK) -> None:
+    """
+    Read a file through once so its pages sit in the OS page cache, where
+    every process memory-mapping it can use them without disk reads.
+    """
+    buffer = bytearray(block_size)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while f.readinto(buffer):
+            pass
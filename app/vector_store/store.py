@@ -1,78 +1,954 @@
 # app/vector_store/store.py
-import faiss
+from __future__ import annotations
+
+import os
+import threading
 import numpy as np
-from typing import List, Tuple
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+from app.core.lazy import lazy_import
+from app.core.rwlock import ReadWriteLock
 from app.models.document_models import DocumentChunk
+from app.models.filters import MetadataFilters, normalize_filters
+from app.retrieval.analyzer import Analyzer
+from app.retrieval.bm25_index import BM25Index
+from app.vector_store.chunk_store import ChunkStore, is_columnar_file
+from app.vector_store.raw_vectors import RawVectors
+from app.vector_store.segments import SegmentLog
+from app.vector_store.snapshot import (
+    commit_manifest,
+    next_manifest,
+    prefault,
+    resolve,
+    resolve_bm25,
+    snapshot_exists,
+    write_bytes,
+)
+from app.vector_store.index_factory import (
+    IndexConfig,
+    apply_search_params,
+    build_index,
+    build_staging_index,
+    encode_vectors,
+    materialize_index,
+    read_index,
+    requires_training,
+    scan_is_cheaper,
+    search_parameters,
+    search_stored,
+    serialize_index,
+    staged_vectors,
+    train_index,
+    training_size,
+    wrap_with_ids,
+)
+
+faiss = lazy_import("faiss")
+
+# What a staging index is searched / maintained as
+_STAGING_CONFIG = IndexConfig()
+
+# Vectors added per exclusive hold of the index lock, so a bulk
+# (HNSW) insert lets searches through between batches
+_ADD_BATCH = 4096
+
+
+class _Selection(NamedTuple):
+    """
+    Ids a search may return: sorted ids when they are few, otherwise a
+    packed bitmap over the id range. Immutable, so it can be cached and
+    shared; the FAISS selector over it is built per search.
+    """
+    count: int
+    ids: np.ndarray | None = None
+    bitmap: np.ndarray | None = None
+
+    @classmethod
+    def of(cls, ids: np.ndarray, id_range: int) -> "_Selection":
+        # A bitmap costs id_range / 8 bytes, the id array 8 bytes per id
+        if len(ids) * 64 < id_range:
+            return cls(len(ids), ids=ids)
+        bits = np.zeros(id_range, dtype=bool)
+        bits[ids] = True
+        return cls(len(ids), bitmap=np.packbits(bits, bitorder="little"))
+
+    @classmethod
+    def excluding(cls, ids: np.ndarray, id_range: int, count: int) -> "_Selection":
+        bits = np.ones(id_range, dtype=bool)
+        bits[ids] = False
+        return cls(count, bitmap=np.packbits(bits, bitorder="little"))
+
+    def selector(self) -> faiss.IDSelector:
+        if self.bitmap is not None:
+            return faiss.IDSelectorBitmap(len(self.bitmap), faiss.swig_ptr(self.bitmap))
+        return faiss.IDSelectorBatch(self.ids)
+
+
+class _ReadView(NamedTuple):
+    """
+    Row-aligned chunk metadata + full-precision vectors + BM25 index,
+    swapped as one reference so a search never mixes two snapshots.
+    """
+    chunks: ChunkStore
+    raw_vectors: RawVectors | None
+    bm25: BM25Index | None = None
+
+
+@dataclass
+class _Capture:
+    """
+    Frozen store state taken under the write lock and written to disk
+    after it is released.
+    """
+    index_bytes: np.ndarray
+    view: _ReadView
+    attrs: Dict[str, Any]
+    next_id: int
+    rows: int
+    exclude_ids: np.ndarray | None = None
+    files: Tuple[str, ...] = ()  # set once written
 
 
 class VectorStore:
     """
     FAISS-based vector store for semantic search.
+
+    The index type is chosen through `IndexConfig` (flat, HNSW, IVF-Flat,
+    IVF-PQ). Indexes that need training (IVF, SQ8, PCA) start as an exact flat
+    staging index; once it holds `training_size` vectors the configured
+    index is trained on all of them and takes their place, so small first
+    uploads do not fix a coarse quantizer for good. With `auto_train=False`
+    the store keeps staging until `train_from()` hands it a trained index
+    (ShardedVectorStore trains one for all its shards).
+
+    Vectors can be stored compressed (fp16, SQ8 or sign-binary with
+    Hamming search). With `config.rescore_factor` set, full-precision
+    copies are kept in a memory-mapped RawVectors file and an over-fetched
+    candidate list is re-ranked by exact L2 distance.
+
+    Chunk metadata lives in a memory-mapped columnar ChunkStore, so only
+    the chunks a search actually returns are materialized.
+
+    Vectors are stored under stable int64 ids. Deleting a document only
+    tombstones its ids (filtered inside the FAISS scan); `compact()`
+    physically removes them.
+
+    Metadata filters (document_id / source / page) are resolved to id sets
+    through the ChunkStore's inverted map and pushed into the FAISS scan
+    as ID selectors, so scoped queries need no over-fetching. The narrower
+    the selection, the more IVF cells / HNSW nodes a search visits; HNSW
+    scans the selected vectors exactly once that is cheaper.
+
+    Persistence is either a full `save()`/`load()` snapshot, or — after
+    `open()` — incremental: `flush()` appends only new rows to a segment
+    log and `compact()` folds the log back into the snapshot.
+
+    Snapshots are copy-on-write: the write lock is held only to serialize
+    the index and freeze the metadata; files are written while searches
+    and ingests carry on, published through an atomic version manifest,
+    and the in-memory view is swapped in afterwards.
+
+    Searches run concurrently with each other and with writes. FAISS
+    indexes must not change while they are searched, so searches share
+    a reader-writer lock that writes take exclusively only to modify the
+    index in place (adds go in batches) or to swap in one rebuilt, trained
+    or re-mapped on the side, together with the tombstones.
+
+    With `mmap=True` snapshots are loaded memory-mapped (see
+    `read_index`): startup does no bulk reads and workers share the page
+    cache. The first write replaces the mapping with an owned copy;
+    compaction maps the new snapshot again.
+
+    With `bm25=True` the store also keeps a BM25 inverted index over the
+    chunk texts (doc id = chunk row), updated on every add / delete and
+    written into each snapshot, so `search_bm25` needs no rebuild after
+    a restart. Updates are copy-on-write: searches keep the index they
+    started with. New chunks go to the index's delta segment and deleted
+    ones keep counting towards its statistics; both are folded in when a
+    snapshot is written. `bm25_analyzer` sets its text analysis (stopwords,
+    stemming); a snapshot indexed with a different analyzer is re-indexed
+    on load.
     """
 
-    def __init__(self, dim: int):
+    def __init__(
+        self,
+        dim: int,
+        config: IndexConfig | None = None,
+        compact_after: int = 16,
+        compact_deleted_ratio: float = 0.2,
+        mmap: bool = False,
+        bm25: bool = False,
+        bm25_analyzer: Analyzer | None = None,
+        auto_train: bool = True,
+    ):
         self.dim = dim
-        self.index = faiss.IndexFlatL2(dim)  # Simple L2 distance index
-        self.metadata_store: List[DocumentChunk] = []
+        self.config = config or IndexConfig()
+        self.auto_train = auto_train
+        self._staging = requires_training(self.config)
+        self.index = (
+            build_staging_index(dim, self.config) if self._staging
+            else build_index(dim, self.config)
+        )
+        self.mmap = mmap
+        self.bm25 = bm25
+        self.bm25_analyzer = bm25_analyzer or Analyzer()
+        self._mapped = False
+        self._snapshot_files: Tuple[str, ...] = ()
+        self._view = _ReadView(
+            ChunkStore(), self._new_raw_vectors(), self._new_bm25() if bm25 else None
+        )
+        self._next_id = 0
+
+        # Tombstoned vector ids (sorted) and cached searchable id sets,
+        # keyed by normalized filters (() = no filter)
+        self._deleted = np.zeros(0, dtype=np.int64)
+        self._selections: Dict[tuple, _Selection] = {}
+        self.max_cached_filters = 128
+
+        # Incremental persistence (enabled by open())
+        self.compact_after = compact_after
+        self.compact_deleted_ratio = compact_deleted_ratio
+        self._paths: Tuple[str, str] | None = None
+        self._log: SegmentLog | None = None
+        self._pending: List[np.ndarray] = []
+        self._persisted_id = 0
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        # Shared by searches; exclusive to change the FAISS index (or swap
+        # it) together with the tombstones and id-set cache
+        self._index_lock = ReadWriteLock()
+
+    def _new_raw_vectors(self) -> RawVectors | None:
+        return RawVectors(self.dim) if self.config.rescore_factor > 0 else None
+
+    def _new_bm25(self) -> BM25Index:
+        return BM25Index(analyzer=replace(self.bm25_analyzer))
+
+    @property
+    def staging(self) -> bool:
+        """Whether vectors are still held in the flat staging index."""
+        return self._staging
+
+    @property
+    def index_config(self) -> IndexConfig:
+        """Config of the index as built: flat while it is staging."""
+        return _STAGING_CONFIG if self._staging else self.config
+
+    @property
+    def metadata_store(self) -> ChunkStore:
+        return self._view.chunks
+
+    @property
+    def raw_vectors(self) -> RawVectors | None:
+        return self._view.raw_vectors
+
+    @property
+    def bm25_index(self) -> BM25Index | None:
+        return self._view.bm25
 
     @property
     def size(self) -> int:
-        """Return number of vectors stored in FAISS."""
-        return self.index.ntotal
+        """Return number of live (non-deleted) vectors stored in FAISS."""
+        return self.index.ntotal - len(self._deleted)
 
     @property
-    def chunks(self) -> List[DocumentChunk]:
+    def chunks(self) -> Sequence[DocumentChunk]:
         """
-        Return all stored document chunks.
+        Return all live document chunks.
         Useful for sparse and hybrid retrieval.
         """
-        return self.metadata_store
+        store = self.metadata_store
+        if not len(self._deleted):
+            return store
 
-    def add(self, vectors: np.ndarray, chunks: List[DocumentChunk]):
+        live_rows = np.nonzero(~np.isin(store.ids, self._deleted))[0]
+        return [store[int(row)] for row in live_rows]
+
+    def add(self, vectors: np.ndarray, chunks: List[DocumentChunk]) -> np.ndarray:
         """
         Add vectors + associated metadata.
+        Returns the ids assigned to the new vectors.
         """
         if len(vectors) != len(chunks):
             raise ValueError("Vectors and chunks must be the same length")
 
-        self.index.add(vectors.astype("float32"))
-        self.metadata_store.extend(chunks)
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}")
+
+        with self._lock:
+            ids = self._add(vectors, chunks)
+
+            if self._log is not None:
+                self._pending.append(vectors)
 
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Tuple[float, DocumentChunk]]:
+        return ids
+
+    def _add(self, vectors: np.ndarray, chunks: List[DocumentChunk]) -> np.ndarray:
+        self._ensure_writable()
+
+        ids = np.arange(self._next_id, self._next_id + len(vectors), dtype=np.int64)
+        # Before the index grows, so cached id sets always span the new ids
+        self._next_id += len(vectors)
+
+        # Metadata first: a concurrent search must never see a label
+        # it cannot resolve
+        self.metadata_store.extend(chunks, ids)
+        if self.raw_vectors is not None:
+            self.raw_vectors.extend(vectors)
+        codes = encode_vectors(vectors, self.index_config)
+        for start in range(0, len(ids), _ADD_BATCH):
+            with self._index_lock.write():
+                self.index.add_with_ids(
+                    codes[start:start + _ADD_BATCH], ids[start:start + _ADD_BATCH]
+                )
+                self._selections.clear()
+        if self.bm25_index is not None:
+            self._update_bm25(lambda bm25: bm25.add_texts(c.text for c in chunks))
+
+        if (
+            self._staging
+            and self.auto_train
+            and self.index.ntotal >= training_size(self.dim, self.config)
+        ):
+            self._train()
+        return ids
+
+    def _update_bm25(self, update) -> None:
+        """Apply `update` to a copy of the BM25 index and swap it in."""
+        bm25 = self.bm25_index.copy()
+        update(bm25)
+        self._view = self._view._replace(bm25=bm25)
+
+    def _ensure_writable(self):
         """
-        Retrieve top-k nearest chunks for a query vector.
-        Returns (distance, chunk) pairs.
+        Swap a memory-mapped (read-only) index for an owned copy before
+        it is modified. Searches in flight keep using the mapping.
+        """
+        if not self._mapped:
+            return
+
+        index = materialize_index(self.index)
+        apply_search_params(index, self.index_config)
+        with self._index_lock.write():
+            self.index = index
+        self._mapped = False
+
+    def _train(self):
+        """
+        Replace the staging index with the configured one, trained on
+        every vector staged so far (tombstoned ones keep their ids, so
+        they stay masked).
+        """
+        ids, vectors = staged_vectors(self.index)
+        self._install(train_index(self.dim, self.config, vectors), ids, vectors)
+
+    def train_from(self, trained: faiss.Index):
+        """
+        Leave staging with a copy of `trained` (an empty index trained for
+        this store's config elsewhere, e.g. once for all shards) holding
+        the staged vectors. No-op once the store is trained.
+        """
+        with self._lock:
+            if not self._staging:
+                return
+            ids, vectors = staged_vectors(self.index)
+            self._install(materialize_index(trained), ids, vectors)
+
+    def _install(self, index: faiss.Index, ids: np.ndarray, vectors: np.ndarray):
+        index.add_with_ids(encode_vectors(vectors, self.config), ids)
+
+        with self._index_lock.write():
+            self.index = index
+            self._staging = False
+            self._selections.clear()
+
+    def set_search_params(self, nprobe: int | None = None, ef_search: int | None = None):
+        """
+        Tune recall/latency at query time without rebuilding the index.
+        """
+        if nprobe is not None:
+            self.config.nprobe = nprobe
+        if ef_search is not None:
+            self.config.ef_search = ef_search
+
+        with self._index_lock.write():
+            apply_search_params(self.index, self.index_config)
+            self._selections.clear()
+
+    # -----------------------------
+    # Deletion
+    # -----------------------------
+
+    def delete_document(self, document_id: str) -> int:
+        """
+        Tombstone every vector belonging to `document_id`.
+        Returns the number of vectors removed from search results.
         """
-        distances, indices = self.index.search(
-            query_vector[np.newaxis, :].astype("float32"),
-            k
+        with self._lock:
+            ids = self._live_ids(document_id)
+            self._delete_ids(ids)
+            return len(ids)
+
+    def replace_document(
+        self,
+        document_id: str,
+        vectors: np.ndarray | Iterable[np.ndarray],
+        chunks: List[DocumentChunk],
+    ) -> np.ndarray:
+        """
+        Swap a document's vectors/chunks for new ones under one lock.
+        Returns the ids assigned to the new vectors.
+
+        `vectors` is one array or an iterable of consecutive row blocks
+        (e.g. `Embedder.embed_iter`); blocks are added as they arrive, so
+        only one is held in memory. Until the last one is in, searches see
+        the old version alongside the new chunks added so far.
+
+        The new rows are added (and, with a segment log, flushed) before
+        the old ones are tombstoned, so a crash in between leaves both
+        versions on disk rather than neither.
+        """
+        blocks = [vectors] if isinstance(vectors, np.ndarray) else vectors
+
+        with self._lock:
+            old_ids = self._live_ids(document_id)
+
+            ids = []
+            offset = 0
+            for block in blocks:
+                ids.append(self.add(block, chunks[offset:offset + len(block)]))
+                offset += len(block)
+            if offset != len(chunks):
+                raise ValueError("Vectors and chunks must be the same length")
+
+            if self._log is not None:
+                self._flush_pending()
+            self._delete_ids(old_ids)
+            return np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+
+    def _live_ids(self, document_id: str) -> np.ndarray:
+        return np.setdiff1d(
+            self.metadata_store.ids_for("document_id", [document_id]),
+            self._deleted,
         )
 
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx == -1:
-                continue
-            results.append((float(dist), self.metadata_store[idx]))
+    def _delete_ids(self, ids: np.ndarray):
+        if not len(ids):
+            return
+
+        if self._log is not None:
+            self._log.append_tombstones(ids)
+
+        self._mark_deleted(ids)
+
+    def _mark_deleted(self, ids: np.ndarray):
+        with self._index_lock.write():
+            self._deleted = np.union1d(self._deleted, ids)
+            self._selections.clear()
+
+        if self.bm25_index is not None:
+            rows = self.metadata_store.rows_for_ids(ids)
+            self._update_bm25(lambda bm25: bm25.delete(rows))
+
+    def _search_index(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filters: Dict[str, List[str]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS search restricted to live ids matching `filters`.
+
+        Search params are built per call; only the id sets are cached:
+        IndexIDMap swaps its own selector into the params while it
+        searches, so params must never be shared between searches.
+        nprobe / efSearch grow as the selection narrows, and HNSW switches
+        to an exact scan once that is the cheaper way to find k results.
+        """
+        selection = self._selection(filters)
+        if selection is None:
+            return self.index.search(queries, k)
+
+        config = self.index_config
+        selector = selection.selector()
+        selectivity = selection.count / max(self.index.ntotal, 1)
+
+        if config.index_type == "hnsw" and scan_is_cheaper(config, selection.count, selectivity):
+            return search_stored(self.index, queries, k, selector)
+
+        params = search_parameters(config, selector, selectivity)
+        # FAISS does not own selectors (or the bitmap behind one)
+        params.referenced_objects = (selector, selection)
+        return self.index.search(queries, k, params=params)
+
+    def _selection(self, filters: Dict[str, List[str]]) -> _Selection | None:
+        key = tuple((field, tuple(values)) for field, values in sorted(filters.items()))
+
+        if not key and not len(self._deleted):
+            return None
+
+        cached = self._selections.get(key)
+        if cached is not None:
+            return cached
+
+        if key:
+            allowed = None
+            for field, values in filters.items():
+                ids = self.metadata_store.ids_for(field, values)
+                allowed = ids if allowed is None else np.intersect1d(allowed, ids)
+            selection = _Selection.of(np.setdiff1d(allowed, self._deleted), self._next_id)
+        else:
+            selection = _Selection.excluding(self._deleted, self._next_id, self.size)
 
-        return results
+        if len(self._selections) >= self.max_cached_filters:
+            self._selections.pop(next(iter(self._selections)))
+        self._selections[key] = selection
+        return selection
+
+    def _reclaim_deleted(self):
+        """
+        Physically drop tombstoned vectors from the index.
+
+        Only flat indexes renumber their rows the way IndexIDMap2's
+        remove_ids expects; that is done in place under the index lock.
+        HNSW (no remove_ids) and IVF (list entries are not renumbered, so
+        the id map would go stale) are rebuilt in a copy from their stored
+        (or full-precision, when kept) vectors, reusing the trained
+        quantizers, while searches use the current index. Either way the
+        index and the cleared tombstones are published together.
+        """
+        dead = self._deleted
+        self._ensure_writable()
+
+        if self.index_config.index_type == "flat":
+            with self._index_lock.write():
+                self.index.remove_ids(faiss.IDSelectorBatch(dead))
+                self._deleted = np.zeros(0, dtype=np.int64)
+                self._selections.clear()
+            return
+
+        index = materialize_index(self.index)
+        ids = faiss.vector_to_array(index.id_map)
+        keep = ~np.isin(ids, dead)
+        ids = ids[keep]
+
+        if self.raw_vectors is not None:
+            vectors = self.raw_vectors.take(self.metadata_store.rows_for_ids(ids))
+        else:
+            ivf = faiss.try_extract_index_ivf(index.index)
+            if ivf is not None:
+                ivf.make_direct_map()
+            inner = faiss.downcast_index(index.index)
+            vectors = inner.reconstruct_n(0, inner.ntotal)[keep]
+
+        index.reset()
+        index.add_with_ids(vectors, ids)
+        apply_search_params(index, self.index_config)
+
+        with self._index_lock.write():
+            self.index = index
+            self._deleted = np.zeros(0, dtype=np.int64)
+            self._selections.clear()
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        """
+        Retrieve top-k nearest chunks for a query vector, optionally
+        restricted to chunks matching metadata `filters`.
+        Returns (distance, chunk) pairs.
+        """
+        return self.search_batch(query_vector[np.newaxis, :], k=k, filters=filters)[0]
+
+    def search_batch(
+        self,
+        query_matrix: np.ndarray,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[List[Tuple[float, DocumentChunk]]]:
+        """
+        Retrieve top-k nearest chunks for each row of a query matrix
+        using a single FAISS search call.
+        Returns one list of (distance, chunk) pairs per query; distances
+        are squared L2, or Hamming bit counts for binary storage without
+        re-scoring.
+        """
+        query_matrix = np.ascontiguousarray(query_matrix, dtype="float32")
+        filters = normalize_filters(filters)
+
+        with self._index_lock.read():
+            view = self._view
+            fetch_k = k * self.config.rescore_factor if view.raw_vectors is not None else k
+            distances, labels = self._search_index(
+                encode_vectors(query_matrix, self.index_config), fetch_k, filters
+            )
+
+        batch_results = []
+        for query, row_distances, row_labels in zip(query_matrix, distances, labels):
+            found = row_labels != -1
+            rows = view.chunks.rows_for_ids(row_labels[found])
+            row_distances = row_distances[found]
+
+            if view.raw_vectors is not None:
+                row_distances, rows = self._rescore(view.raw_vectors, query, rows, k)
+
+            batch_results.append([
+                (float(dist), view.chunks[int(row)])
+                for dist, row in zip(row_distances, rows)
+            ])
+
+        return batch_results
+
+    @staticmethod
+    def _rescore(
+        raw_vectors: RawVectors,
+        query: np.ndarray,
+        rows: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-rank candidate rows by exact squared L2 distance against the
+        full-precision vectors and keep the best k.
+        """
+        diff = raw_vectors.take(rows) - query
+        exact = np.einsum("ij,ij->i", diff, diff)
+
+        order = np.argsort(exact, kind="stable")[:k]
+        return exact[order], rows[order]
+
+    def search_bm25(
+        self,
+        query: str,
+        k: int = 5,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[float, DocumentChunk]]:
+        """
+        Top-k chunks by BM25 score (higher is better) over the store's
+        inverted index, optionally restricted by metadata `filters`.
+        """
+        view = self._view
+        if view.bm25 is None:
+            raise RuntimeError("search_bm25() requires a store created with bm25=True")
+
+        accept = None
+        filters = normalize_filters(filters)
+        if filters:
+            allowed = None
+            for field, values in filters.items():
+                ids = view.chunks.ids_for(field, values)
+                allowed = ids if allowed is None else np.intersect1d(allowed, ids)
+
+            mask = np.zeros(view.bm25.num_docs, dtype=bool)
+            rows = view.chunks.rows_for_ids(allowed)
+            mask[rows[rows < len(mask)]] = True
+
+            def accept(docs: np.ndarray) -> np.ndarray:
+                return mask[docs]
+
+        terms = view.bm25.analyzer.analyze(query)
+        rows, scores = view.bm25.search(terms, k, accept=accept, mode="block_max")
+        return [(float(score), view.chunks[int(row)]) for row, score in zip(rows, scores)]
+
+    # -----------------------------
+    # Snapshots
+    # -----------------------------
 
     def save(self, index_path: str, metadata_path: str):
         """
-        Save FAISS index + metadata.
+        Save FAISS index + columnar chunk metadata (with index configuration
+        and any tombstones not yet reclaimed) as a new snapshot version.
+        Searches and ingests are only blocked while the state is captured.
         """
-        faiss.write_index(self.index, index_path)
+        with self._save_lock:
+            with self._lock:
+                capture = self._capture()
+            self._write_snapshot(index_path, metadata_path, capture)
+            with self._lock:
+                self._adopt(capture)
 
-        import pickle
-        with open(metadata_path, "wb") as f:
-            pickle.dump(self.metadata_store, f)
+    def _capture(self, exclude_ids: np.ndarray | None = None) -> _Capture:
+        """
+        Freeze the current state (call with the write lock held). The FAISS
+        index is serialized in memory; chunks and raw vectors share their
+        memory-mapped base and copy only unsaved rows.
+        """
+        view = self._view
+        raw = view.raw_vectors
+        bm25 = view.bm25
+
+        return _Capture(
+            index_bytes=serialize_index(self.index),
+            view=_ReadView(
+                view.chunks.snapshot(),
+                raw.snapshot() if raw else None,
+                bm25.copy() if bm25 else None,
+            ),
+            attrs={
+                "index_config": self.config.to_dict(),
+                "next_id": self._next_id,
+                "deleted_ids": self._deleted.tolist(),
+                "staging": self._staging,
+            },
+            next_id=self._next_id,
+            rows=len(view.chunks),
+            exclude_ids=exclude_ids,
+        )
+
+    def _write_snapshot(self, index_path: str, metadata_path: str, capture: _Capture):
+        """
+        Write a captured state under fresh file names and publish it via
+        the manifest. Runs without the write lock.
+        """
+        chunks, raw, bm25 = capture.view
+        manifest = next_manifest(
+            index_path,
+            metadata_path,
+            with_vectors=raw is not None,
+            with_bm25=bm25 is not None,
+        )
+        index_dir = os.path.dirname(index_path)
+        index_file = os.path.join(index_dir, manifest.index)
+        metadata_file = os.path.join(os.path.dirname(metadata_path), manifest.metadata)
+
+        write_bytes(index_file, capture.index_bytes)
+        capture.files = (index_file, metadata_file)
+
+        # Row-aligned files must be filtered the same way as the chunk rows
+        keep = None
+        if capture.exclude_ids is not None:
+            keep = ~np.isin(chunks.ids, capture.exclude_ids)
+
+        if raw is not None:
+            vectors_file = os.path.join(index_dir, manifest.vectors)
+            raw.save(vectors_file, keep)
+            capture.files += (vectors_file,)
+
+        if bm25 is not None:
+            bm25_file = os.path.join(index_dir, manifest.bm25)
+            bm25.save(bm25_file, keep)
+            capture.files += (bm25_file,)
+
+        chunks.save(metadata_file, attrs=capture.attrs, exclude_ids=capture.exclude_ids)
+
+        commit_manifest(index_path, metadata_path, manifest)
+
+    def _adopt(self, capture: _Capture):
+        """
+        Swap in the freshly written (memory-mapped) snapshot, re-appending
+        rows added while it was being written.
+        """
+        chunks, raw, bm25 = capture.view
+
+        added, added_ids = self.metadata_store.rows_after(capture.next_id - 1)
+        chunks.extend(added, added_ids)
+        if raw is not None:
+            raw.extend(self.raw_vectors.rows_from(capture.rows))
+        if bm25 is not None:
+            bm25.add_texts(c.text for c in added)
+            # Deletions made while the snapshot was being written
+            bm25.delete(chunks.rows_for_ids(np.intersect1d(self._deleted, chunks.ids)))
+
+        self._view = _ReadView(chunks, raw, bm25)
+        self._snapshot_files = capture.files
+
+        # Nothing added since the capture: serve the index from the file
+        if self.mmap and self._next_id == capture.next_id:
+            index = read_index(capture.files[0], self.index_config, mmap=True)
+            apply_search_params(index, self.index_config)
+            with self._index_lock.write():
+                self.index = index
+            self._mapped = True
 
     def load(self, index_path: str, metadata_path: str):
         """
-        Load FAISS index + metadata.
+        Load FAISS index + metadata from the snapshot named by the
+        manifest (or the bare paths for stores saved before manifests).
+        Legacy pickled metadata is converted on the next save().
         """
-        import pickle
+        # Everything is replaced: searches wait for the new state as a whole
+        with self._index_lock.write():
+            index_file, metadata_file, vectors_file = resolve(index_path, metadata_path)
+
+            if is_columnar_file(metadata_file):
+                chunks = ChunkStore()
+                attrs = chunks.load(metadata_file)
+                self.config = IndexConfig.from_dict(attrs["index_config"])
+            else:
+                attrs = {}
+                chunks = self._load_pickled_metadata(metadata_file)
+
+            # Snapshots written before id mapping used implicit row ids
+            self._staging = attrs.get("staging", False)
+            index = read_index(index_file, self.index_config, mmap=self.mmap)
+            self.index = wrap_with_ids(index)
+            self._mapped = self.mmap and self.index is index
+
+            raw = self._new_raw_vectors()
+            if raw is not None:
+                raw.load(vectors_file)
+
+            ids = chunks.ids
+            self._next_id = attrs.get("next_id", int(ids[-1]) + 1 if len(ids) else 0)
+            self._deleted = np.asarray(attrs.get("deleted_ids", []), dtype=np.int64)
+            self._selections.clear()
 
-        self.index = faiss.read_index(index_path)
+            bm25 = None
+            bm25_file = resolve_bm25(index_path)
+            if self.bm25:
+                if bm25_file is not None:
+                    bm25 = BM25Index()
+                    bm25.load(bm25_file)
+                if bm25 is None or bm25.analyzer != self.bm25_analyzer:
+                    # Snapshot saved without one (or with another analyzer): index
+                    # it once, saved with the next snapshot
+                    bm25 = self._new_bm25()
+                    bm25.add_texts(chunk.text for chunk in chunks)
+                    bm25.delete(chunks.rows_for_ids(self._deleted))
+
+            self._view = _ReadView(chunks, raw, bm25)
+            self._snapshot_files = tuple(
+                path for path in (index_file, metadata_file, vectors_file, bm25_file)
+                if path is not None and os.path.exists(path)
+            )
+
+            apply_search_params(self.index, self.index_config)
+
+    def warmup(self):
+        """
+        Pull the current snapshot's files into the OS page cache so the
+        first memory-mapped searches do not fault pages in from disk.
+        """
+        for path in self._snapshot_files:
+            prefault(path)
+
+    def _load_pickled_metadata(self, metadata_path: str) -> ChunkStore:
+        import pickle
 
         with open(metadata_path, "rb") as f:
-            self.metadata_store = pickle.load(f)
+            data = pickle.load(f)
+
+        # Oldest snapshots stored the bare chunk list (flat index only)
+        if isinstance(data, list):
+            self.config = IndexConfig()
+            chunks = data
+        else:
+            self.config = IndexConfig.from_dict(data["index_config"])
+            chunks = data["chunks"]
+
+        store = ChunkStore()
+        store.extend(chunks)
+        return store
+
+    # -----------------------------
+    # Incremental persistence
+    # -----------------------------
+
+    def open(self, index_path: str, metadata_path: str, segment_dir: str):
+        """
+        Attach the store to an on-disk location: load the snapshot if one
+        exists, replay any newer log segments and tombstones, and enable
+        flush()/compact().
+        """
+        with self._lock:
+            if snapshot_exists(index_path, metadata_path):
+                self.load(index_path, metadata_path)
+
+            self._paths = (index_path, metadata_path)
+            self._log = SegmentLog(segment_dir)
+
+            starts = self._log.segments()
+            for start, following in zip(starts, starts[1:] + [None]):
+                if following is not None and following <= self._next_id:
+                    continue  # already folded into the snapshot
+                if start > self._next_id:
+                    raise RuntimeError(
+                        f"Segment log gap: expected id {self._next_id}, found {start}"
+                    )
+                vectors, chunks = self._log.read(start)
+
+                # A save() may have captured part of this segment
+                skip = self._next_id - start
+                if skip < len(vectors):
+                    self._add(vectors[skip:], chunks[skip:])
+
+            # Tombstones for ids already reclaimed by a snapshot are no-ops
+            tombstones = np.intersect1d(self._log.tombstones(), self.metadata_store.ids)
+            if len(tombstones):
+                self._mark_deleted(tombstones)
+
+            self._pending = []
+            self._persisted_id = self._next_id
+
+    @property
+    def needs_compaction(self) -> bool:
+        if self._log is None:
+            return False
+        if len(self._log) >= self.compact_after:
+            return True
+        total = self.index.ntotal
+        return bool(total) and len(self._deleted) / total >= self.compact_deleted_ratio
+
+    def flush(self):
+        """
+        Persist rows added since the last flush/compact as one new segment.
+        I/O is proportional to the new rows, not the corpus.
+        """
+        if self._log is None:
+            raise RuntimeError("flush() requires open() to be called first")
+
+        with self._lock:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+
+        vectors = np.concatenate(self._pending)
+        self._log.append(
+            self._persisted_id,
+            vectors,
+            self.metadata_store[len(self.metadata_store) - len(vectors):],
+        )
+        self._pending = []
+        self._persisted_id = self._next_id
+
+    def compact(self):
+        """
+        Reclaim tombstoned vectors and merge the snapshot and all log
+        segments into a new snapshot.
+        Intended to run in the background once enough segments or
+        deletions pile up; the write lock is only held to reclaim and
+        capture, not while the snapshot is written.
+        """
+        if self._log is None:
+            raise RuntimeError("compact() requires open() to be called first")
+
+        with self._save_lock:
+            with self._lock:
+                dead = self._deleted
+                if not self._pending and not len(dead) and len(self._log) == 0:
+                    return
+
+                # Rows must stay durable until the new snapshot is published
+                self._flush_pending()
+                folded_tombstones = len(self._log.tombstones())
+
+                if len(dead):
+                    self._reclaim_deleted()
+
+                capture = self._capture(exclude_ids=dead)
+
+            self._write_snapshot(*self._paths, capture)
+
+            with self._lock:
+                self._adopt(capture)
+                self._log.remove_before(capture.next_id)
+                self._log.drop_tombstones(folded_tombstones)
@@ -3,14 +3,28 @@ from pathlib import Path
 import uuid
 import os
 
+from app.core.settings import (
+    EMBEDDING_CACHE_MAX_MB,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_THREADS,
+    EMBEDDING_WORKERS,
+)
+from app.embedding.cache import EmbeddingCache
 from app.embedding.embedder import Embedder
+from app.vector_store.index_factory import IndexConfig
 from app.vector_store.store import VectorStore
 from app.processing.ingestion_service import ingest_document
 
 CORPUS_DIR = Path("evaluation/corpus")
 
 
-def ingest_all(model_name: str) -> VectorStore:
+def ingest_all(
+    model_name: str,
+    backend: str = "torch",
+    workers: int = EMBEDDING_WORKERS,
+    config: IndexConfig | None = None,
+    num_threads: int = EMBEDDING_THREADS,
+) -> VectorStore:
     """
     Ingest the evaluation corpus using the chunking strategy
     defined by environment variables.
@@ -19,6 +33,12 @@ def ingest_all(model_name: str) -> VectorStore:
       - CHUNK_STRATEGY: fixed | sentence | section
       - CHUNK_MAX_CHARS: int (only for fixed)
       - CHUNK_OVERLAP: int (only for fixed)
+
+    `backend` is the Embedder inference backend (torch | onnx | onnx-int8);
+    `workers` > 1 embeds in that many processes (default EMBEDDING_WORKERS).
+    `config` sets the index (type, storage, dimensionality reduction).
+    `num_threads` must match any Embedder the caller already holds for
+    the same model, or the registry loads a second copy (ONNX keys on it).
     """
 
     # -----------------------------
@@ -40,8 +60,23 @@ def ingest_all(model_name: str) -> VectorStore:
     # -----------------------------
     # Build vector store
     # -----------------------------
-    embedder = Embedder(model_name=model_name)
-    vector_store = VectorStore(dim=embedder.embedding_dimension)
+    # Cached by (model, backend, chunk text): re-runs and chunking sweeps
+    # only encode chunks this model and backend have not embedded before
+    cache = None
+    if EMBEDDING_CACHE_PATH:
+        cache = EmbeddingCache(
+            EMBEDDING_CACHE_PATH,
+            max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+        )
+
+    embedder = Embedder(
+        model_name=model_name,
+        cache=cache,
+        backend=backend,
+        num_threads=num_threads,
+        workers=workers,
+    )
+    vector_store = VectorStore(dim=embedder.embedding_dimension, config=config)
 
     for file_path in CORPUS_DIR.glob("*.txt"):
         document_id = str(uuid.uuid4())
@@ -59,8 +94,12 @@ def ingest_all(model_name: str) -> VectorStore:
             overlap=overlap,
         )
 
-        vectors = embedder.embed_chunks(chunks)
-        vector_store.add(vectors, chunks)
+        offset = 0
+        for vectors in embedder.embed_iter([chunk.text for chunk in chunks]):
+            vector_store.add(vectors, chunks[offset:offset + len(vectors)])
+            offset += len(vectors)
+
+    embedder.close()
 
     print("\nIngestion complete.")
     print(f"Total vectors stored: {vector_store.size}")
@@ -0,0 +1,292 @@
+# evaluation/perf.py
+# Cost measurements for run_embedding_benchmark.py --perf
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from app.embedding.embedder import Embedder
+from app.models.document_models import DocumentChunk
+from app.processing.ingestion_service import ingest_document
+from app.retrieval.bm25_retriever import BM25Retriever
+from app.retrieval.dense_retriever import DenseRetriever
+from app.retrieval.hybrid_retriever import HybridRetriever
+from app.retrieval.reranker import CrossEncoderReranker
+from app.rag.pipeline import RAGPipeline
+from app.vector_store.index_factory import IndexConfig
+from app.vector_store.store import VectorStore
+
+from evaluation.ingest_corpus import CORPUS_DIR
+
+BATCH_SIZES = (1, 8, 32, 128)
+RETRIEVERS = ("dense", "bm25", "hybrid")
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process' resident set size."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def files_size(directory: str | Path, prefix: str) -> int:
+    return sum(f.stat().st_size for f in Path(directory).glob(f"{prefix}*") if f.is_file())
+
+
+class StageTimer:
+    """
+    Records wall time per named stage by wrapping methods of the objects
+    a pipeline is built from, so stages are measured in place without
+    changing the retrieval code.
+
+    Stages wrapped with `nested=True` run inside another timed stage
+    (e.g. the hybrid legs, concurrently, inside "retrieve"): they are
+    reported, but not subtracted when working out untimed overhead.
+    """
+
+    def __init__(self):
+        self.current: Dict[str, float] = defaultdict(float)
+        self.nested: set = set()
+
+    def wrap(self, obj, method: str, stage: str, nested: bool = False) -> None:
+        original = getattr(obj, method)
+        if nested:
+            self.nested.add(stage)
+
+        def timed(*args, **kwargs):
+            # A leg finishing after its query timed out must not count
+            # towards the next query
+            stages = self.current
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                stages[stage] += time.perf_counter() - start
+
+        setattr(obj, method, timed)
+
+    def untimed(self, stages: Dict[str, float], total: float) -> float:
+        """Part of `total` spent outside every top-level stage."""
+        return total - sum(
+            seconds for stage, seconds in stages.items() if stage not in self.nested
+        )
+
+    @contextmanager
+    def query(self) -> Iterator[Dict[str, float]]:
+        self.current = defaultdict(float)
+        yield self.current
+
+
+def load_corpus_chunks() -> List[DocumentChunk]:
+    chunks = []
+    for file_path in sorted(CORPUS_DIR.glob("*.txt")):
+        chunks.extend(
+            ingest_document(
+                path=file_path,
+                document_id=str(uuid.uuid4()),
+                source=file_path.name,
+            )
+        )
+    return chunks
+
+
+def measure_embedding(embedder: Embedder, texts: List[str]) -> Dict[str, float]:
+    """Encode throughput (texts/s) for each batch size, on up to 256 texts."""
+    sample = texts[:256]
+    embedder.embed_texts(sample[:8])  # first forward pass allocates
+
+    throughput = {}
+    for batch_size in BATCH_SIZES:
+        start = time.perf_counter()
+        for i in range(0, len(sample), batch_size):
+            embedder.embed_texts(sample[i:i + batch_size], batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        throughput[f"batch={batch_size}"] = round(len(sample) / elapsed, 1)
+    return throughput
+
+
+def measure_ingest(
+    embedder: Embedder,
+    config: IndexConfig | None = None,
+) -> tuple[VectorStore, BM25Retriever, Dict[str, float]]:
+    """
+    Chunk, embed and index the evaluation corpus, timing each step, then
+    save the index to measure its size on disk.
+    """
+    start = time.perf_counter()
+    chunks = load_corpus_chunks()
+    chunk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = embedder.embed_texts([chunk.text for chunk in chunks])
+    embed_seconds = time.perf_counter() - start
+
+    store = VectorStore(dim=embedder.embedding_dimension, config=config)
+    start = time.perf_counter()
+    store.add(vectors, chunks)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bm25 = BM25Retriever(store.chunks)
+    bm25_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.save(os.path.join(tmp, "faiss.index"), os.path.join(tmp, "chunks.bin"))
+        index_bytes = files_size(tmp, "faiss.index")
+        metadata_bytes = files_size(tmp, "chunks.bin")
+
+    total = chunk_seconds + embed_seconds + build_seconds
+    return store, bm25, {
+        "num_chunks": len(chunks),
+        "chunks_per_second": round(len(chunks) / total, 1),
+        "chunking_seconds": round(chunk_seconds, 3),
+        "embedding_seconds": round(embed_seconds, 3),
+        "index_build_seconds": round(build_seconds, 4),
+        "bm25_build_seconds": round(bm25_seconds, 4),
+        "index_size_bytes": index_bytes,
+        "metadata_size_bytes": metadata_bytes,
+    }
+
+
+def measure_queries(
+    pipeline: RAGPipeline,
+    timer: StageTimer,
+    queries: List[str],
+    k: int = 5,
+    repeats: int = 3,
+) -> Dict[str, Dict[str, float]]:
+    """Per-stage and end-to-end latency of retrieve_only over `queries`."""
+    pipeline.retrieve_only(queries[0], k=k)  # warm up
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(repeats):
+        for query in queries:
+            with timer.query() as stages:
+                start = time.perf_counter()
+                pipeline.retrieve_only(query, k=k)
+                total = time.perf_counter() - start
+
+            for stage, seconds in stages.items():
+                samples[stage].append(seconds)
+            samples["other"].append(timer.untimed(stages, total))
+            samples["total"].append(total)
+
+    return {stage: latency_summary(values) for stage, values in samples.items()}
+
+
+class _Instrumented:
+    """Per-pipeline proxy, so timing wrappers never leak onto shared objects."""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+def build_pipeline(
+    retriever_type: str,
+    embedder: Embedder,
+    store: VectorStore,
+    bm25: BM25Retriever,
+    reranker: CrossEncoderReranker | None,
+) -> tuple[RAGPipeline, StageTimer]:
+    """Pipeline for `retriever_type` with its stages instrumented."""
+    timer = StageTimer()
+    dense = DenseRetriever(_Instrumented(embedder), _Instrumented(store))
+    sparse = _Instrumented(bm25)
+
+    # The hybrid legs overlap, so only their wall clock ("retrieve") adds up
+    nested = retriever_type == "hybrid"
+    timer.wrap(dense.embedder, "embed_text", "embed", nested=nested)
+    timer.wrap(dense.vector_store, "search", "dense_search", nested=nested)
+    timer.wrap(sparse, "retrieve", "bm25", nested=nested)
+
+    if retriever_type == "dense":
+        retriever = dense
+    elif retriever_type == "bm25":
+        retriever = sparse
+    else:
+        retriever = HybridRetriever(dense, sparse)
+        timer.wrap(retriever, "retrieve", "retrieve")
+
+    if reranker is not None:
+        reranker = _Instrumented(reranker)
+        timer.wrap(reranker, "rerank", "rerank")
+
+    return RAGPipeline(retriever=retriever, llm_generator=None, reranker=reranker), timer
+
+
+def run_perf(
+    model_name: str,
+    queries: List[str],
+    backend: str = "torch",
+    threads: int = 0,
+    config: IndexConfig | None = None,
+    use_reranker: bool = False,
+    retrievers: tuple = RETRIEVERS,
+    k: int = 5,
+) -> Dict:
+    # Interpreter and imports, before any model is loaded
+    baseline_rss = peak_rss_mb()
+
+    # No embedding / query caches: every text and query is really encoded
+    embedder = Embedder(model_name, backend=backend, num_threads=threads, query_cache_size=0)
+
+    store, bm25, ingest = measure_ingest(embedder, config)
+    reranker = CrossEncoderReranker() if use_reranker else None
+
+    report = {
+        "model_name": model_name,
+        "backend": backend,
+        "embedding_dimension": embedder.embedding_dimension,
+        "index_config": store.config.to_dict(),
+        "ingest": ingest,
+        "embedding_throughput_texts_per_second": measure_embedding(
+            embedder, [chunk.text for chunk in store.chunks]
+        ),
+        "query_latency": {},
+    }
+
+    for retriever_type in retrievers:
+        pipeline, timer = build_pipeline(retriever_type, embedder, store, bm25, reranker)
+        report["query_latency"][retriever_type] = measure_queries(pipeline, timer, queries, k=k)
+
+    # High-water mark of this process; run_perf_isolated gives each model
+    # its own process, so it only covers this model
+    report["baseline_rss_mb"] = round(baseline_rss, 1)
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return report
+
+
+def run_perf_isolated(model_name: str, queries: List[str], **kwargs) -> Dict:
+    """
+    `run_perf` in a fresh spawned process. ru_maxrss never goes down, so
+    measuring several models in one process would report the largest
+    peak so far for every model after the first.
+    """
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        return executor.submit(run_perf, model_name, queries, **kwargs).result()
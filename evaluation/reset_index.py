@@ -1,8 +1,13 @@
+import shutil
 from pathlib import Path
 
+# Snapshot files plus their shard / full-precision vector siblings
 paths = [
     Path("data/faiss.index"),
+    Path("data/chunks.bin"),
     Path("data/metadata.pkl"),
+    *Path("data").glob("faiss.index.*"),
+    *Path("data").glob("chunks.bin.*"),
 ]
 
 for p in paths:
@@ -11,3 +16,8 @@ for p in paths:
         print(f"Deleted {p}")
     else:
         print(f"{p} does not exist")
+
+segments_dir = Path("data/segments")
+if segments_dir.exists():
+    shutil.rmtree(segments_dir)
+    print(f"Deleted {segments_dir}")
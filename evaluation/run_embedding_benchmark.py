@@ -1,18 +1,25 @@
 # evaluation/run_embedding_benchmark.py
 import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
 
 from evaluation.embedding_models import EMBEDDING_MODELS
 from evaluation.run_retrieval_eval import evaluate, load_questions
 from evaluation.ingest_corpus import ingest_all
 
-from app.embedding.embedder import Embedder
+from app.embedding.embedder import BACKENDS, Embedder
 from app.retrieval.dense_retriever import DenseRetriever
 from app.retrieval.bm25_retriever import BM25Retriever
 from app.retrieval.hybrid_retriever import HybridRetriever
 from app.rag.pipeline import RAGPipeline
 from app.retrieval.reranker import CrossEncoderReranker
+from app.vector_store.index_factory import REDUCTIONS, IndexConfig
 
 from evaluation.metrics import mean_reciprocal_rank, top1_accuracy
+from evaluation.perf import RETRIEVERS, run_perf_isolated
 
 
 def summarize(eval_output):
@@ -27,6 +34,40 @@ def summarize(eval_output):
     }
 
 
+def compare_backends(model_name, texts, threads=0, repeats=3):
+    """
+    Encode `texts` with every inference backend; report throughput,
+    speedup over torch and agreement with the torch embeddings.
+    """
+    report = {}
+    reference = None
+
+    for backend in BACKENDS:
+        embedder = Embedder(model_name, backend=backend, num_threads=threads)
+        embedder.embed_texts(texts[:32])  # warm up
+
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            vectors = embedder.embed_texts(texts)
+            best = min(best, time.perf_counter() - start)
+
+        if reference is None:
+            reference = vectors
+        # Both sides are L2-normalized
+        cosine = np.sum(vectors * reference, axis=1)
+
+        report[backend] = {
+            "texts/s": round(len(texts) / best, 1),
+            "speedup": round(report["torch"]["seconds"] / best, 2) if report else 1.0,
+            "seconds": round(best, 3),
+            "min_cosine_vs_torch": round(float(cosine.min()), 5),
+            "max_abs_diff_vs_torch": float(np.abs(vectors - reference).max()),
+        }
+
+    return report
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Embedding retrieval benchmark")
 
@@ -43,8 +84,117 @@ if __name__ == "__main__":
         help="Retriever type to use",
     )
 
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="torch",
+        help="Embedding inference backend",
+    )
+
+    parser.add_argument(
+        "--compare-backends",
+        action="store_true",
+        help="Only benchmark torch vs ONNX vs ONNX int8 encoding of the corpus",
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="ONNX Runtime intra-op threads (0 = runtime default)",
+    )
+
+    parser.add_argument(
+        "--reduction",
+        choices=REDUCTIONS,
+        default="none",
+        help="Reduce embeddings before indexing (PCA or Matryoshka truncation)",
+    )
+
+    parser.add_argument(
+        "--reduced-dim",
+        type=int,
+        default=256,
+        help="Target dimension for --reduction pca / truncate",
+    )
+
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="Measure cost instead of quality: throughput, latency, index size, memory",
+    )
+
+    parser.add_argument(
+        "--output",
+        default="evaluation/results/perf.json",
+        help="Where --perf writes its JSON report",
+    )
+
     args = parser.parse_args()
 
+    if args.compare_backends:
+        for name, model_name in EMBEDDING_MODELS.items():
+            print(f"\n=== Backend comparison: {name} ===")
+            store = ingest_all(model_name, num_threads=args.threads)
+            texts = [chunk.text for chunk in store.chunks]
+            for backend, stats in compare_backends(model_name, texts, args.threads).items():
+                print(f"  {backend:10s}", stats)
+        raise SystemExit(0)
+
+    if args.perf:
+        questions = [
+            q["question"]
+            for path in (
+                "evaluation/questions_single.json",
+                "evaluation/questions_cross.json",
+                "evaluation/questions_adversarial.json",
+                "evaluation/questions_noisy.json",
+            )
+            for q in load_questions(path)
+        ]
+        config = IndexConfig(
+            reduction=args.reduction,
+            reduced_dim=args.reduced_dim if args.reduction != "none" else 0,
+        )
+
+        report = {
+            "settings": {
+                "backend": args.backend,
+                "threads": args.threads,
+                "reranker": args.reranker,
+                "num_queries": len(questions),
+            },
+            "notes": {
+                "peak_rss_mb": (
+                    "Each model is measured in its own process; baseline_rss_mb "
+                    "is that process' peak before the model was loaded"
+                ),
+                "query_latency": (
+                    "Hybrid legs run concurrently: embed / dense_search / bm25 "
+                    "overlap inside 'retrieve' and are not part of 'other'"
+                ),
+            },
+            "models": {},
+        }
+        for name, model_name in EMBEDDING_MODELS.items():
+            print(f"\n=== Measuring cost: {name} ===")
+            report["models"][name] = run_perf_isolated(
+                model_name,
+                questions,
+                backend=args.backend,
+                threads=args.threads,
+                config=config,
+                use_reranker=args.reranker,
+                retrievers=RETRIEVERS,
+            )
+            print(json.dumps(report["models"][name], indent=2))
+
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nWrote {output}")
+        raise SystemExit(0)
+
     USE_RERANKER = args.reranker
     RETRIEVER_TYPE = args.retriever
 
@@ -58,16 +208,29 @@ if __name__ == "__main__":
 
     for name, model_name in EMBEDDING_MODELS.items():
         print(f"\n=== Evaluating embedding model: {name} ===")
-        print(f"Retriever: {RETRIEVER_TYPE}")
+        print(f"Retriever: {RETRIEVER_TYPE}, backend: {args.backend}")
+        if args.reduction != "none":
+            print(f"Reduction: {args.reduction} to {args.reduced_dim} dims")
 
-        vector_store = ingest_all(model_name)
+        # Created first so ingest_all reuses the loaded model from the registry
+        embedder = Embedder(model_name, backend=args.backend, num_threads=args.threads)
+        config = IndexConfig(
+            reduction=args.reduction,
+            reduced_dim=args.reduced_dim if args.reduction != "none" else 0,
+        )
+        vector_store = ingest_all(
+            model_name,
+            backend=args.backend,
+            config=config,
+            num_threads=args.threads,
+        )
 
         # ----------------------------
         # Retriever selection
         # ----------------------------
         if RETRIEVER_TYPE == "dense":
             retriever = DenseRetriever(
-                Embedder(model_name),
+                embedder,
                 vector_store,
             )
 
@@ -76,7 +239,7 @@ if __name__ == "__main__":
 
         elif RETRIEVER_TYPE == "hybrid":
             dense = DenseRetriever(
-                Embedder(model_name),
+                embedder,
                 vector_store,
             )
             bm25 = BM25Retriever(vector_store.chunks)
@@ -106,6 +269,8 @@ if __name__ == "__main__":
     print("\n=== FINAL SUMMARY ===")
     print(f"Retriever enabled: {RETRIEVER_TYPE}")
     print(f"Reranker enabled : {USE_RERANKER}")
+    print(f"Reduction        : {args.reduction}"
+          + (f" ({args.reduced_dim} dims)" if args.reduction != "none" else ""))
 
     for model, ks in results.items():
         print(f"\nModel: {model}")
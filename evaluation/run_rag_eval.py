@@ -62,6 +62,9 @@ if __name__ == "__main__":
     single = load_questions("evaluation/questions_single.json")
     cross = load_questions("evaluation/questions_cross.json")
 
+    # Created first so ingest_all reuses the loaded model from the registry
+    embedder = Embedder("sentence-transformers/all-MiniLM-L6-v2")
+
     # Ingest corpus (dense embeddings still needed for hybrid)
     vector_store = ingest_all("sentence-transformers/all-MiniLM-L6-v2")
 
@@ -70,7 +73,7 @@ if __name__ == "__main__":
     # ----------------------------
     if RETRIEVER_TYPE == "dense":
         retriever = DenseRetriever(
-            Embedder("sentence-transformers/all-MiniLM-L6-v2"),
+            embedder,
             vector_store,
         )
 
@@ -79,7 +82,7 @@ if __name__ == "__main__":
 
     elif RETRIEVER_TYPE == "hybrid":
         dense = DenseRetriever(
-            Embedder("sentence-transformers/all-MiniLM-L6-v2"),
+            embedder,
             vector_store,
         )
         bm25 = BM25Retriever(vector_store.chunks)
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import dependencies, warmup
+
+
+def test_importing_app_defers_heavy_libraries():
+    code = (
+        "import sys, app.main\n"
+        "loaded = [m for m in ('torch', 'sentence_transformers') if m in sys.modules]\n"
+        "faiss = sys.modules.get('faiss')\n"
+        "if faiss is not None and type(faiss).__name__ != '_LazyModule':\n"
+        "    loaded.append('faiss')\n"
+        "print(','.join(loaded))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+class _Model:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls += 1
+        return np.zeros(4) if isinstance(texts, str) else np.zeros((len(texts), 4))
+
+
+class _Embedder:
+    def __init__(self):
+        self.model = _Model()
+
+
+class _Store:
+    def __init__(self):
+        self.searched = False
+
+    def warmup(self):
+        pass
+
+    def search(self, query, k=5):
+        self.searched = True
+        return []
+
+
+def test_readiness_flips_after_warmup(monkeypatch):
+    embedder, store = _Embedder(), _Store()
+    monkeypatch.setattr(dependencies, "get_embedder", lambda: embedder)
+    monkeypatch.setattr(dependencies, "get_query_embedder", lambda: embedder)
+    monkeypatch.setattr(dependencies, "get_vector_store", lambda: store)
+    monkeypatch.setattr(dependencies, "get_reranker", lambda: None)
+    monkeypatch.setattr(dependencies, "get_rag_pipeline", lambda: None)
+    monkeypatch.setattr(warmup, "_state", {
+        "status": "not_started", "components": {}, "error": None, "seconds": None,
+    })
+
+    from app.main import app
+    client = TestClient(app)
+
+    assert client.get("/health/ready").status_code == 503
+
+    warmup.run_warmup()
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert set(response.json()["components"]) == {"embedder", "vector_store"}
+    assert embedder.model.calls > 0 and store.searched
+
+
+def test_readiness_reports_lazy_when_warmup_is_disabled(monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {
+        "status": "not_started", "components": {}, "error": None, "seconds": None,
+    })
+
+    import app.main
+    monkeypatch.setattr(app.main, "WARMUP_ON_STARTUP", False)
+    monkeypatch.setattr(app.main, "start_warmup", lambda: pytest.fail("warmup started"))
+
+    with TestClient(app.main.app) as client:
+        response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "lazy"
@@ -0,0 +1,190 @@
+import numpy as np
+import pytest
+
+from app.models.document_models import DocumentChunk, DocumentMetadata
+from app.retrieval.analyzer import Analyzer
+from app.retrieval.bm25_index import BM25Index
+from app.retrieval.bm25_retriever import BM25Retriever
+
+
+def _random_corpus(n_docs=300, vocab=60, seed=0):
+    rng = np.random.default_rng(seed)
+    # Zipf-like term distribution: a few terms appear in most documents
+    weights = 1 / np.arange(1, vocab + 1)
+    weights /= weights.sum()
+    return [
+        [f"t{t}" for t in rng.choice(vocab, size=rng.integers(0, 40), p=weights)]
+        for _ in range(n_docs)
+    ]
+
+
+def test_scores_match_rank_bm25():
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    corpus = _random_corpus()
+    reference = rank_bm25.BM25Okapi(corpus)
+    index = BM25Index.build(corpus)
+
+    for query in (["t0"], ["t3", "t17"], ["t5", "t5", "t40"], ["t1", "missing"]):
+        expected = reference.get_scores(query)
+        docs, scores = index.score(query)
+
+        full = np.zeros(len(corpus))
+        full[docs] = scores
+        np.testing.assert_allclose(full, expected, rtol=1e-6, atol=1e-9)
+
+        top_docs, top_scores = index.search(query, k=10)
+        nonzero = np.flatnonzero(expected)
+        ranked = nonzero[np.lexsort((nonzero, -expected[nonzero]))][:10]
+        assert list(top_docs) == list(ranked)
+        np.testing.assert_allclose(top_scores, expected[ranked], rtol=1e-6)
+
+
+def test_unknown_terms_and_small_k():
+    index = BM25Index.build([["a", "b"], ["b", "c"], []])
+
+    assert len(index.search(["zzz"], k=5)[0]) == 0
+    assert len(index.search(["b"], k=0)[0]) == 0
+    assert list(index.search(["b", "c"], k=1)[0]) == [1]
+
+
+def test_block_max_matches_exhaustive():
+    corpus = _random_corpus(n_docs=3000, vocab=400, seed=1)
+    index = BM25Index.build(corpus, block_size=16)
+    rng = np.random.default_rng(2)
+
+    queries = [[f"t{t}" for t in rng.choice(400, size=rng.integers(1, 8))] for _ in range(50)]
+    queries += [["t0", "t1", "t2"], ["t0", "t0", "t399"], ["t0", "missing"]]
+    accept = lambda docs: docs % 3 != 0
+
+    for query in queries:
+        for k in (1, 10, 100):
+            for kwargs in ({}, {"accept": accept}):
+                expected = index.search(query, k, mode="exhaustive", **kwargs)
+                docs, scores = index.search(query, k, mode="block_max", **kwargs)
+                assert list(docs) == list(expected[0])
+                np.testing.assert_allclose(scores, expected[1], rtol=1e-12)
+
+
+def test_incremental_updates_match_rebuild(tmp_path):
+    corpus = _random_corpus(n_docs=400, seed=3)
+    index = BM25Index.build(corpus[:100], delta_limit=2000)
+    index.add(corpus[100:250])  # merged: larger than the main segment
+    index.add(corpus[250:300])
+    index.add(corpus[300:])
+    assert len(index.delta_doc_ids) > 0
+
+    full = BM25Index.build(corpus)
+    queries = (["t0", "t3"], ["t5", "t1", "t44"], ["t2"], ["t7", "t30", "t30"])
+
+    def same_results(index, reference, ids, accept=None):
+        for query in queries:
+            for mode in ("exhaustive", "block_max"):
+                docs, scores = index.search(query, 20, mode=mode)
+                expected_docs, expected_scores = reference.search(query, 20, accept=accept)
+                assert list(docs) == list(ids[expected_docs])
+                np.testing.assert_allclose(scores, expected_scores, rtol=1e-9)
+
+    # Delta postings are searched along with the main ones
+    same_results(index, full, np.arange(len(corpus)))
+
+    index.merge()
+    for name in ("indptr", "doc_ids", "tfs", "df", "idf", "block_max"):
+        np.testing.assert_array_equal(getattr(index, name), getattr(full, name))
+
+    # Tombstoned documents stop matching but stay in the statistics
+    keep = np.ones(len(corpus), dtype=bool)
+    keep[::7] = False
+    assert index.delete(np.flatnonzero(~keep)) == (~keep).sum()
+    index.add(corpus[:30])
+    keep = np.concatenate([keep, np.ones(30, dtype=bool)])
+    everything = BM25Index.build(corpus + corpus[:30])
+    same_results(index, everything, np.arange(len(keep)), accept=lambda docs: keep[docs])
+
+    # Saving drops tombstoned documents and renumbers the rest
+    index.save(str(tmp_path / "bm25"), keep)
+    loaded = BM25Index()
+    loaded.load(str(tmp_path / "bm25"))
+    assert loaded.num_docs == loaded.num_live == keep.sum()
+    rebuilt = BM25Index.build(
+        [doc for doc, kept in zip(corpus + corpus[:30], keep) if kept]
+    )
+    same_results(loaded, rebuilt, np.arange(keep.sum()))
+
+
+def test_bounds_stay_valid_as_documents_grow():
+    # Short documents first, then long ones: the average length doubles
+    # after the bounds were computed
+    short = _random_corpus(n_docs=500, seed=5)
+    index = BM25Index.build(short, block_size=8, delta_limit=10 ** 6)
+    rng = np.random.default_rng(6)
+    index.add([doc * 3 for doc in _random_corpus(n_docs=400, seed=7)])
+    assert index.avgdl > 1.5 * index.bound_avgdl
+
+    for _ in range(30):
+        query = [f"t{t}" for t in rng.choice(60, size=rng.integers(2, 6))]
+        expected = index.search(query, 10, mode="exhaustive")
+        docs, scores = index.search(query, 10, mode="block_max")
+        assert list(docs) == list(expected[0])
+        np.testing.assert_allclose(scores, expected[1], rtol=1e-12)
+
+
+def test_build_texts_matches_token_lists():
+    corpus = _random_corpus(n_docs=500, seed=4)
+    texts = [" ".join(doc).upper() + "!" for doc in corpus]
+
+    index = BM25Index()
+    index.add_texts(texts, batch_size=64)
+    index.merge()
+    full = BM25Index.build(corpus)
+    assert index.vocab == full.vocab
+    for name in ("indptr", "doc_ids", "tfs", "doc_len", "df", "idf"):
+        np.testing.assert_array_equal(getattr(index, name), getattr(full, name))
+
+
+def test_analyzer_stopwords_and_stemming(tmp_path):
+    pytest.importorskip("snowballstemmer")
+    analyzer = Analyzer(stopwords=True, stemmer="english")
+    assert analyzer.analyze("The runner is Running to the races") == [
+        "runner", "run", "race"
+    ]
+
+    index = BM25Index.build_texts(
+        ["Cats running fast", "a cat ran", "the dogs", "dog-runs", "birds"],
+        analyzer=analyzer,
+    )
+    assert set(index.vocab) == {"cat", "run", "fast", "ran", "dog", "bird"}
+    assert list(index.doc_len) == [3, 2, 1, 2, 1]
+    assert list(index.search(analyzer.analyze("the cat"), k=5)[0]) == [1, 0]
+
+    index.save(str(tmp_path / "bm25"))
+    loaded = BM25Index()
+    loaded.load(str(tmp_path / "bm25"))
+    assert loaded.analyzer == analyzer
+    loaded.add_texts(["Running cats"])
+    assert sorted(loaded.search(loaded.analyzer.analyze("runs"), k=5)[0]) == [0, 3, 5]
+
+
+def _chunk(i, text, source):
+    return DocumentChunk(
+        chunk_id=str(i),
+        document_id=source,
+        chunk_index=i,
+        text=text,
+        metadata=DocumentMetadata(document_id=source, source=f"{source}.txt"),
+    )
+
+
+def test_retriever_returns_matching_chunks_with_filters():
+    chunks = [
+        _chunk(0, "Aspirin reduces pain.", "a"),
+        _chunk(1, "Ibuprofen reduces pain and fever.", "b"),
+        _chunk(2, "The weather is nice.", "b"),
+    ]
+    retriever = BM25Retriever(chunks)
+
+    results = retriever.retrieve("pain relief", k=5)
+    assert {c.chunk_id for _, c in results} == {"0", "1"}
+    assert results[0][0] >= results[1][0]
+
+    filtered = retriever.retrieve("pain", k=5, filters={"document_id": "b"})
+    assert [c.chunk_id for _, c in filtered] == ["1"]
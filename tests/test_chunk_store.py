@@ -0,0 +1,44 @@
+from app.vector_store.chunk_store import ChunkStore
+from app.models.document_models import DocumentChunk, DocumentMetadata
+
+
+def _chunk(i, page=None):
+    metadata = DocumentMetadata(
+        document_id="doc1",
+        source="test.pdf",
+        page=page,
+        extra={"lang": "en"},
+    )
+    return DocumentChunk(
+        chunk_id=f"c{i}",
+        document_id="doc1",
+        chunk_index=i,
+        text=f"chunk {i} – ünïcode",
+        metadata=metadata,
+    )
+
+
+def test_chunk_store_save_load_and_append(tmp_path):
+    path = str(tmp_path / "chunks.bin")
+
+    store = ChunkStore()
+    store.extend([_chunk(0, page=1), _chunk(1)])
+    store.save(path, attrs={"version": 1})
+
+    loaded = ChunkStore()
+    attrs = loaded.load(path)
+
+    assert attrs == {"version": 1}
+    assert len(loaded) == 2
+    assert loaded[0] == _chunk(0, page=1)
+    assert loaded[1].metadata.page is None
+
+    # Appends after load are folded into the file on the next save
+    loaded.extend([_chunk(2, page=3)])
+    loaded.save(path)
+
+    reloaded = ChunkStore()
+    reloaded.load(path)
+
+    assert [c.chunk_id for c in reloaded] == ["c0", "c1", "c2"]
+    assert reloaded[-1] == _chunk(2, page=3)
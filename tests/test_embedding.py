@@ -1,3 +1,5 @@
+import pytest
+import numpy as np
 from app.embedding.embedder import Embedder
 from app.models.document_models import DocumentChunk, DocumentMetadata
 
@@ -27,3 +29,50 @@ def test_embed_chunks():
 
     vecs = embedder.embed_chunks([chunk])
     assert vecs.shape[0] == 1
+
+
+def test_embed_iter_streams_blocks_in_input_order():
+    embedder = Embedder()
+    texts = ["short", "a much longer sentence about retrieval", "mid length text",
+             "x", "another fairly long sentence for padding", "two words", "end"]
+
+    blocks = list(embedder.embed_iter(texts, batch_size=2, window_batches=2))
+
+    assert [len(b) for b in blocks] == [4, 3]
+    np.testing.assert_allclose(
+        np.concatenate(blocks), embedder.embed_texts(texts), atol=1e-5
+    )
+
+
+def test_onnx_backends_match_torch(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnxscript")
+    monkeypatch.chdir(tmp_path)  # exports go under ./data/onnx
+
+    texts = ["hello world", "a much longer sentence about retrieval " * 4, "x"]
+    reference = Embedder(query_cache_size=0).embed_texts(texts)
+
+    onnx = Embedder(backend="onnx")
+    assert onnx.cache_namespace.endswith("#onnx")
+    np.testing.assert_allclose(onnx.embed_texts(texts), reference, atol=1e-4)
+
+    quantized = Embedder(backend="onnx-int8")
+    assert quantized.cache_namespace.endswith("#onnx-int8")
+    assert np.sum(quantized.embed_texts(texts) * reference, axis=1).min() > 0.98
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        Embedder(backend="tensorrt")
+
+
+def test_worker_pool_matches_in_process():
+    texts = [f"chunk {i} " * (i % 7 + 1) for i in range(40)]
+    reference = Embedder().embed_texts(texts)
+
+    pooled = Embedder(workers=2, num_threads=1)
+    try:
+        assert pooled.embedding_dimension == reference.shape[1]
+        np.testing.assert_allclose(pooled.embed_texts(texts), reference, atol=1e-5)
+    finally:
+        pooled.close()
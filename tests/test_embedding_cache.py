@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.embedding.cache import EmbeddingCache, QueryCache, cache_key
+
+
+def test_cache_key_normalizes_text_and_separates_models():
+    assert cache_key("m", "hello   world\n") == cache_key("m", "hello world")
+    assert cache_key("m", "hello") != cache_key("other", "hello")
+
+
+def test_embedding_cache_roundtrip_and_lru_eviction(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    vectors = np.eye(4, dtype="float32")
+
+    # Room for three 16-byte vectors
+    cache = EmbeddingCache(path, max_bytes=48)
+    cache.put_many("m", ["a", "b", "c"], vectors[:3])
+
+    hits = cache.get_many("m", ["a", "x", "c", "a"])
+    assert sorted(hits) == [0, 2, 3]
+    np.testing.assert_array_equal(hits[2], vectors[2])
+    assert cache.get_many("other", ["a"]) == {}
+
+    # "b" is least recently used after the lookup above
+    cache.put_many("m", ["d"], vectors[3:])
+    assert len(cache) == 3
+    assert cache.total_bytes <= 48
+    assert sorted(cache.get_many("m", ["a", "b", "c", "d"])) == [0, 2, 3]
+    cache.close()
+
+    # Persists across instances
+    reopened = EmbeddingCache(path, max_bytes=48)
+    assert len(reopened.get_many("m", ["a", "c", "d"])) == 3
+
+
+def test_query_cache_lru_and_counters():
+    cache = QueryCache(max_entries=2)
+
+    assert cache.get("m", "what is rag?") is None
+    cache.put("m", "what is rag?", np.ones(3))
+    cache.put("m", "second", np.zeros(3))
+
+    hit = cache.get("m", "  what is   rag? ")
+    assert hit is not None and not hit.flags.writeable
+    assert cache.get("other", "what is rag?") is None
+
+    # "second" is least recently used
+    cache.put("m", "third", np.zeros(3))
+    assert cache.get("m", "second") is None
+    assert cache.stats() == {
+        "size": 2,
+        "capacity": 2,
+        "hits": 1,
+        "misses": 3,
+        "evictions": 1,
+    }
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from app.models.document_models import DocumentChunk, DocumentMetadata
+from app.retrieval.hybrid_retriever import HybridRetriever
+
+
+def _chunk(i):
+    return DocumentChunk(
+        chunk_id=str(i),
+        document_id="doc",
+        chunk_index=i,
+        text=f"chunk {i}",
+        metadata=DocumentMetadata(document_id="doc", source="doc.txt"),
+    )
+
+
+class _FixedRetriever:
+    """Returns the first k of a fixed ranking, optionally after a delay."""
+
+    def __init__(self, ids, delay=0.0, barrier=None):
+        self.ids = ids
+        self.delay = delay
+        self.barrier = barrier
+        self.calls = []
+
+    def retrieve(self, query, k=5, filters=None):
+        self.calls.append(k)
+        if self.barrier is not None:
+            # Only passes when both legs are running at the same time
+            self.barrier.wait(timeout=5)
+        time.sleep(self.delay)
+        return [(1.0, _chunk(i)) for i in self.ids[:k]]
+
+
+def test_legs_run_concurrently_with_their_own_depths():
+    barrier = threading.Barrier(2)
+    dense = _FixedRetriever([1, 2, 3, 4], barrier=barrier)
+    bm25 = _FixedRetriever([3, 5, 1, 6], barrier=barrier)
+    retriever = HybridRetriever(dense, bm25, dense_k=4, bm25_k=2)
+
+    results = retriever.retrieve("q", k=3)
+
+    assert (dense.calls, bm25.calls) == ([4], [2])
+    # 3 is found by both legs; BM25's 1 is past its depth
+    assert [c.chunk_id for _, c in results] == ["3", "1", "2"]
+
+
+def test_slow_leg_is_left_out_after_its_timeout():
+    dense = _FixedRetriever([1, 2], delay=1.0)
+    bm25 = _FixedRetriever([3, 4])
+    retriever = HybridRetriever(dense, bm25, dense_timeout_ms=100)
+
+    start = time.perf_counter()
+    results = retriever.retrieve("q", k=5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8
+    assert [c.chunk_id for _, c in results] == ["3", "4"]
+
+
+def test_retrievers_share_one_bounded_pool():
+    first = HybridRetriever(_FixedRetriever([1]), _FixedRetriever([2]))
+    second = HybridRetriever(_FixedRetriever([3]), _FixedRetriever([4]))
+
+    assert first._pool is second._pool
+    assert first._pool._max_workers == 32
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from app.core.model_registry import ModelRegistry
+
+
+class _Model:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_acquire_loads_once_and_shares():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return _Model()
+
+    a = registry.acquire("m", loader)
+    b = registry.acquire("m", loader)
+
+    assert a is b
+    assert len(loads) == 1
+    assert registry.refcount("m") == 2
+
+
+def test_last_release_evicts_and_closes():
+    registry = ModelRegistry()
+    model = registry.acquire("m", _Model)
+    registry.acquire("m", _Model)
+
+    registry.release("m")
+    assert "m" in registry and not model.closed
+
+    registry.release("m")
+    assert "m" not in registry and model.closed
+
+    # Reloaded on next use
+    assert registry.acquire("m", _Model) is not model
+
+
+def test_concurrent_acquire_waits_for_single_load():
+    registry = ModelRegistry()
+    started = threading.Event()
+    proceed = threading.Event()
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        started.set()
+        proceed.wait()
+        return _Model()
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(registry.acquire("m", slow_loader)))
+    first.start()
+    started.wait()
+
+    second = threading.Thread(target=lambda: results.append(registry.acquire("m", slow_loader)))
+    second.start()
+    proceed.set()
+    first.join()
+    second.join()
+
+    assert len(loads) == 1
+    assert results[0] is results[1]
+
+
+def test_failed_load_is_not_cached():
+    registry = ModelRegistry()
+
+    def broken():
+        raise RuntimeError("no weights")
+
+    with pytest.raises(RuntimeError):
+        registry.acquire("m", broken)
+
+    assert "m" not in registry
+    assert isinstance(registry.acquire("m", _Model), _Model)
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import numpy as np
+
+from app.embedding.batcher import QueryBatcher
+from app.embedding.cache import QueryCache
+
+
+class _CountingEmbedder:
+    """Minimal stand-in exposing the Embedder surface QueryBatcher uses."""
+
+    model_name = "test-model"
+    cache_namespace = model_name
+    embedding_dimension = 2
+
+    def __init__(self):
+        self.query_cache = QueryCache(16)
+        self.batches = []
+
+    def embed_queries(self, texts, check_cache=True):
+        self.batches.append(list(texts))
+        vectors = [np.array([len(t), 1.0], dtype="float32") for t in texts]
+        return [self.query_cache.put(self.model_name, t, v) for t, v in zip(texts, vectors)]
+
+
+def test_query_batcher_groups_concurrent_queries():
+    embedder = _CountingEmbedder()
+    batcher = QueryBatcher(embedder, max_batch=8, max_wait_ms=50)
+
+    texts = [f"query {'x' * i}" for i in range(6)]
+    results = {}
+    start = threading.Barrier(len(texts))
+
+    def call(text):
+        start.wait()
+        results[text] = batcher.embed_text(text)
+
+    threads = [threading.Thread(target=call, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(embedder.batches) < len(texts)
+    for text in texts:
+        assert results[text][0] == len(text)
+
+    # Cached queries are answered without another model call
+    batches = len(embedder.batches)
+    assert batcher.embed_text(texts[0])[0] == len(texts[0])
+    assert len(embedder.batches) == batches
+    batcher.close()
+
+
+def test_query_batcher_sends_a_lone_query_without_waiting():
+    embedder = _CountingEmbedder()
+    batcher = QueryBatcher(embedder, max_batch=8, max_wait_ms=2000)
+
+    started = time.monotonic()
+    assert batcher.embed_text("alone")[0] == len("alone")
+    assert time.monotonic() - started < 1.0
+    assert embedder.batches == [["alone"]]
+    batcher.close()
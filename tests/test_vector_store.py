@@ -1,8 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import faiss
+import pytest
 import numpy as np
 from app.vector_store.store import VectorStore
+from app.vector_store.index_factory import IndexConfig
+from app.vector_store.sharded import ShardedVectorStore
+from app.vector_store.snapshot import read_manifest
 from app.models.document_models import DocumentChunk, DocumentMetadata
 
 
+def _vectors(n, dim, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+
+
+def _chunks(document_id, n=None, texts=None):
+    """
+    Chunks "<document_id>-<i>" of one document (source
+    "<document_id>.txt"), with `texts` or `n` placeholder texts.
+    """
+    if texts is None:
+        texts = [f"{document_id} chunk {i}" for i in range(n)]
+    return [
+        DocumentChunk(
+            chunk_id=f"{document_id}-{i}",
+            document_id=document_id,
+            chunk_index=i,
+            text=text,
+            metadata=DocumentMetadata(document_id=document_id, source=f"{document_id}.txt"),
+        )
+        for i, text in enumerate(texts)
+    ]
+
+
+def _corpus(num_docs, per_doc):
+    """Documents doc0, doc1, ... of `per_doc` chunks each."""
+    return [c for d in range(num_docs) for c in _chunks(f"doc{d}", per_doc)]
+
+
+def _paths(tmp_path):
+    """Index, metadata and segment-log paths for open()."""
+    return (
+        str(tmp_path / "faiss.index"),
+        str(tmp_path / "chunks.bin"),
+        str(tmp_path / "segments"),
+    )
+
+
 def test_vector_store_add_and_search():
     store = VectorStore(dim=3)
 
@@ -23,3 +67,579 @@ def test_vector_store_add_and_search():
 
     assert len(results) == 1
     assert results[0][1].text == "hello"
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat", "ivf_pq"])
+def test_vector_store_index_types_roundtrip(tmp_path, index_type):
+    vectors = _vectors(300, 8)
+
+    config = IndexConfig(index_type=index_type, nlist=8, pq_m=4, nprobe=8, train_size=300)
+    store = VectorStore(dim=8, config=config)
+    store.add(vectors, _chunks("doc", 300))
+
+    results = store.search(vectors[42], k=3)
+    assert results[0][1].chunk_id == "doc-42"
+
+    store.save(str(tmp_path / "faiss.index"), str(tmp_path / "meta.pkl"))
+
+    loaded = VectorStore(dim=8)
+    loaded.load(str(tmp_path / "faiss.index"), str(tmp_path / "meta.pkl"))
+
+    assert loaded.config.index_type == index_type
+    assert loaded.size == 300
+    assert loaded.search(vectors[42], k=1)[0][1].chunk_id == "doc-42"
+
+
+def test_vector_store_search_batch():
+    vectors = np.eye(4, dtype="float32")
+    store = VectorStore(dim=4)
+    store.add(vectors, _chunks("doc", 4))
+
+    batch = store.search_batch(vectors[[2, 0]], k=2)
+
+    assert len(batch) == 2
+    assert batch[0][0][1].chunk_id == "doc-2"
+    assert batch[1][0][1].chunk_id == "doc-0"
+    assert batch[0] == store.search(vectors[2], k=2)
+
+
+def test_vector_store_segment_log_and_compaction(tmp_path):
+    paths = _paths(tmp_path)
+    vectors = np.eye(6, dtype="float32")
+    chunks = _chunks("doc", 6)
+
+    store = VectorStore(dim=6, compact_after=2)
+    store.open(*paths)
+    store.add(vectors[:3], chunks[:3])
+    store.flush()
+    store.add(vectors[3:], chunks[3:])
+    store.flush()
+
+    assert store.needs_compaction
+    assert not (tmp_path / "faiss.index").exists()
+
+    # Replay from segments only
+    replayed = VectorStore(dim=6)
+    replayed.open(*paths)
+    assert replayed.size == 6
+    assert replayed.search(vectors[4], k=1)[0][1].chunk_id == "doc-4"
+
+    store.compact()
+    assert not store.needs_compaction
+    assert list((tmp_path / "segments").iterdir()) == []
+
+    compacted = VectorStore(dim=6)
+    compacted.open(*paths)
+    assert compacted.size == 6
+    assert [c.chunk_id for c in compacted.chunks] == [c.chunk_id for c in chunks]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_vector_store_delete_replace_and_compact(tmp_path, index_type):
+    paths = _paths(tmp_path)
+    vectors = np.eye(6, dtype="float32")
+
+    store = VectorStore(dim=6, config=IndexConfig(index_type=index_type))
+    store.open(*paths)
+    store.add(vectors[:3], _chunks("a", 3))
+    store.add(vectors[3:], _chunks("b", 3))
+    store.flush()
+
+    assert store.delete_document("a") == 3
+    assert store.size == 3
+    assert all(c.document_id == "b" for _, c in store.search(vectors[0], k=6))
+    assert [c.document_id for c in store.chunks] == ["b"] * 3
+
+    # Tombstones survive a restart via the log
+    reopened = VectorStore(dim=6)
+    reopened.open(*paths)
+    assert reopened.size == 3
+    assert reopened.search(vectors[0], k=1)[0][1].document_id == "b"
+
+    store.replace_document("b", vectors[:2], _chunks("b", 2))
+    store.flush()
+    assert store.size == 2
+
+    store.compact()
+    assert store.index.ntotal == 2
+    assert len(store.metadata_store) == 2
+
+    compacted = VectorStore(dim=6)
+    compacted.open(*paths)
+    assert compacted.size == 2
+    assert compacted.search(vectors[1], k=1)[0][1].chunk_id == "b-1"
+
+
+def test_replace_logs_new_rows_before_tombstones(tmp_path, monkeypatch):
+    paths = _paths(tmp_path)
+    vectors = np.eye(4, dtype="float32")
+
+    store = VectorStore(dim=4)
+    store.open(*paths)
+    store.add(vectors[:2], _chunks("a", 2))
+    store.flush()
+
+    # Crash while writing the new segment: the old version must survive
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store._log, "append", crash)
+    with pytest.raises(OSError):
+        store.replace_document("a", vectors[2:], _chunks("a", 2))
+
+    reopened = VectorStore(dim=4)
+    reopened.open(*paths)
+    assert reopened.size == 2
+    assert reopened.search(vectors[0], k=1)[0][1].chunk_id == "a-0"
+
+
+def test_replace_document_streams_blocks():
+    vectors = _vectors(7, 4)
+    store = VectorStore(dim=4)
+    store.add(vectors[:2], _chunks("a", 2))
+
+    blocks = (vectors[i:i + 3] for i in range(2, 7, 3))
+    ids = store.replace_document("a", blocks, _chunks("a", 5))
+
+    assert list(ids) == [2, 3, 4, 5, 6]
+    assert store.size == 5
+    assert store.search(vectors[6], k=1)[0][1].chunk_id == "a-4"
+
+    with pytest.raises(ValueError):
+        store.replace_document("a", iter([vectors[:2]]), _chunks("a", 3))
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq"])
+def test_training_waits_for_enough_vectors(tmp_path, index_type):
+    vectors = _vectors(700, 16, seed=1)
+    chunks = _corpus(70, 10)
+    paths = _paths(tmp_path)
+
+    # 39 * nlist = 390 (ivf_flat); 39 * 2 ** pq_nbits = 624 (ivf_pq)
+    config = IndexConfig(index_type=index_type, nlist=10, pq_m=4, pq_nbits=4, nprobe=10)
+    store = VectorStore(dim=16, config=config)
+    store.open(*paths)
+    store.add(vectors[:3], chunks[:3])
+    assert store._staging
+    assert store.search(vectors[1], k=1)[0][1].chunk_id == "doc0-1"
+
+    # The staging state survives a snapshot
+    store.add(vectors[3:300], chunks[3:300])
+    store.delete_document("doc1")
+    store.compact()
+    reopened = VectorStore(dim=16)
+    reopened.open(*paths)
+    assert reopened._staging and reopened.size == 290
+
+    reopened.add(vectors[300:], chunks[300:])
+    assert not reopened._staging
+    assert reopened.index.is_trained
+    assert reopened.size == 690
+    assert all(c.document_id != "doc1" for _, c in reopened.search(vectors[15], k=20))
+    hits = [reopened.search(vectors[i], k=1)[0][1].chunk_id == chunks[i].chunk_id
+            for i in range(0, 700, 7) if not 10 <= i < 20]
+    assert np.mean(hits) >= 0.9
+
+
+def test_vector_store_filtered_search(tmp_path):
+    vectors = np.eye(6, dtype="float32")
+    store = VectorStore(dim=6)
+    store.add(vectors[:3], _chunks("a", 3))
+    store.add(vectors[3:], _chunks("b", 3))
+
+    # Nearest overall is in "a", but the scan is restricted to "b"
+    results = store.search(vectors[0], k=2, filters={"document_id": "b"})
+    assert len(results) == 2
+    assert all(c.document_id == "b" for _, c in results)
+
+    results = store.search(vectors[0], k=6, filters={"source": ["a.txt", "b.txt"]})
+    assert len(results) == 6
+
+    # Inverted map survives save/load; tombstones still apply
+    store.save(str(tmp_path / "faiss.index"), str(tmp_path / "chunks.bin"))
+    loaded = VectorStore(dim=6)
+    loaded.load(str(tmp_path / "faiss.index"), str(tmp_path / "chunks.bin"))
+    loaded.delete_document("b")
+
+    assert loaded.search(vectors[3], k=3, filters={"source": "b.txt"}) == []
+    assert len(loaded.search(vectors[3], k=3, filters={"source": "a.txt"})) == 3
+
+    with pytest.raises(ValueError):
+        loaded.search(vectors[0], k=1, filters={"author": "x"})
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat", "ivf_pq"])
+def test_selective_filters_still_return_k_results(index_type):
+    vectors = _vectors(4000, 16, seed=3)
+    chunks = _corpus(200, 20)
+    config = IndexConfig(index_type=index_type, nlist=64, nprobe=4, pq_m=8, train_size=4000)
+    store = VectorStore(dim=16, config=config)
+    store.add(vectors, chunks)
+    store.delete_document("doc0")
+
+    # 0.5% of the index: doc7 plus doc0, which is tombstoned
+    allowed = np.arange(140, 160)
+    for query in vectors[:20:4]:
+        results = store.search(query, k=10, filters={"document_id": ["doc0", "doc7"]})
+        assert len(results) == 10
+
+        exact = allowed[np.argsort(((vectors[allowed] - query) ** 2).sum(axis=1))[:10]]
+        found = {int(c.chunk_id.split("-")[1]) + 140 for _, c in results}
+        overlap = len(found & set(exact.tolist()))
+        assert overlap == 10 if index_type != "ivf_pq" else overlap >= 7
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_concurrent_searches_with_tombstones_and_filters(index_type):
+    vectors = _vectors(400, 8, seed=2)
+    store = VectorStore(dim=8, config=IndexConfig(index_type=index_type))
+    store.add(vectors, _corpus(40, 10))
+    store.delete_document("doc0")
+
+    def search(i):
+        filters = {"document_id": f"doc{i % 4}"} if i % 2 else None
+        return [store.search_batch(vectors[:4], k=5, filters=filters) for _ in range(50)]
+
+    # Searches share cached id sets but never FAISS search params
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batches = [b for runs in pool.map(search, range(16)) for b in runs]
+
+    assert all(
+        chunk.document_id != "doc0"
+        for batch in batches for results in batch for _, chunk in results
+    )
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_searches_run_alongside_writes_and_compaction(tmp_path, index_type):
+    vectors = _vectors(2000, 8, seed=5)
+    chunks = _corpus(100, 20)
+    config = IndexConfig(index_type=index_type, nlist=8, train_size=500)
+    store = VectorStore(dim=8, config=config, compact_after=4)
+    store.open(*_paths(tmp_path))
+    store.add(vectors[:400], chunks[:400])
+    done = threading.Event()
+
+    # Grows past training, tombstones a document per batch, compacts
+    def write():
+        try:
+            for start in range(400, 2000, 100):
+                store.add(vectors[start:start + 100], chunks[start:start + 100])
+                store.delete_document(f"doc{start // 20}")
+                store.flush()
+                if store.needs_compaction:
+                    store.compact()
+        finally:
+            done.set()
+
+    def search(i):
+        searches = 0
+        while not done.is_set():
+            filters = {"document_id": f"doc{i}"} if i % 2 else None
+            assert all(len(r) == 5 for r in store.search_batch(vectors[:4], k=5, filters=filters))
+            searches += 1
+        return searches
+
+    with ThreadPoolExecutor(max_workers=7) as pool:
+        searchers = [pool.submit(search, i) for i in range(6)]
+        pool.submit(write).result()
+        assert all(f.result() > 0 for f in searchers)
+
+    assert store.size == 2000 - 16 * 20
+    assert store.search(vectors[1999], k=1)[0][1].chunk_id == "doc99-19"
+
+
+def test_sharded_vector_store_matches_single_store(tmp_path):
+    vectors = _vectors(40, 8, seed=1)
+    chunks = _corpus(8, 5)
+
+    single = VectorStore(dim=8)
+    single.add(vectors, chunks)
+
+    sharded = ShardedVectorStore(dim=8, num_shards=3)
+    ids = sharded.add(vectors, chunks)
+    assert sharded.size == 40
+    assert sum(1 for s in sharded.shards if s.size) > 1
+
+    # Ids come back in input order, each local to its document's shard
+    for chunk, chunk_id in zip(chunks, ids):
+        shard = sharded.shards[sharded.shard_for(chunk.document_id)]
+        row = shard.metadata_store.rows_for_ids(np.array([chunk_id]))[0]
+        assert shard.metadata_store[int(row)].chunk_id == chunk.chunk_id
+
+    queries = vectors[:4] + 0.01
+    expected = [[c.chunk_id for _, c in r] for r in single.search_batch(queries, k=5)]
+    actual = [[c.chunk_id for _, c in r] for r in sharded.search_batch(queries, k=5)]
+    assert actual == expected
+
+    sharded.save(str(tmp_path / "faiss.index"), str(tmp_path / "chunks.bin"))
+    loaded = ShardedVectorStore(dim=8, num_shards=3)
+    loaded.load(str(tmp_path / "faiss.index"), str(tmp_path / "chunks.bin"))
+    assert loaded.search(vectors[7], k=1)[0][1].chunk_id == "doc1-2"
+
+    loaded.delete_document("doc1")
+    assert loaded.size == 35
+    sharded.close()
+    loaded.close()
+
+
+def test_sharded_store_trains_one_index_for_all_shards(tmp_path):
+    vectors = _vectors(600, 16, seed=6)
+    chunks = _corpus(60, 10)
+    config = IndexConfig(index_type="ivf_flat", nlist=8, nprobe=8, train_size=400)
+    sharded = ShardedVectorStore(dim=16, num_shards=3, config=config)
+
+    # No shard holds 400 vectors on its own; together they do
+    sharded.add(vectors[:300], chunks[:300])
+    assert all(shard.staging for shard in sharded.shards)
+    sharded.add(vectors[300:], chunks[300:])
+    assert not any(shard.staging for shard in sharded.shards)
+    assert max(shard.size for shard in sharded.shards) < 400
+
+    centroids = [
+        faiss.extract_index_ivf(shard.index).quantizer.reconstruct_n(0, 8)
+        for shard in sharded.shards
+    ]
+    assert all(np.array_equal(centroids[0], c) for c in centroids[1:])
+    assert sharded.search(vectors[123], k=1)[0][1].chunk_id == chunks[123].chunk_id
+    sharded.close()
+
+
+@pytest.mark.parametrize(
+    "index_type,storage",
+    [("flat", "fp16"), ("flat", "sq8"), ("hnsw", "sq8"), ("flat", "binary")],
+)
+def test_compressed_storage_with_rescoring(tmp_path, index_type, storage):
+    vectors = _vectors(200, 32, seed=2)
+    chunks = _corpus(20, 10)
+
+    config = IndexConfig(index_type=index_type, storage=storage, rescore_factor=10)
+    store = VectorStore(dim=32, config=config)
+    store.add(vectors, chunks)
+
+    # Exact re-scoring returns true squared L2 distances
+    dist, chunk = store.search(vectors[42], k=1)[0]
+    assert chunk.chunk_id == "doc4-2"
+    assert dist == pytest.approx(0.0, abs=1e-5)
+
+    index_path, meta_path, segment_dir = _paths(tmp_path)
+    store.save(index_path, meta_path)
+    assert list(tmp_path.glob("faiss.index.v*.vectors.npy"))
+
+    loaded = VectorStore(dim=32)
+    loaded.load(index_path, meta_path)
+    assert loaded.config.storage == storage
+    assert loaded.search(vectors[42], k=1)[0][1].chunk_id == "doc4-2"
+
+    # Compaction keeps full-precision rows aligned with chunks
+    loaded.open(index_path, meta_path, segment_dir)
+    loaded.delete_document("doc0")
+    loaded.compact()
+    assert loaded.size == 190
+    assert loaded.search(vectors[42], k=1)[0][1].chunk_id == "doc4-2"
+
+
+def test_binary_storage_without_rescoring_returns_hamming_distance():
+    store = VectorStore(dim=16, config=IndexConfig(storage="binary"))
+    vectors = np.sign(_vectors(4, 16, seed=3))
+    store.add(vectors, _chunks("doc", 4))
+
+    dist, chunk = store.search(vectors[1], k=1)[0]
+    assert chunk.chunk_id == "doc-1"
+    assert dist == 0.0
+
+    with pytest.raises(ValueError):
+        VectorStore(dim=16, config=IndexConfig(index_type="hnsw", storage="binary"))
+
+
+def test_snapshot_versions_and_writes_during_save(tmp_path):
+    index_path, meta_path, segment_dir = _paths(tmp_path)
+
+    store = VectorStore(dim=8)
+    store.open(index_path, meta_path, segment_dir)
+    store.add(_vectors(5, 8, seed=4), _chunks("a", 5))
+    store.save(index_path, meta_path)
+    assert read_manifest(index_path).version == 1
+
+    # Rows added / deleted while a snapshot is being written survive it
+    with store._lock:
+        capture = store._capture()
+    late = _vectors(3, 8, seed=40)
+    store.add(late, _chunks("b", 3))
+    store.flush()
+    store._write_snapshot(index_path, meta_path, capture)
+    with store._lock:
+        store._adopt(capture)
+
+    assert len(store.metadata_store) == 8
+    assert store.search(late[1], k=1)[0][1].chunk_id == "b-1"
+
+    # Only the current version's files remain
+    manifest = read_manifest(index_path)
+    assert manifest.version == 2
+    assert sorted(p.name for p in tmp_path.glob("*.v*")) == [
+        manifest.metadata,
+        manifest.index,
+    ]
+
+    reopened = VectorStore(dim=8)
+    reopened.open(index_path, meta_path, segment_dir)
+    assert reopened.size == 8
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_mmap_load_is_copied_on_first_write(tmp_path, index_type):
+    index_path, meta_path, segment_dir = _paths(tmp_path)
+    vectors = _vectors(64, 8, seed=5)
+
+    config = IndexConfig(index_type=index_type, nlist=4, train_size=64)
+    store = VectorStore(dim=8, config=config)
+    store.add(vectors, _chunks("a", 64))
+    store.save(index_path, meta_path)
+
+    mapped = VectorStore(dim=8, mmap=True)
+    mapped.open(index_path, meta_path, segment_dir)
+    mapped.warmup()
+    assert mapped._mapped
+    assert mapped.search(vectors[3], k=1)[0][1].chunk_id == "a-3"
+
+    extra = _vectors(2, 8, seed=50)
+    mapped.add(extra, _chunks("b", 2))
+    mapped.delete_document("a")
+    assert not mapped._mapped
+    assert mapped.search(extra[0], k=1)[0][1].chunk_id == "b-0"
+
+    # Compaction maps the new snapshot again
+    mapped.compact()
+    assert mapped._mapped
+    assert mapped.size == 2
+    assert mapped.search(extra[1], k=1)[0][1].chunk_id == "b-1"
+
+
+@pytest.mark.parametrize("reduction", ["pca", "truncate"])
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_dimensionality_reduction(tmp_path, reduction, index_type):
+    # Most variance in the leading dimensions, like a Matryoshka embedding
+    vectors = _vectors(400, 32)
+    vectors[:, 8:] *= 0.05
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = _chunks("a", 200) + _chunks("b", 200)
+
+    paths = _paths(tmp_path)
+    config = IndexConfig(index_type=index_type, reduction=reduction, reduced_dim=8, nlist=8, nprobe=8)
+    store = VectorStore(dim=32, config=config)
+    store.open(*paths)
+    store.add(vectors, chunks)
+    store.flush()
+
+    # Queries are full-dimension; the index projects them itself
+    assert store.index.d == 32
+    hits = [
+        store.search(vectors[i], k=1)[0][1].chunk_id == chunks[i].chunk_id
+        for i in range(0, 400, 10)
+    ]
+    assert np.mean(hits) >= 0.9
+    assert all(c.document_id == "b" for _, c in store.search(vectors[0], k=5, filters={"document_id": "b"}))
+
+    store.delete_document("a")
+    store.compact()
+    assert store.index.ntotal == 200
+
+    # The fitted transform is saved inside the index
+    loaded = VectorStore(dim=32)
+    loaded.open(*paths)
+    assert loaded.config.reduction == reduction
+    assert loaded.search(vectors[250], k=1)[0][1].chunk_id == "b-50"
+
+
+def test_pca_is_fitted_once_enough_vectors_arrive():
+    vectors = _vectors(100, 32, seed=3)
+    chunks = _corpus(10, 10)
+
+    # An ordinary small first document: fewer vectors than reduced_dim
+    store = VectorStore(dim=32, config=IndexConfig(reduction="pca", reduced_dim=16))
+    store.add(vectors[:3], chunks[:3])
+    assert store._staging
+    assert store.search(vectors[2], k=1)[0][1].chunk_id == "doc0-2"
+
+    store.add(vectors[3:], chunks[3:])
+    assert not store._staging
+    assert store.search(vectors[50], k=1)[0][1].chunk_id == "doc5-0"
+
+
+def test_reduction_config_is_validated():
+    with pytest.raises(ValueError):
+        VectorStore(dim=8, config=IndexConfig(reduction="pca", reduced_dim=8))
+    with pytest.raises(ValueError):
+        VectorStore(dim=8, config=IndexConfig(reduction="truncate", reduced_dim=0))
+    with pytest.raises(ValueError):
+        VectorStore(dim=16, config=IndexConfig(storage="binary", reduction="pca", reduced_dim=8))
+
+
+def test_bm25_index_follows_updates_and_persists(tmp_path):
+    from app.retrieval.bm25_index import BM25Index
+
+    paths = _paths(tmp_path)
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(40)]
+
+    def texts(n):
+        return [" ".join(rng.choice(words, size=rng.integers(3, 12))) for _ in range(n)]
+
+    def expected(store, query, k=5):
+        # Tombstoned chunks count towards the statistics until compaction
+        rows = store.metadata_store
+        live = ~np.isin(rows.ids, store._deleted)
+        index = BM25Index.build_texts(c.text for c in rows)
+        docs, scores = index.search(
+            index.analyzer.analyze(query), k, accept=lambda docs: live[docs]
+        )
+        return [(rows[int(d)].chunk_id, s) for d, s in zip(docs, scores)]
+
+    def check(store):
+        for query in ("w1 w2", "w3 w7 w7 w30", "w0"):
+            got = [(c.chunk_id, s) for s, c in store.search_bm25(query, k=5)]
+            want = expected(store, query)
+            assert [c for c, _ in got] == [c for c, _ in want]
+            np.testing.assert_allclose([s for _, s in got], [s for _, s in want], rtol=1e-9)
+
+    store = VectorStore(dim=4, bm25=True, mmap=True)
+    store.open(*paths)
+    for doc in "abc":
+        store.add(_vectors(20, 4), _chunks(doc, texts=texts(20)))
+    store.flush()
+    check(store)
+
+    store.delete_document("b")
+    check(store)
+    assert all(c.document_id != "b" for _, c in store.search_bm25("w1 w2", k=60))
+
+    filtered = store.search_bm25("w1 w2", k=60, filters={"document_id": "c"})
+    assert filtered and all(c.document_id == "c" for _, c in filtered)
+
+    # Rebuilt from the segment log and tombstones
+    reopened = VectorStore(dim=4, bm25=True)
+    reopened.open(*paths)
+    check(reopened)
+
+    store.replace_document("a", _vectors(5, 4), _chunks("a", texts=texts(5)))
+    store.compact()
+    assert read_manifest(paths[0]).bm25 is not None
+    assert store.bm25_index.num_docs == store.bm25_index.num_live == 25
+    check(store)
+
+    # Loaded from the snapshot's BM25 file, then updated again
+    reopened = VectorStore(dim=4, bm25=True, mmap=True)
+    reopened.open(*paths)
+    check(reopened)
+    reopened.add(_vectors(10, 4), _chunks("d", texts=texts(10)))
+    reopened.delete_document("c")
+    check(reopened)
+
+    # Snapshots written without a BM25 index are indexed on load
+    plain = VectorStore(dim=4)
+    plain.add(_vectors(10, 4), _chunks("e", texts=texts(10)))
+    plain.save(str(tmp_path / "plain.index"), str(tmp_path / "plain.bin"))
+    upgraded = VectorStore(dim=4, bm25=True)
+    upgraded.load(str(tmp_path / "plain.index"), str(tmp_path / "plain.bin"))
+    check(upgraded)